@@ -1,11 +1,13 @@
 # C:\Users\Admin\Desktop\bond_platform\bonds\filters.py
 import django_filters
 from .models import ISINBasicInfo,CreditRating,IssuerType,TaxCategory,OptionType
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import F, FilteredRelation, Q
 from django.core.exceptions import ValidationError
-from django.db.models import Case, When, IntegerField
-from django.core.cache import cache
-from typing import Dict
+from django.utils import timezone
+from rest_framework import filters
+from datetime import time, timedelta
+from .utils import RATING_ORDER, INVESTMENT_GRADE_THRESHOLD
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,55 +15,6 @@ logger.setLevel(logging.DEBUG)
 
 
 
-# ============================================
-# RATING HIERARCHY - Synced with CreditRating Model
-# ============================================
-RATING_ORDER: Dict[str, int] = {
-    "AAA": 1,
-    "AA+": 2,
-    "AA": 3,
-    "AA-": 4,
-    "A+": 5,
-    "A": 6,
-    "A-": 7,
-    "BBB+": 8,
-    "BBB": 9,
-    "BBB-": 10,   # Investment grade cutoff
-    "BB+": 11,
-    "BB": 12,
-    "BB-": 13,
-    "B+": 14,
-    "B": 15,
-    "B-": 16,
-    "C": 17,
-    "D": 18,
-    "UNRATED": 999,  # Lowest priority
-}
-
-# Investment grade threshold
-INVESTMENT_GRADE_THRESHOLD = 10  # BBB- and above
-
-
-def get_rating_annotation():
-    """
-    Returns Case/When annotation for rating rank.
-    Cached to avoid recreating on every request.
-    """
-    cache_key = 'rating_case_annotation_v1'
-    annotation = cache.get(cache_key)
-    
-    if annotation is None:
-        annotation = Case(
-            *[When(latest_rating__iexact=rating, then=rank) 
-              for rating, rank in RATING_ORDER.items()],
-            default=999,  # Fallback for any edge cases
-            output_field=IntegerField()
-        )
-        cache.set(cache_key, annotation, timeout=3600)
-    
-    return annotation
-
-
 def validate_rating(value: str) -> str:
     """Validate and normalize rating value"""
     value_upper = value.upper().strip()
@@ -77,6 +30,57 @@ def validate_rating(value: str) -> str:
 
 
 
+def tenure_cutoff_date(years, round_up):
+    """
+    Maturity date at which remaining tenure equals `years` (365.25-day years,
+    measured from now). Lets tenure filters run as plain maturity_date range
+    predicates instead of computing EXTRACT(EPOCH ...) for every row.
+    """
+    moment = timezone.now() + timedelta(days=float(years) * 365.25)
+    cutoff = moment.date()
+    if round_up and moment.time() != time.min:
+        cutoff += timedelta(days=1)
+    return cutoff
+
+
+def with_post_tax_ytm(queryset, slab):
+    """
+    Annotate post_tax_ytm_percent: the bond's PostTaxYield for `slab`
+    (NULL without one). One LEFT JOIN on the (isin, slab) unique index.
+    """
+    if "post_tax_ytm_percent" in queryset.query.annotations:
+        return queryset
+    return queryset.annotate(
+        slab_yield=FilteredRelation("post_tax_yields", condition=Q(post_tax_yields__slab=slab)),
+        post_tax_ytm_percent=F("slab_yield__post_tax_ytm_percent"),
+    )
+
+
+class TenureOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that sorts tenure_days / tenure_years on maturity_date.
+    Remaining tenure is monotonic in maturity_date, so the order is the same
+    and Postgres can walk the maturity_date index instead of sorting.
+    """
+    field_aliases = {
+        "tenure_days": "maturity_date",
+        "tenure_years": "maturity_date",
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        mapped = []
+        for term in ordering:
+            prefix = "-" if term.startswith("-") else ""
+            field = self.field_aliases.get(term.lstrip("-"), term.lstrip("-"))
+            if field not in [t.lstrip("-") for t in mapped]:
+                mapped.append(prefix + field)
+        return mapped
+
+
 class CaseInsensitiveChoiceBaseFilter(django_filters.CharFilter):
     """
     Case-insensitive filter that works for single or multiple comma-separated values.
@@ -149,6 +153,57 @@ class BondFilter(django_filters.FilterSet):
         label='Maximum YTM (%)'
     )
 
+    # Spreads (basis points, maintained by BondSpreadService)
+    spread_min = django_filters.NumberFilter(
+        field_name='gsec_spread_bps',
+        lookup_expr='gte',
+        label='Minimum G-sec Spread (bps)'
+    )
+    spread_max = django_filters.NumberFilter(
+        field_name='gsec_spread_bps',
+        lookup_expr='lte',
+        label='Maximum G-sec Spread (bps)'
+    )
+    rating_spread_min = django_filters.NumberFilter(
+        field_name='rating_spread_bps',
+        lookup_expr='gte',
+        label='Minimum Spread over Rating Curve (bps)'
+    )
+    rating_spread_max = django_filters.NumberFilter(
+        field_name='rating_spread_bps',
+        lookup_expr='lte',
+        label='Maximum Spread over Rating Curve (bps)'
+    )
+
+    # Yield to worst (maintained by BondPricingService)
+    ytw_percent_min = django_filters.NumberFilter(
+        field_name='ytw_percent',
+        lookup_expr='gte',
+        label='Minimum Yield to Worst (%)'
+    )
+    ytw_percent_max = django_filters.NumberFilter(
+        field_name='ytw_percent',
+        lookup_expr='lte',
+        label='Maximum Yield to Worst (%)'
+    )
+
+    # Post-tax YTM for one investor slab (PostTaxYield, maintained by PostTaxYieldService)
+    tax_slab = django_filters.ChoiceFilter(
+        choices=[(slab, slab) for slab in settings.BOND_TAX_SLABS],
+        method='filter_tax_slab',
+        label='Investor Tax Slab (%) for post-tax YTM filters and ordering',
+    )
+    post_tax_ytm_min = django_filters.NumberFilter(
+        field_name='post_tax_ytm_percent',
+        lookup_expr='gte',
+        label='Minimum Post-tax YTM (%)'
+    )
+    post_tax_ytm_max = django_filters.NumberFilter(
+        field_name='post_tax_ytm_percent',
+        lookup_expr='lte',
+        label='Maximum Post-tax YTM (%)'
+    )
+
     # Coupon Rate
     coupon_rate_min = django_filters.NumberFilter(
         field_name='coupon_rate_percent', 
@@ -186,7 +241,7 @@ class BondFilter(django_filters.FilterSet):
     )
 
     credit_rating = CaseInsensitiveChoiceBaseFilter(
-        field_name='latest_rating',
+        field_name='current_rating',
         choices=CreditRating,
         label='Credit Rating',
         allow_multiple=True
@@ -258,7 +313,7 @@ class BondFilter(django_filters.FilterSet):
     )
     
     perpetual = django_filters.BooleanFilter(
-        field_name='detailed_info__perpetual',
+        field_name='prepetual',
         label='Perpetual Bonds Only'
     )
 
@@ -266,12 +321,25 @@ class BondFilter(django_filters.FilterSet):
         model = ISINBasicInfo
         fields = []
 
+    POST_TAX_PARAMS = ("tax_slab", "post_tax_ytm_min", "post_tax_ytm_max")
+
+    def filter_queryset(self, queryset):
+        # The post-tax filters and ordering read the annotation, so join the
+        # slab's yields first - and only when the request uses them
+        if any(self.data.get(param) for param in self.POST_TAX_PARAMS) or "post_tax_ytm_percent" in self.data.get("ordering", ""):
+            queryset = with_post_tax_ytm(queryset, self.form.cleaned_data.get("tax_slab") or settings.BOND_DEFAULT_TAX_SLAB)
+        return super().filter_queryset(queryset)
+
+    def filter_tax_slab(self, queryset, name, value):
+        """Selects the slab for filter_queryset's annotation; filters nothing by itself"""
+        return queryset
+
     def filter_tenure_year_min(self, queryset, name, value):
         """Filter for minimum tenure years with validation"""
         if value is not None:
             if value < 0:
                 raise ValidationError("Minimum tenure cannot be negative")
-            return queryset.filter(tenure_years__gte=value)
+            return queryset.filter(maturity_date__gte=tenure_cutoff_date(value, round_up=True))
         return queryset
 
     def filter_tenure_year_max(self, queryset, name, value):
@@ -279,7 +347,7 @@ class BondFilter(django_filters.FilterSet):
         if value is not None:
             if value < 0:
                 raise ValidationError("Maximum tenure cannot be negative")
-            return queryset.filter(tenure_years__lte=value)
+            return queryset.filter(maturity_date__lte=tenure_cutoff_date(value, round_up=False))
         return queryset
     
 
@@ -297,12 +365,8 @@ class BondFilter(django_filters.FilterSet):
             validated_rating = validate_rating(value)
             threshold = RATING_ORDER[validated_rating]
             
-            # Annotate if not already done
-            if 'rating_rank' not in queryset.query.annotations:
-                queryset = queryset.annotate(rating_rank=get_rating_annotation())
-            
             # Lower rank number = better quality
-            return queryset.filter(rating_rank__lte=threshold)
+            return queryset.filter(current_rating_rank__lte=threshold)
             
         except ValidationError as e:
             logger.warning(f"Invalid rating_min value: {value}")
@@ -320,12 +384,8 @@ class BondFilter(django_filters.FilterSet):
             validated_rating = validate_rating(value)
             threshold = RATING_ORDER[validated_rating]
             
-            # Annotate if not already done
-            if 'rating_rank' not in queryset.query.annotations:
-                queryset = queryset.annotate(rating_rank=get_rating_annotation())
-            
             # Higher rank number = worse quality
-            return queryset.filter(rating_rank__gte=threshold)
+            return queryset.filter(current_rating_rank__gte=threshold)
             
         except ValidationError as e:
             logger.warning(f"Invalid rating_max value: {value}")
@@ -341,11 +401,7 @@ class BondFilter(django_filters.FilterSet):
         if not value:
             return queryset
         
-        # Annotate if not already done
-        if 'rating_rank' not in queryset.query.annotations:
-            queryset = queryset.annotate(rating_rank=get_rating_annotation())
-        
-        return queryset.filter(rating_rank__lte=INVESTMENT_GRADE_THRESHOLD)
+        return queryset.filter(current_rating_rank__lte=INVESTMENT_GRADE_THRESHOLD)
     
     def filter_has_option(self, queryset, name, value):
         """
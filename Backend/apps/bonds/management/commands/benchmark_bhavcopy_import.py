@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINDetailedInfo
+from apps.bonds.services.bhavcopy_importer import BhavcopyImporter
+from pathlib import Path
+import csv
+import random
+import tempfile
+import tracemalloc
+import zipfile
+
+HEADER = ["ISIN", "TIMESTAMP", "CLOSE_PRICE", "LAST_PRICE", "YIELD", "TOTTRDQTY", "TOTTRDVAL", "TOTALTRADES", "WAP", "WAY"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark BhavcopyImporter: write a full-market bhavcopy for N ISINs (plus unknown ones) "
+        "as .csv and .zip and time the import of each. Runs in a transaction that is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="ISINs in the file")
+        parser.add_argument("--unknown", type=float, default=0.01, help="Fraction of extra rows with unknown ISINs")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--memory", action="store_true", help="Trace peak Python memory (slows the run down)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        isin_codes = list(ISINDetailedInfo.objects.order_by("isin_id").values_list("isin_id", flat=True)[:options["rows"]])
+        isin_codes += [f"INZ{n:09d}" for n in range(int(len(isin_codes) * options["unknown"]))]
+        rng.shuffle(isin_codes)
+        day = timezone.localdate().strftime("%d-%b-%Y").upper()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "bhavcopy.csv"
+            with open(path, "w", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(HEADER)
+                for isin_code in isin_codes:
+                    price = 90 + rng.random() * 20
+                    quantity = rng.randint(1, 5000)
+                    writer.writerow([
+                        isin_code, day, f"{price:.4f}", f"{price:.4f}", f"{7 + rng.random():.4f}", quantity,
+                        f"{price * quantity:,.2f}", rng.randint(1, 200), f"{price:.4f}", f"{7 + rng.random():.4f}",
+                    ])
+            archive = Path(directory) / "bhavcopy.zip"
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipped:
+                zipped.write(path, "bhavcopy.csv")
+            self.stdout.write(f"Bhavcopy: {len(isin_codes)} rows, {path.stat().st_size / 1e6:.1f}MB csv, "
+                              f"{archive.stat().st_size / 1e6:.1f}MB zip\n")
+
+            header = f"{'run':<12} {'seconds':>8} {'updated':>8} {'unchanged':>10} {'rejected':>9} {'peak memory':>12}"
+            self.stdout.write(header)
+            self.stdout.write("-" * len(header))
+            using = router.db_for_write(ISINDetailedInfo)
+            for runs in ((("csv", path), ("csv, rerun", path)), (("zip", archive),)):
+                with transaction.atomic(using=using):
+                    for name, source in runs:
+                        if options["memory"]:
+                            tracemalloc.start()
+                        counts = BhavcopyImporter().run(source, report_path=Path(directory) / "rejects.csv")
+                        peak = 0
+                        if options["memory"]:
+                            peak = tracemalloc.get_traced_memory()[1]
+                            tracemalloc.stop()
+                        self.stdout.write(
+                            f"{name:<12} {counts['seconds']:>8.2f} {counts['updated']:>8} {counts['skipped']:>10} "
+                            f"{counts['failed']:>9} {f'{peak / 1e6:.1f}MB' if peak else '-':>12}"
+                        )
+                    transaction.set_rollback(True, using=using)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from decimal import Decimal
+from pathlib import Path
+import csv
+import random
+import tempfile
+
+# A typical nightly isin_basic_info feed
+COLUMNS = [
+    "isin_code", "isin_description", "issuer_name", "issuer_type", "coupon_rate_percent", "maturity_date",
+    "ytm_percent", "face_value_rs", "issue_size_lakhs", "issue_date", "isin_active",
+    "interest_payment_frequency", "tax_category", "secured", "listed_unlisted", "trading_status",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark BondETLLoader on isin_basic_info: export N existing rows as a CSV feed, "
+        "then time a full load, an unchanged rerun, a run with --churn changed rows and the revert"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Rows in the feed")
+        parser.add_argument("--churn", type=float, default=0.01, help="Fraction of rows changed in the churn run")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rows = list(ISINBasicInfo.objects.order_by("isin_code").values_list(*COLUMNS)[:options["rows"]])
+        self.stdout.write(f"Feed: {len(rows)} rows x {len(COLUMNS)} columns\n")
+
+        ytm = COLUMNS.index("ytm_percent")
+        churned = [list(row) for row in rows]
+        for row in random.Random(options["seed"]).sample(churned, int(len(rows) * options["churn"])):
+            row[ytm] = (row[ytm] or Decimal("0")) + Decimal("0.125")
+
+        with tempfile.TemporaryDirectory() as directory:
+            feed = self.write(Path(directory) / "isin_basic_info.csv", rows)
+            churn_feed = self.write(Path(directory) / "isin_basic_info_churn.csv", churned)
+
+            header = f"{'run':<28} {'seconds':>8} {'inserted':>9} {'updated':>9} {'unchanged':>10}"
+            self.stdout.write(header)
+            self.stdout.write("-" * len(header))
+            for name, path in (
+                ("initial (hashes written)", feed),
+                ("rerun, no changes", feed),
+                (f"{options['churn']:.0%} churn", churn_feed),
+                ("revert churn", feed),
+            ):
+                counts = BondETLLoader(ISINBasicInfo).load(path)
+                self.stdout.write(
+                    f"{name:<28} {counts['seconds']:>8.2f} {counts['inserted']:>9} {counts['updated']:>9} {counts['skipped']:>10}"
+                )
+
+    @staticmethod
+    def write(path, rows):
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow(["" if value is None else value for value in row])
+        return path
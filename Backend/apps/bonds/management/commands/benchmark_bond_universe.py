@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from apps.bonds.views import BondsListView
+from apps.bonds.services.bond_universe_snapshot import BondUniverseSnapshot
+import statistics
+import time
+
+# Representative catalogue screens (query strings as the frontend sends them)
+SCENARIOS = [
+    "",
+    "take=20&skip=2000",
+    "ytm_percent_min=8&ytm_percent_max=12",
+    "rating_min=A&balance_tenure_max=5&ordering=-ytm_percent",
+    "investment_grade_only=true&secured=true&ordering=tenure_years",
+    "issuer_type=PSU,CORPORATE&tax_category=taxable&coupon_rate_min=7",
+    "credit_rating=AAA,UNRATED&has_option=false&ordering=-issue_date",
+    "interest_payment_frequency=monthly&face_value_max=100000&take=50",
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark BondsListView on the SQL path vs the in-memory universe snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Requests per scenario and path")
+        parser.add_argument("--query", action="append", help="Extra query string to benchmark (repeatable)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        snapshot = BondUniverseSnapshot.rebuild()
+        self.stdout.write(f"Snapshot: {snapshot.size} bonds built in {time.perf_counter() - started:.2f}s\n")
+
+        factory = RequestFactory()
+        header = f"{'scenario':<72} {'sql p50':>9} {'snap p50':>9} {'sql p95':>9} {'snap p95':>9}  same"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        for query in SCENARIOS + (options["query"] or []):
+            sql_times, sql_data = self.run(factory, query, options["repeat"], enabled=False)
+            snap_times, snap_data = self.run(factory, query, options["repeat"], enabled=True)
+            same = "yes" if sql_data == snap_data else "NO"
+            self.stdout.write(
+                f"{query or '(default)':<72} {self.p(sql_times, 50):>9} {self.p(snap_times, 50):>9} "
+                f"{self.p(sql_times, 95):>9} {self.p(snap_times, 95):>9}  {same}"
+            )
+
+    def run(self, factory, query, repeat, enabled):
+        times, data = [], None
+        with override_settings(BOND_UNIVERSE_SNAPSHOT_ENABLED=enabled):
+            for _ in range(repeat):
+                # Call list() directly so auth / throttling stay out of the numbers
+                view = BondsListView()
+                request = factory.get("/api/bonds/bonds/", QUERY_STRING=query)
+                view.setup(request)
+                view.request = view.initialize_request(request)
+                view.format_kwarg = None
+
+                started = time.perf_counter()
+                data = view.list(view.request).data
+                times.append((time.perf_counter() - started) * 1000)
+        return times, data
+
+    @staticmethod
+    def p(times, percentile):
+        if len(times) < 2:
+            return f"{times[0]:.1f}ms"
+        return f"{statistics.quantiles(times, n=100)[percentile - 1]:.1f}ms"
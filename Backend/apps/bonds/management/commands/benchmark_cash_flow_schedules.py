@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.cash_flow_schedule import CashFlowSchedule, CashFlowScheduleService
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the cash-flow schedule engine: generate every unmatured bond's schedule "
+        "and time the cold, cached and single-change paths of CashFlowScheduleService"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per step")
+        parser.add_argument("--isin", help="Also print this bond's schedule")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        started = time.perf_counter()
+        isin_codes, keys, terms = CashFlowScheduleService.load_terms()
+        self.stdout.write(f"Terms: {len(isin_codes)} bonds loaded in {time.perf_counter() - started:.2f}s\n")
+
+        header = f"{'step':<40} {'ms (median)':>12} {'bonds':>8} {'flows':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        ms, schedule = self.time(lambda: CashFlowSchedule.build(isin_codes, keys, terms), repeat)
+        self.row("generate (vectorized)", ms, schedule)
+
+        def cold():
+            CashFlowScheduleService.clear()
+            return CashFlowScheduleService.schedules()
+
+        ms, schedule = self.time(cold, repeat)
+        self.row("schedules(), cold (load + generate)", ms, schedule)
+        ms, schedule = self.time(CashFlowScheduleService.schedules, repeat)
+        self.row("schedules(), cached", ms, schedule)
+
+        def one_change():
+            # Forget one bond's key, as if its data_hash had changed
+            CashFlowScheduleService._cache.keys[0] = None
+            return CashFlowScheduleService.schedules()
+
+        ms, schedule = self.time(one_change, repeat)
+        self.row("schedules(), 1 bond changed", ms, schedule)
+
+        if options["isin"]:
+            self.stdout.write("")
+            for flow in schedule.flows(options["isin"]):
+                self.stdout.write(f"{flow['date']}  coupon {flow['coupon']:>14.4f}  principal {flow['principal']:>14.4f}")
+
+    @staticmethod
+    def time(call, repeat):
+        call()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), result
+
+    def row(self, name, ms, schedule):
+        self.stdout.write(f"{name:<40} {ms:>12.2f} {len(schedule):>8} {schedule.flow_count:>10}")
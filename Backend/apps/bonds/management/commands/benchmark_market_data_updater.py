@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINDetailedInfo
+from apps.bonds.services.market_data_updater import MarketDataUpdater
+from decimal import Decimal
+import datetime
+import random
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark intraday tick ingestion into ISINDetailedInfo: a save() per tick vs "
+        "MarketDataUpdater coalescing per window. Runs in a transaction that is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ticks", type=int, default=200_000, help="Ticks for the coalesced run")
+        parser.add_argument("--isins", type=int, default=5000, help="Distinct ISINs the ticks are spread over")
+        parser.add_argument("--naive-ticks", type=int, default=2000, help="Ticks for the save() per tick run")
+        parser.add_argument("--window", type=float, default=0.5, help="Coalescing window in seconds")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        isin_codes = list(
+            ISINDetailedInfo.objects.order_by("isin_id").values_list("isin_id", flat=True)[:options["isins"]]
+        )
+        ticks = self.ticks(isin_codes, options["ticks"], random.Random(options["seed"]))
+        self.stdout.write(f"{len(ticks)} ticks over {len(isin_codes)} ISINs, window {options['window']}s\n")
+
+        with transaction.atomic(using=router.db_for_write(ISINDetailedInfo)):
+            naive = ticks[:options["naive_ticks"]]
+            started = time.perf_counter()
+            self.save_per_tick(naive)
+            naive_seconds = time.perf_counter() - started
+
+            updater = MarketDataUpdater(window=options["window"])
+            started = time.perf_counter()
+            stats = updater.run(iter(ticks))
+            seconds = time.perf_counter() - started
+            transaction.set_rollback(True, using=router.db_for_write(ISINDetailedInfo))
+
+        flushes = sorted(stats["flush_seconds"])
+        header = f"{'strategy':<22} {'ticks':>8} {'seconds':>8} {'ticks/s':>9} {'writes':>8} {'invalidations':>14}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        self.stdout.write(
+            f"{'save() per tick':<22} {len(naive):>8} {naive_seconds:>8.2f} {len(naive) / naive_seconds:>9.0f} "
+            f"{len(naive):>8} {len(naive):>14}"
+        )
+        self.stdout.write(
+            f"{'coalesced':<22} {stats['ticks']:>8} {seconds:>8.2f} {stats['ticks'] / seconds:>9.0f} "
+            f"{stats['rows']:>8} {stats['flushes']:>14}"
+        )
+        self.stdout.write(
+            f"\nFlush latency over {len(flushes)} flushes: p50 {self.ms(statistics.median(flushes))}, "
+            f"p99 {self.ms(flushes[int(len(flushes) * 0.99)])}, max {self.ms(flushes[-1])}"
+        )
+
+    @staticmethod
+    def ms(seconds):
+        return f"{seconds * 1000:.1f}ms"
+
+    @staticmethod
+    def ticks(isin_codes, count, rng):
+        # Trading is skewed: a few liquid bonds take most of the prints
+        weights = [1.0 / (rank + 1) for rank in range(len(isin_codes))]
+        opened = timezone.now().replace(hour=9, minute=15, second=0, microsecond=0)
+        prices = {isin_code: 95 + rng.random() * 10 for isin_code in isin_codes}
+        ticks = []
+        for n, isin_code in enumerate(rng.choices(isin_codes, weights, k=count)):
+            prices[isin_code] *= 1 + rng.gauss(0, 0.0005)
+            ticks.append({
+                "isin": isin_code,
+                "price": f"{prices[isin_code]:.4f}",
+                "yield": f"{7 + rng.random():.3f}",
+                "quantity": rng.choice((1, 5, 10, 50, 100)),
+                "traded_at": (opened + datetime.timedelta(milliseconds=n)).isoformat(),
+            })
+        return ticks
+
+    @staticmethod
+    def save_per_tick(ticks):
+        for tick in ticks:
+            detail = ISINDetailedInfo.objects.get(pk=tick["isin"])
+            price, quantity = Decimal(tick["price"]), tick["quantity"]
+            trade_date = datetime.datetime.fromisoformat(tick["traded_at"]).date()
+            same_day = detail.last_traded_date == trade_date
+            volume = detail.volume_traded or 0 if same_day else 0
+            value = (detail.weighted_avg_price_rs or 0 if same_day else 0) * volume
+            detail.volume_traded = volume + quantity
+            detail.number_of_trades = (detail.number_of_trades or 0 if same_day else 0) + 1
+            detail.value_traded_lakhs = (detail.value_traded_lakhs or 0 if same_day else 0) + price * quantity / 100_000
+            detail.weighted_avg_price_rs = (value + price * quantity) / detail.volume_traded
+            detail.last_traded_price_rs = price
+            detail.last_traded_yield_percent = Decimal(tick["yield"])
+            detail.last_trade_volume = quantity
+            detail.last_traded_date = trade_date
+            detail.save()
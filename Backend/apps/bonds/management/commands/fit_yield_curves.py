@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.yield_curve_service import YieldCurveService, nelson_siegel
+from apps.bonds.models import YieldCurve
+import numpy as np
+
+TENORS = (0.5, 1, 2, 3, 5, 7, 10, 15, 30)
+
+
+class Command(BaseCommand):
+    help = "Refit the Nelson-Siegel yield curves per rating bucket and issuer type over the live universe"
+
+    def handle(self, *args, **options):
+        result = YieldCurveService.fit()
+        header = f"{'curve':<26} {'bonds':>6} {'rmse':>6} " + " ".join(f"{f'{t:g}y':>6}" for t in TENORS)
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for curve in YieldCurve.objects.order_by("curve_type", "bucket"):
+            points = nelson_siegel(np.array(TENORS), curve.beta0, curve.beta1, curve.beta2, curve.tau)
+            self.stdout.write(
+                f"{curve.curve_type + ' ' + curve.bucket:<26} {curve.bond_count:>6} {curve.rmse_percent:>6.2f} "
+                + " ".join(f"{value:>6.2f}" for value in points)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['curves']} curves fitted over {result['bonds']} bonds: load {result['load_seconds']}s, "
+            f"fit {result['fit_seconds']}s, write {result['write_seconds']}s"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.bonds.services.bhavcopy_importer import BhavcopyImporter
+import datetime
+
+
+class Command(BaseCommand):
+    help = "Apply an exchange end-of-day trade file (bhavcopy .csv or .zip) to the ISINDetailedInfo market-data fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Bhavcopy file (.csv, or .zip of .csv files)")
+        parser.add_argument("--date", type=datetime.date.fromisoformat, help="Trade date (YYYY-MM-DD) for files without a date column")
+        parser.add_argument(
+            "--map", action="append", default=[], metavar="FIELD=COLUMN",
+            help=f"Header for a field when the file uses another spelling; fields: {', '.join(BhavcopyImporter.COLUMNS)}",
+        )
+        parser.add_argument("--report", help="Reject report path (default: <path>.rejects.csv)")
+        parser.add_argument("--chunk-size", type=int, default=BhavcopyImporter.CHUNK_SIZE, help="Rows per COPY / UPDATE")
+
+    def handle(self, *args, **options):
+        try:
+            mapping = dict(item.split("=", 1) for item in options["map"])
+            importer = BhavcopyImporter(mapping=mapping, trade_date=options["date"], chunk_size=options["chunk_size"])
+            counts = importer.run(options["path"], report_path=options["report"])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['processed']} rows: {counts['updated']} updated, {counts['skipped']} skipped, "
+            f"{counts['failed']} rejected in {counts['seconds']}s"
+        ))
+        if counts["report"]:
+            self.stdout.write(f"Rejects: {counts['report']}")
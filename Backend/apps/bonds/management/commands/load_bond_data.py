@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+
+
+class Command(BaseCommand):
+    help = "Load a CSV / JSON / JSON lines file into a bonds table, writing only new and changed rows (by data_hash)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(BondETLLoader.MODELS), help="Target table")
+        parser.add_argument("path", help="Source file (.csv, .json or .jsonl)")
+        parser.add_argument("--key", help="Unique key column (default: the table's natural key)")
+        parser.add_argument("--chunk-size", type=int, default=BondETLLoader.CHUNK_SIZE, help="Records per diff / COPY chunk")
+        parser.add_argument("--dry-run", action="store_true", help="Diff only, write nothing")
+
+    def handle(self, *args, **options):
+        try:
+            loader = BondETLLoader(BondETLLoader.MODELS[options["table"]], key=options["key"], chunk_size=options["chunk_size"])
+            counts = loader.load(options["path"], dry_run=options["dry_run"])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['table']}: {counts['processed']} processed, {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['skipped']} unchanged, {counts['failed']} failed "
+            f"in {counts['seconds']}s"
+        ))
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from apps.bonds.services.cached_compute import cached_compute
+import statistics
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test: concurrent readers of one expensive cached aggregate, plain get/set "
+        "vs cached_compute, with a short TTL so the run crosses many expiry boundaries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent readers")
+        parser.add_argument("--duration", type=float, default=12.0, help="Seconds per strategy")
+        parser.add_argument("--ttl", type=float, default=2.0, help="Cache TTL in seconds")
+        parser.add_argument(
+            "--target", choices=["sleep", "featured"], default="sleep",
+            help="sleep: simulated aggregate of --compute-ms; featured: the homepage featured-bonds query",
+        )
+        parser.add_argument("--compute-ms", type=float, default=300.0, help="Cost of the sleep target")
+        parser.add_argument("--think-ms", type=float, default=50.0, help="Pause between requests per reader")
+
+    def handle(self, *args, **options):
+        fn = self.target(options)
+        header = f"{'strategy':<16} {'requests':>9} {'fn calls':>9} {'p50':>9} {'p99':>9} {'max':>9}  p99 per ttl window"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name in ("get/set", "cached_compute"):
+            latencies, calls = self.run(name, fn, options)
+            windows = self.windows(latencies, options["ttl"])
+            times = [ms for _, ms in latencies]
+            self.stdout.write(
+                f"{name:<16} {len(times):>9} {calls:>9} {self.p(times, 50):>9} {self.p(times, 99):>9} "
+                f"{max(times):>7.1f}ms  {' '.join(f'{w:.0f}' for w in windows)}"
+            )
+
+    def target(self, options):
+        if options["target"] == "featured":
+            from apps.bonds.views import CURRENT_RATING_ANNOTATIONS
+            from apps.bonds.models import ISINBasicInfo
+            from apps.bonds.serializers import ISINBasicInfoSerializer
+            from django.db.models.functions import Now
+
+            def featured():
+                bonds = (
+                    ISINBasicInfo.objects.select_related("detailed_info")
+                    .annotate(**CURRENT_RATING_ANNOTATIONS)
+                    .filter(maturity_date__gte=Now())
+                    .order_by("-issue_date")[:100]
+                )
+                return ISINBasicInfoSerializer(bonds, many=True).data
+            return featured
+
+        def aggregate():
+            time.sleep(options["compute_ms"] / 1000)
+            return {"computed_at": time.time()}
+        return aggregate
+
+    def run(self, name, fn, options):
+        key = f"bonds:loadtest:{name}"
+        ttl = options["ttl"]
+        calls = [0]
+        calls_lock = threading.Lock()
+
+        def counted():
+            with calls_lock:
+                calls[0] += 1
+            return fn()
+
+        def get_set():
+            value = cache.get(key)
+            if value is None:
+                value = counted()
+                cache.set(key, value, ttl)
+            return value
+
+        def swr():
+            return cached_compute(key, counted, ttl=ttl, stale_ttl=ttl * 10)
+
+        read = get_set if name == "get/set" else swr
+        cache.delete_many([key, key + ":lock"])
+        read()  # warm up: the very first cold computation is not part of the steady state
+        calls[0] = 0
+
+        latencies = []
+        started = time.monotonic()
+        stop = started + options["duration"]
+
+        def reader():
+            local = []
+            try:
+                while time.monotonic() < stop:
+                    t0 = time.perf_counter()
+                    read()
+                    local.append((time.monotonic() - started, (time.perf_counter() - t0) * 1000))
+                    time.sleep(options["think_ms"] / 1000)
+            finally:
+                connections.close_all()
+            with calls_lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=reader) for _ in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Let a trailing background refresh finish before the next strategy
+        time.sleep(max(options["compute_ms"] / 1000, 0.5))
+        return latencies, calls[0]
+
+    def windows(self, latencies, ttl):
+        """p99 (ms) per ttl-long slice of the run - every slice holds one expiry."""
+        buckets = {}
+        for at, ms in latencies:
+            buckets.setdefault(int(at // ttl), []).append(ms)
+        return [self.quantile(buckets[i], 99) for i in sorted(buckets)]
+
+    @staticmethod
+    def quantile(times, percentile):
+        if len(times) < 2:
+            return times[0]
+        return statistics.quantiles(times, n=100)[percentile - 1]
+
+    @classmethod
+    def p(cls, times, percentile):
+        return f"{cls.quantile(times, percentile):.1f}ms"
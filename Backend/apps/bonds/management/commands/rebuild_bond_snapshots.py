@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.bond_snapshot_service import BondSnapshotService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized bond snapshot documents (stale and missing ones, or all with --full)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild every document")
+
+    def handle(self, *args, **options):
+        written = BondSnapshotService.rebuild() if options["full"] else BondSnapshotService.rebuild_stale()
+        self.stdout.write(self.style.SUCCESS(f"Bond snapshots rebuilt ({written} documents written)"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.current_rating_service import CurrentRatingService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized current_rating columns on isin_basic_info from isin_rating"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_update batch")
+
+    def handle(self, *args, **options):
+        updated = CurrentRatingService.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Current ratings rebuilt ({updated} bonds updated)"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.bond_analytics_service import BondAnalyticsService
+import os
+
+
+class Command(BaseCommand):
+    help = "Recompute current / weighted-average yield, duration and convexity for all live bonds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help=f"Processes for the pricing step (0 = all {os.cpu_count()} cores)",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per bulk_update batch")
+        parser.add_argument("--dry-run", action="store_true", help="Compute and report timings without writing")
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or os.cpu_count()
+        result = BondAnalyticsService.refresh(
+            workers=workers, batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Bond analytics refreshed for {result['bonds']} bonds ({result['priced']} priced): "
+            f"load {result['load_seconds']}s, compute {result['compute_seconds']}s, "
+            f"write {result['write_seconds']}s, updated {result['updated']}"
+        ))
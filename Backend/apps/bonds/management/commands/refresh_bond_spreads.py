@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.bond_spread_service import BondSpreadService
+from apps.bonds.services.yield_curve_service import YieldCurveService
+
+
+class Command(BaseCommand):
+    help = "Recompute every bond's G-sec spread and spread over its rating curve from the stored yield curves"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fit", action="store_true", help="Refit the yield curves first")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per UPDATE batch")
+
+    def handle(self, *args, **options):
+        if options["fit"]:
+            YieldCurveService.fit()
+        result = BondSpreadService.refresh(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Spreads refreshed for {result['bonds']} bonds ({result['priced']} with a G-sec spread): "
+            f"compute {result['compute_seconds']}s, write {result['write_seconds']}s, updated {result['updated']}"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.post_tax_yield_service import PostTaxYieldService
+import datetime
+
+
+class Command(BaseCommand):
+    help = "Recompute every bond's post-tax yield to maturity for each investor slab in settings.BOND_TAX_SLABS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=datetime.date.fromisoformat, help="Trade date (default: today); settlement follows each bond's cycle")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per INSERT / DELETE batch")
+
+    def handle(self, *args, **options):
+        result = PostTaxYieldService.refresh(batch_size=options["batch_size"], today=options["date"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Post-tax yields refreshed for {result['bonds']} bonds x {result['slabs']} slabs: "
+            f"compute {result['compute_seconds']}s, write {result['write_seconds']}s, "
+            f"upserted {result['upserted']}, deleted {result['deleted']}"
+        ))
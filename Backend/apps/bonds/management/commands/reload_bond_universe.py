@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.bonds.services.bond_universe_reload import BondUniverseReloader
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        "Full reload of isin_basic_info / isin_rating / isin_detailed_info: load the sources into shadow "
+        "tables in parallel, build their indexes, then swap them in within one short transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--basic", help="isin_basic_info source (.csv, .json or .jsonl)")
+        parser.add_argument("--ratings", help="isin_rating source")
+        parser.add_argument("--detailed", help="isin_detailed_info source")
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help=f"Loader processes, each taking a share of the ISIN prefixes (0 = all {os.cpu_count()} cores)",
+        )
+        parser.add_argument(
+            "--prune", action="store_true",
+            help="Delete rows of other tables (company / RTA mappings, ...) whose ISIN is not in the new universe",
+        )
+        parser.add_argument(
+            "--min-row-ratio", type=float, default=BondUniverseReloader.MIN_ROW_RATIO,
+            help="Refuse to swap when a table would shrink below this fraction of its live row count",
+        )
+
+    def handle(self, *args, **options):
+        sources = {
+            table: options[option]
+            for table, option in (("isin_basic_info", "basic"), ("isin_rating", "ratings"), ("isin_detailed_info", "detailed"))
+            if options[option]
+        }
+        if not sources:
+            raise CommandError("Give at least one of --basic, --ratings, --detailed")
+        try:
+            counts = BondUniverseReloader(
+                sources,
+                workers=options["workers"] or os.cpu_count(),
+                prune=options["prune"],
+                min_row_ratio=options["min_row_ratio"],
+            ).reload()
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        timings = ", ".join(f"{step} {seconds}s" for step, seconds in counts["timings"].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Reloaded {', '.join(sources)}: {counts['inserted']} rows loaded, {counts['skipped']} duplicates, "
+            f"{counts['failed']} failed in {counts['seconds']}s ({timings})"
+        ))
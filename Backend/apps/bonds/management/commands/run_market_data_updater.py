@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from apps.bonds.services.market_data_updater import MarketDataUpdater
+
+
+class Command(BaseCommand):
+    help = "Apply an intraday tick feed to ISINDetailedInfo, coalescing ticks per ISIN and writing once per window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed location passed to the tick source (a recorded file for the replay source)")
+        parser.add_argument("--source", default=settings.BOND_TICK_SOURCE, help="Dotted path of the TickSource class")
+        parser.add_argument("--speed", type=float, help="Replay in real time scaled by this factor (default: as fast as possible)")
+        parser.add_argument("--window", type=float, default=settings.BOND_MARKET_DATA_WINDOW, help="Coalescing window in seconds")
+
+    def handle(self, *args, **options):
+        source = import_string(options["source"])(options["path"], speed=options["speed"])
+        stats = MarketDataUpdater(window=options["window"]).run(source)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['ticks']} ticks ({stats['rejected']} rejected) applied in {stats['flushes']} flushes, "
+            f"{stats['rows']} row updates"
+        ))
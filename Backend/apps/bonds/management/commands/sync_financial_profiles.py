@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.bonds.services.financial_profile_service import FinancialProfileService
+
+
+class Command(BaseCommand):
+    help = "Sync the pivoted company financial profiles from the metric / ratio tables (stale and missing ones, or all with --full)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Re-pivot every company")
+
+    def handle(self, *args, **options):
+        written = FinancialProfileService.sync() if options["full"] else FinancialProfileService.sync_stale()
+        self.stdout.write(self.style.SUCCESS(f"Financial profiles synced ({written} companies written)"))
@@ -6,7 +6,7 @@ from django.db import migrations, models
 class Migration(migrations.Migration):
 
     dependencies = [
-        ("bonds", "0002_isinbasicinfo_prepetual_and_more"),
+        ("bonds", "0001_initial"),
     ]
 
     operations = [
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_current_rating(apps, schema_editor):
+    from apps.bonds.utils import get_rating_rank
+
+    db_alias = schema_editor.connection.alias
+    ISINBasicInfo = apps.get_model("bonds", "ISINBasicInfo")
+    ISINRating = apps.get_model("bonds", "ISINRating")
+    if not schema_editor.connection.features.can_distinct_on_fields:
+        return
+
+    latest = (
+        ISINRating.objects.using(db_alias)
+        .order_by("isin_id", F("rating_date").desc(nulls_last=True), "-id")
+        .distinct("isin_id")
+    )
+    bonds = []
+    for rating in latest.iterator(chunk_size=1000):
+        bonds.append(ISINBasicInfo(
+            isin_code=rating.isin_id,
+            current_rating=rating.credit_rating,
+            current_rating_agency=rating.rating_agency,
+            current_rating_date=rating.rating_date,
+            current_rating_rank=get_rating_rank(rating.credit_rating),
+        ))
+    ISINBasicInfo.objects.using(db_alias).bulk_update(
+        bonds,
+        ["current_rating", "current_rating_agency", "current_rating_date", "current_rating_rank"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0003_alter_isinrating_rating_agency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='current_rating',
+            field=models.CharField(blank=True, help_text='Latest credit rating across agencies', max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='current_rating_agency',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='current_rating_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='current_rating_rank',
+            field=models.SmallIntegerField(default=999, help_text='1 = AAA ... 18 = D, 999 = unrated'),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['current_rating'], name='isin_basic__current_a56210_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['current_rating_rank'], name='isin_basic__current_db494c_idx'),
+        ),
+        migrations.RunPython(backfill_current_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0004_isinbasicinfo_current_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['maturity_date', 'ytm_percent', 'isin_code'], name='isin_basic_catalogue_seek_idx'),
+        ),
+    ]
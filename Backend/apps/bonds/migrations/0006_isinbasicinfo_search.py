@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0005_isinbasicinfo_catalogue_seek_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('issuer_name', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('isin_description', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('issue_description', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('series', config='simple', weight='D'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='isin_basic_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('issuer_name'), name='gin_trgm_ops'), name='isin_basic_issuer_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['isin_code'], name='isin_basic_isin_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
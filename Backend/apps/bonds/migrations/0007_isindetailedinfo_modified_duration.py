@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0006_isinbasicinfo_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isindetailedinfo',
+            name='modified_duration',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=8, null=True),
+        ),
+        migrations.AlterField(
+            model_name='isindetailedinfo',
+            name='duration_years',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Macaulay duration', max_digits=8, null=True),
+        ),
+    ]
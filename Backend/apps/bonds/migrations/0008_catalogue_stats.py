@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0007_isindetailedinfo_modified_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_bonds', models.IntegerField(default=0)),
+                ('active_bonds', models.IntegerField(default=0)),
+                ('issuers', models.IntegerField(default=0, help_text='Distinct issuers with an active bond')),
+                ('total_customers', models.IntegerField(default=0)),
+                ('avg_ytm_percent', models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True)),
+                ('issue_size_lakhs', models.DecimalField(decimal_places=2, default=0, max_digits=22)),
+                ('by_rating', models.JSONField(default=dict)),
+                ('by_maturity', models.JSONField(default=dict)),
+                ('by_issuer_type', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('computation_seconds', models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True)),
+            ],
+            options={
+                'db_table': 'catalogue_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0008_catalogue_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BondSnapshotDocument',
+            fields=[
+                ('isin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot_document', serialize=False, to='bonds.isinbasicinfo')),
+                ('document', models.JSONField(default=dict)),
+                ('stale', models.BooleanField(default=False)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot_documents', to='bonds.companyinfo')),
+            ],
+            options={
+                'db_table': 'bond_snapshot_document',
+                'indexes': [models.Index(condition=models.Q(('stale', True)), fields=['stale'], name='bond_snapshot_stale_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0009_bond_snapshot_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyFinancialProfile',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='financial_profile', serialize=False, to='bonds.companyinfo')),
+                ('metrics', models.JSONField(default=list)),
+                ('ratios', models.JSONField(default=list)),
+                ('stale', models.BooleanField(default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'company_financial_profile',
+                'indexes': [models.Index(condition=models.Q(('stale', True)), fields=['stale'], name='company_profile_stale_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0010_company_financial_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datatransformationlog',
+            name='records_skipped',
+            field=models.IntegerField(default=0),
+        ),
+    ]
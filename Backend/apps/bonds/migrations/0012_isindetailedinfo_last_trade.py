@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0011_datatransformationlog_records_skipped'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isindetailedinfo',
+            name='last_trade_volume',
+            field=models.BigIntegerField(blank=True, help_text='Quantity of the last trade', null=True),
+        ),
+        migrations.AddField(
+            model_name='isindetailedinfo',
+            name='last_traded_yield_percent',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0012_isindetailedinfo_last_trade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YieldCurve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('curve_type', models.CharField(choices=[('RATING', 'Rating bucket'), ('ISSUER_TYPE', 'Issuer type')], max_length=20)),
+                ('bucket', models.CharField(max_length=20)),
+                ('beta0', models.FloatField()),
+                ('beta1', models.FloatField()),
+                ('beta2', models.FloatField()),
+                ('tau', models.FloatField()),
+                ('bond_count', models.IntegerField()),
+                ('rmse_percent', models.FloatField(help_text="RMS distance of the bucket's YTMs from the curve")),
+                ('min_tenure_years', models.FloatField()),
+                ('max_tenure_years', models.FloatField()),
+                ('as_of', models.DateField()),
+                ('fitted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'yield_curve',
+                'unique_together': {('curve_type', 'bucket')},
+            },
+        ),
+    ]
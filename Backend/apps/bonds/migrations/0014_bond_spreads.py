@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0013_yield_curve'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='gsec_spread_bps',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='YTM over the sovereign (CENTRAL_GOV) curve', max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='rating_spread_bps',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text="YTM over the curve of the bond's rating bucket", max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['gsec_spread_bps'], name='isin_basic__gsec_sp_69d035_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['rating_spread_bps'], name='isin_basic__rating__61c849_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0014_bond_spreads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='accrued_interest_rs',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Accrued interest per bond at settlement', max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='dirty_price_rs',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Last traded (clean) price plus accrued interest', max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='pricing_settlement_date',
+            field=models.DateField(blank=True, help_text='Settlement date the pricing fields are computed for', null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='yield_to_call_percent',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='yield_to_put_percent',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='isinbasicinfo',
+            name='ytw_percent',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='Yield to worst: the lower of yield to maturity and yield to call', max_digits=6, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='isinbasicinfo',
+            index=models.Index(fields=['ytw_percent'], name='isin_basic__ytw_per_7b87f1_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonds', '0015_bond_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTaxYield',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slab', models.CharField(max_length=20)),
+                ('post_tax_ytm_percent', models.DecimalField(decimal_places=3, max_digits=6)),
+                ('isin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tax_yields', to='bonds.isinbasicinfo')),
+            ],
+            options={
+                'db_table': 'bond_post_tax_yield',
+                'indexes': [models.Index(fields=['slab', 'post_tax_ytm_percent'], name='bond_post_t_slab_a6f42f_idx')],
+                'unique_together': {('isin', 'slab')},
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from datetime import date
 
 class RatingAgency(models.TextChoices):
@@ -117,6 +120,36 @@ class ISINBasicInfo(models.Model):
     seniority = models.CharField(max_length=255, null=True, blank=True)
     prepetual = models.BooleanField(default=False, null=True) 
     
+    # CURRENT RATING (denormalized from ISINRating, kept in sync by signals / rebuild_current_ratings)
+    current_rating = models.CharField(max_length=10, null=True, blank=True, help_text="Latest credit rating across agencies")
+    current_rating_agency = models.CharField(max_length=100, null=True, blank=True)
+    current_rating_date = models.DateField(null=True, blank=True)
+    current_rating_rank = models.SmallIntegerField(default=999, help_text="1 = AAA ... 18 = D, 999 = unrated")
+
+    # SPREADS (basis points over the fitted YieldCurve at the bond's tenure, maintained by BondSpreadService)
+    gsec_spread_bps = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="YTM over the sovereign (CENTRAL_GOV) curve")
+    rating_spread_bps = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="YTM over the curve of the bond's rating bucket")
+
+    # PRICING (for a trade settling on pricing_settlement_date, maintained by BondPricingService)
+    pricing_settlement_date = models.DateField(null=True, blank=True, help_text="Settlement date the pricing fields are computed for")
+    accrued_interest_rs = models.DecimalField(max_digits=18, decimal_places=4, null=True, blank=True, help_text="Accrued interest per bond at settlement")
+    dirty_price_rs = models.DecimalField(max_digits=18, decimal_places=4, null=True, blank=True, help_text="Last traded (clean) price plus accrued interest")
+    yield_to_call_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    yield_to_put_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    ytw_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True, help_text="Yield to worst: the lower of yield to maturity and yield to call")
+    
+    # SEARCH (maintained by Postgres, used by BondSearchService)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("issuer_name", weight="A", config="simple")
+            + SearchVector("isin_description", weight="B", config="simple")
+            + SearchVector("issue_description", weight="C", config="simple")
+            + SearchVector("series", weight="D", config="simple")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     # METADATA (Must stay)
     data_hash = models.CharField(max_length=64, null=True, blank=True)
     record_created_date = models.DateTimeField(auto_now_add=True)
@@ -140,6 +173,16 @@ class ISINBasicInfo(models.Model):
             models.Index(fields=["primary_exchange"]),
             models.Index(fields=["series"]),  
             models.Index(fields=["maturity_date"]),  
+            models.Index(fields=["current_rating"]),
+            models.Index(fields=["current_rating_rank"]),
+            models.Index(fields=["gsec_spread_bps"]),
+            models.Index(fields=["rating_spread_bps"]),
+            models.Index(fields=["ytw_percent"]),
+            models.Index(fields=["maturity_date", "ytm_percent", "isin_code"], name="isin_basic_catalogue_seek_idx"),
+            # Search: weighted full text + pg_trgm for fuzzy issuer / ISIN matching and icontains
+            GinIndex(fields=["search_vector"], name="isin_basic_search_vector_idx"),
+            GinIndex(OpClass(Upper("issuer_name"), name="gin_trgm_ops"), name="isin_basic_issuer_trgm_idx"),
+            GinIndex(fields=["isin_code"], opclasses=["gin_trgm_ops"], name="isin_basic_isin_trgm_idx"),
         ]
 
 
@@ -226,6 +269,8 @@ class ISINDetailedInfo(models.Model):
     market_lot = models.BigIntegerField(null=True, blank=True)  # Keep detailed
     settlement_cycle = models.CharField(max_length=100, null=True, blank=True)  # Keep detailed
     last_traded_price_rs = models.DecimalField(max_digits=18, decimal_places=4, null=True, blank=True)
+    last_traded_yield_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    last_trade_volume = models.BigIntegerField(null=True, blank=True, help_text="Quantity of the last trade")
     last_traded_date = models.DateField(null=True, blank=True)
     volume_traded = models.BigIntegerField(null=True, blank=True)
     value_traded_lakhs = models.DecimalField(max_digits=18, decimal_places=4, null=True, blank=True)
@@ -235,7 +280,8 @@ class ISINDetailedInfo(models.Model):
     current_yield_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
     
     # Risk/yield measures
-    duration_years = models.DecimalField(max_digits=8, decimal_places=4, null=True, blank=True)
+    duration_years = models.DecimalField(max_digits=8, decimal_places=4, null=True, blank=True, help_text="Macaulay duration")
+    modified_duration = models.DecimalField(max_digits=8, decimal_places=4, null=True, blank=True)
     convexity = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
     
     # Operational
@@ -393,6 +439,7 @@ class DataTransformationLog(models.Model):
     records_processed = models.IntegerField(default=0)
     records_success = models.IntegerField(default=0)
     records_failed = models.IntegerField(default=0)
+    records_skipped = models.IntegerField(default=0)  # unchanged rows (data_hash match)
     error_details = models.TextField(null=True, blank=True)
     execution_time_seconds = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
     started_at = models.DateTimeField()
@@ -407,6 +454,84 @@ class DataTransformationLog(models.Model):
         ]
 
 
+class CatalogueStats(models.Model):
+    """
+    Precomputed catalogue totals served by StatsView.
+    A single row (pk=1), rewritten by CatalogueStatsService.refresh().
+    """
+
+    total_bonds = models.IntegerField(default=0)
+    active_bonds = models.IntegerField(default=0)
+    issuers = models.IntegerField(default=0, help_text="Distinct issuers with an active bond")
+    total_customers = models.IntegerField(default=0)
+    avg_ytm_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    issue_size_lakhs = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    # {bucket: {"bonds", "issuers", "avg_ytm_percent", "issue_size_lakhs"}}
+    by_rating = models.JSONField(default=dict)
+    by_maturity = models.JSONField(default=dict)
+    by_issuer_type = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    computation_seconds = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
+
+    class Meta:
+        db_table = 'catalogue_stats'
+
+
+class CurveType(models.TextChoices):
+    RATING = "RATING", "Rating bucket"
+    ISSUER_TYPE = "ISSUER_TYPE", "Issuer type"
+
+
+class YieldCurve(models.Model):
+    """
+    Nelson-Siegel yield curve fitted over the live universe, one row per
+    rating bucket (utils.RATING_BUCKETS) and per issuer type; the
+    CENTRAL_GOV issuer-type curve is the sovereign curve.
+
+    y(t) = beta0 + beta1 * (1 - e^-x) / x + beta2 * ((1 - e^-x) / x - e^-x),
+    x = t / tau, t in years from as_of, y in percent like ytm_percent.
+    Rewritten as a set by YieldCurveService.fit().
+    """
+
+    curve_type = models.CharField(max_length=20, choices=CurveType.choices)
+    bucket = models.CharField(max_length=20)
+    beta0 = models.FloatField()
+    beta1 = models.FloatField()
+    beta2 = models.FloatField()
+    tau = models.FloatField()
+    bond_count = models.IntegerField()
+    rmse_percent = models.FloatField(help_text="RMS distance of the bucket's YTMs from the curve")
+    min_tenure_years = models.FloatField()
+    max_tenure_years = models.FloatField()
+    as_of = models.DateField()
+    fitted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'yield_curve'
+        unique_together = ("curve_type", "bucket")
+
+
+class PostTaxYield(models.Model):
+    """
+    Post-tax yield to maturity of a bond for one investor tax slab
+    (settings.BOND_TAX_SLABS), for the same trade as ISINBasicInfo's
+    pricing fields. Maintained by PostTaxYieldService; bonds without a
+    yield have no row. (slab, post_tax_ytm_percent) serves BondFilter's
+    post-tax filters and ordering.
+    """
+
+    isin = models.ForeignKey(ISINBasicInfo, on_delete=models.CASCADE, related_name="post_tax_yields")
+    slab = models.CharField(max_length=20)
+    post_tax_ytm_percent = models.DecimalField(max_digits=6, decimal_places=3)
+
+    class Meta:
+        db_table = 'bond_post_tax_yield'
+        unique_together = ("isin", "slab")
+        indexes = [
+            models.Index(fields=["slab", "post_tax_ytm_percent"]),
+        ]
+
+
 
 
 
@@ -532,4 +657,45 @@ class SnapshotDefinition(models.Model):
         ordering = ['order']
 
     def __str__(self):
-        return f"{self.display_name} ({self.metric_name})"
\ No newline at end of file
+        return f"{self.display_name} ({self.metric_name})"
+
+class BondSnapshotDocument(models.Model):
+    """
+    Materialized BondSnapshotView payload, one row per ISIN with a primary company.
+    Built by BondSnapshotService; rows are flagged stale when their inputs
+    change and rebuilt incrementally.
+    """
+
+    isin = models.OneToOneField(ISINBasicInfo, on_delete=models.CASCADE, primary_key=True, related_name="snapshot_document")
+    company = models.ForeignKey(CompanyInfo, on_delete=models.CASCADE, related_name="snapshot_documents")
+    document = models.JSONField(default=dict)
+    stale = models.BooleanField(default=False)
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'bond_snapshot_document'
+        indexes = [
+            models.Index(fields=["stale"], condition=models.Q(stale=True), name="bond_snapshot_stale_idx"),
+        ]
+
+
+class CompanyFinancialProfile(models.Model):
+    """
+    Pivoted copy of a company's FinancialMetricValue / RatioValue rows:
+    every metric and ratio with its year -> value map in one row.
+    Maintained by FinancialProfileService; the EAV tables stay the source of truth.
+    """
+
+    company = models.OneToOneField(CompanyInfo, on_delete=models.CASCADE, primary_key=True, related_name="financial_profile")
+    # [{"id", "name", "values": {"2024": "918.70", ...}}], ordered by metric id
+    metrics = models.JSONField(default=list)
+    # [{"id", "title", "benchmark", "assessment", "description", "values": {...}}], ordered by ratio id
+    ratios = models.JSONField(default=list)
+    stale = models.BooleanField(default=False)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'company_financial_profile'
+        indexes = [
+            models.Index(fields=["stale"], condition=models.Q(stale=True), name="company_profile_stale_idx"),
+        ]
@@ -1,4 +1,13 @@
 from rest_framework.pagination import CursorPagination,PageNumberPagination,LimitOffsetPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import F, Q, Value
+from django.db.models.expressions import OrderBy
+from datetime import date, datetime
+from decimal import Decimal
+import base64
+import json
 
 
 class BondCursorPagination(CursorPagination):
@@ -19,4 +28,203 @@ class BondSkipTakePagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 100
     limit_query_param = "take"
-    offset_query_param = "skip"
\ No newline at end of file
+    offset_query_param = "skip"
+
+
+class BondKeysetPagination(BondSkipTakePagination):
+    """
+    skip/take pagination with an opaque keyset (seek) cursor mode.
+
+    Offset mode stays the default for backward compatibility. Sending a
+    `cursor` param switches to keyset mode (`?cursor=&take=20` for the first
+    page, then follow `next` / `previous`). Instead of OFFSET, each page is
+    fetched with a WHERE on the last row's sort key, so page 5,000 costs the
+    same as page 1.
+
+    Works with whatever ordering the view / OrderingFilter applied:
+    - tenure_days / tenure_years sort like maturity_date, so they seek on it
+    - constant annotations (default priority=Value(1)) are dropped
+    - isin_code is appended as the unique tie-breaker
+    """
+    cursor_query_param = "cursor"
+
+    # Sort keys that are derived from a stored column
+    field_aliases = {
+        "tenure_days": "maturity_date",
+        "tenure_years": "maturity_date",
+    }
+    # Catalogue views exclude NULL maturities (maturity_date >= now), which
+    # lets the first seek key be a plain index range condition.
+    not_null_fields = ("maturity_date",)
+    unique_field = "isin_code"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.keys = self.get_keys(queryset)
+
+        values, reverse = self.decode_cursor(request)
+        keys = [self.flip(k) for k in self.keys] if reverse else self.keys
+
+        queryset = queryset.order_by(*[self.order_expression(k) for k in keys])
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(keys, values))
+
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        self.next_values = self.key_values(rows[-1]) if rows and (has_more or reverse) else None
+        self.previous_values = self.key_values(rows[0]) if rows and values is not None and (has_more or not reverse) else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "next": self.get_cursor_link(self.next_values, reverse=False),
+            "previous": self.get_cursor_link(self.previous_values, reverse=True),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"]["description"] = "Omitted in cursor mode"
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            "name": self.cursor_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Keyset cursor. Pass an empty value to start cursor paging, then follow next/previous.",
+            "schema": {"type": "string"},
+        })
+        return parameters
+
+    # ---- Sort keys ----
+
+    def get_keys(self, queryset):
+        """
+        Turn the queryset ordering into (field, descending, nulls_last) keys
+        truncated at the unique tie-breaker.
+        """
+        keys = []
+        for item in queryset.query.order_by:
+            if isinstance(item, str):
+                name, descending, nulls_last = item.lstrip("-"), item.startswith("-"), None
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                name, descending = item.expression.name, item.descending
+                nulls_last = True if item.nulls_last else False if item.nulls_first else None
+            else:
+                raise NotFound("Ordering is not supported in cursor mode.")
+
+            name = self.field_aliases.get(name, name)
+            if isinstance(queryset.query.annotations.get(name), Value):
+                continue
+            if any(k[0] == name for k in keys):
+                continue
+            if nulls_last is None:
+                nulls_last = not descending  # Postgres default
+            keys.append((name, descending, nulls_last))
+            if name in (self.unique_field, "pk"):
+                break
+        else:
+            keys.append((self.unique_field, False, True))
+        return keys
+
+    @staticmethod
+    def flip(key):
+        name, descending, nulls_last = key
+        return name, not descending, not nulls_last
+
+    @staticmethod
+    def order_expression(key):
+        name, descending, nulls_last = key
+        nulls = {"nulls_last": True} if nulls_last else {"nulls_first": True}
+        return F(name).desc(**nulls) if descending else F(name).asc(**nulls)
+
+    def nullable(self, name):
+        return name not in self.not_null_fields and name != self.unique_field
+
+    def after(self, key, value):
+        """Rows that sort strictly after `value` on a single key."""
+        name, descending, nulls_last = key
+        if value is None:
+            return Q(**{f"{name}__isnull": False}) if not nulls_last else Q(pk__in=[])
+        q = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        if nulls_last and self.nullable(name):
+            q |= Q(**{f"{name}__isnull": True})
+        return q
+
+    @staticmethod
+    def equal(key, value):
+        name = key[0]
+        return Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+    def seek_filter(self, keys, values):
+        """
+        Lexicographic "row after cursor" predicate, plus an inclusive bound on
+        the leading key so Postgres can start an index range scan there.
+        """
+        q = Q(pk__in=[])
+        prefix = Q()
+        for key, value in zip(keys, values):
+            q |= prefix & self.after(key, value)
+            prefix &= self.equal(key, value)
+
+        name, descending, _ = keys[0]
+        if values[0] is not None and not self.nullable(name):
+            q &= Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]})
+        return q
+
+    # ---- Cursor encoding ----
+
+    def key_values(self, row):
+        return [getattr(row, name) for name, _, _ in self.keys]
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def signature(self):
+        return [("-" if descending else "") + name for name, descending, _ in self.keys]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values, reverse, signature = payload["v"], bool(payload.get("r")), payload["o"]
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound("Invalid cursor")
+        if signature != self.signature() or len(values) != len(self.keys):
+            raise NotFound("Cursor does not match the requested ordering")
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        payload = {"v": [self.encode_value(v) for v in values], "o": self.signature()}
+        if reverse:
+            payload["r"] = 1
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+    def get_cursor_link(self, values, reverse):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
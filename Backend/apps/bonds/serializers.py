@@ -4,6 +4,7 @@ from dateutil.relativedelta import relativedelta
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from django.db import models
+from django.utils.functional import cached_property
 
 # class SafeDecimalField(serializers.DecimalField):
 #     def to_representation(self, value):
@@ -134,6 +135,8 @@ class ISINBasicInfoSerializer(serializers.ModelSerializer):
     tenure = serializers.SerializerMethodField()
     ratings = serializers.SerializerMethodField()
     coupon_type = serializers.SerializerMethodField()
+    # Only present when the list was filtered / ordered by post-tax YTM (BondFilter.tax_slab)
+    post_tax_ytm_percent = SafeDecimalField(max_digits=6, decimal_places=3, read_only=True)
 
     class Meta:
         model = ISINBasicInfo
@@ -144,19 +147,37 @@ class ISINBasicInfoSerializer(serializers.ModelSerializer):
             "data_hash",
             "record_created_date",
             "last_updated",
+            "current_rating",
+            "current_rating_agency",
+            "current_rating_date",
+            "current_rating_rank",
+            "search_vector",
         ]
 
+    @cached_property
+    def _tenure_by_maturity(self):
+        # With many=True one child serializer handles every row, so "today" and
+        # the relativedelta per distinct maturity date are computed once per response.
+        return {}
+
+    @cached_property
+    def _today(self):
+        return date.today()
+
     def get_tenure(self, obj):
         """Calculate tenure with proper error handling"""
         if obj.maturity_date is None:
             return {"years": 0, "months": 0, "days": 0}
-        
-        try:
-            today = date.today()
-            rd = relativedelta(obj.maturity_date, today)
-            return {"years": rd.years, "months": rd.months, "days": rd.days}
-        except (ValueError, OverflowError):
-            return {"years": 0, "months": 0, "days": 0}
+
+        tenure = self._tenure_by_maturity.get(obj.maturity_date)
+        if tenure is None:
+            try:
+                rd = relativedelta(obj.maturity_date, self._today)
+                tenure = {"years": rd.years, "months": rd.months, "days": rd.days}
+            except (ValueError, OverflowError):
+                tenure = {"years": 0, "months": 0, "days": 0}
+            self._tenure_by_maturity[obj.maturity_date] = tenure
+        return dict(tenure)
 
     def get_ratings(self, obj):
         """Returns ratings with proper fallback"""
@@ -227,7 +248,8 @@ class FinancialMetricSerializer(serializers.ModelSerializer):
 
     def get_charts(self, obj):
         limit = 3
-        data_qs = obj.values.order_by("-year")[:limit] 
+        # Sort in Python so a prefetched `values` is reused instead of re-queried
+        data_qs = sorted(obj.values.all(), key=lambda d: d.year, reverse=True)[:limit]
         return {str(d.year): d.value if d.value is not None else "" for d in data_qs}
 
 
@@ -242,7 +264,8 @@ class RatioAnalysisSerializer(serializers.ModelSerializer):
 
     def get_charts(self, obj):
         limit = 3
-        data_qs = obj.values.order_by("-year")[:limit]  
+        # Sort in Python so a prefetched `values` is reused instead of re-queried
+        data_qs = sorted(obj.values.all(), key=lambda d: d.year, reverse=True)[:limit]
         return {str(d.year): d.value if d.value is not None else "" for d in data_qs}
 
 
@@ -277,4 +300,42 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         if value and len(value) > 20:
             raise serializers.ValidationError("Phone number too long")
         return value   
-        
\ No newline at end of file
+        
+
+class CalculatorTermsSerializer(serializers.Serializer):
+    coupon_rate_percent = serializers.DecimalField(max_digits=7, decimal_places=4, min_value=Decimal("0"))
+    maturity_date = serializers.DateField()
+    interest_payment_frequency = serializers.CharField(default="Annual")
+    face_value = serializers.DecimalField(max_digits=18, decimal_places=2, min_value=Decimal("0.01"), default=Decimal("100"))
+    day_count_convention = serializers.CharField(required=False, allow_blank=True)
+    issue_date = serializers.DateField(required=False, allow_null=True)
+    settlement_cycle = serializers.CharField(required=False, allow_blank=True)
+    call_date = serializers.DateField(required=False, allow_null=True)
+    put_date = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, data):
+        for field in ("call_date", "put_date"):
+            if data.get(field) and data[field] >= data["maturity_date"]:
+                raise serializers.ValidationError({field: "Must be before maturity_date"})
+        return data
+
+
+class CalculatorScenarioSerializer(serializers.Serializer):
+    isin = serializers.CharField(required=False, max_length=12)
+    terms = CalculatorTermsSerializer(required=False)
+    price = serializers.DecimalField(max_digits=18, decimal_places=4, min_value=Decimal("0.0001"), required=False, help_text="Clean price per bond (Rs)")
+    yield_percent = serializers.DecimalField(max_digits=8, decimal_places=4, min_value=Decimal("-99"), max_value=Decimal("1000"), required=False)
+    settlement_date = serializers.DateField(required=False, help_text="Defaults to today plus the bond's settlement cycle")
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    redemption = serializers.ChoiceField(choices=["maturity", "call", "put"], default="maturity")
+
+    def validate(self, data):
+        if bool(data.get("isin")) == bool(data.get("terms")):
+            raise serializers.ValidationError("Give exactly one of isin or terms")
+        if (data.get("price") is None) == (data.get("yield_percent") is None):
+            raise serializers.ValidationError("Give exactly one of price or yield_percent")
+        return data
+
+
+class CalculatorRequestSerializer(serializers.Serializer):
+    scenarios = CalculatorScenarioSerializer(many=True, allow_empty=False, max_length=500)  # BondCalculatorService.MAX_SCENARIOS
@@ -0,0 +1,319 @@
+from django.db import connections, router, transaction
+from django.utils import timezone
+from apps.bonds.models import DataTransformationLog, ISINDetailedInfo
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from pathlib import Path
+import csv
+import datetime
+import io
+import time
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BhavcopyImporter:
+    """
+    Applies an exchange end-of-day trade file (bhavcopy: one row per traded
+    instrument with close / last price, yield, volume, value, trades and
+    weighted averages) to the market-data columns of ISINDetailedInfo.
+
+    The file (.csv, or a .zip of them) is streamed row by row: every
+    CHUNK_SIZE rows are COPYed into a temp table and applied with one
+    UPDATE ... FROM, so memory stays bounded by the chunk whatever the file
+    size. The file's values replace the day's totals; rows dated before the
+    stored last_traded_date are skipped, rows without trades are skipped.
+
+    Columns are matched by name (COLUMNS lists the NSE / BSE spellings;
+    `mapping` overrides them); fields the file does not carry are left
+    alone. Rows with an ISIN we do not have, or values that do not parse,
+    are written to a reject report (CSV: line, isin, reason) and counted as
+    failed in the run's DataTransformationLog row.
+    """
+
+    CHUNK_SIZE = 50000
+    # field -> header spellings, compared upper-case with spaces as underscores
+    COLUMNS = {
+        "isin": ("ISIN", "ISIN_CODE", "ISIN_NO"),
+        "trade_date": ("TIMESTAMP", "TRADE_DATE", "TRADING_DATE", "DATE", "BUSINESS_DATE"),
+        "last_traded_price_rs": ("LAST_PRICE", "LAST", "LTP", "CLOSE_PRICE", "CLOSE"),
+        "last_traded_yield_percent": ("LAST_YIELD", "CLOSE_YIELD", "YIELD", "LAST_TRADED_YIELD"),
+        "volume_traded": ("TOTTRDQTY", "TOTAL_TRADED_QUANTITY", "TRADED_QUANTITY", "NO_OF_SHRS", "VOLUME"),
+        "value_traded_lakhs": ("TOTTRDVAL", "TOTAL_TRADED_VALUE", "TRADED_VALUE", "NET_TURNOV", "TURNOVER"),
+        "number_of_trades": ("TOTALTRADES", "TOTAL_TRADES", "NO_OF_TRADES", "NO_TRADES", "TRADES"),
+        "weighted_avg_price_rs": ("WAP", "WEIGHTED_AVG_PRICE", "WEIGHTED_AVERAGE_PRICE", "WTD_AVG_PRICE"),
+        "weighted_avg_yield_percent": ("WAY", "WEIGHTED_AVG_YIELD", "WEIGHTED_AVERAGE_YIELD", "WTD_AVG_YIELD"),
+    }
+    # Traded value arrives in rupees; the column holds lakhs
+    SCALE = {"value_traded_lakhs": 1e-5}
+    COUNTS = ("volume_traded", "number_of_trades")
+    DATE_FORMATS = ("%Y-%m-%d", "%d-%b-%Y", "%d-%b-%y", "%d-%m-%Y", "%d/%m/%Y", "%d%m%Y", "%Y%m%d")
+    NULLS = {"", "-", "NA", "N/A", "NIL"}
+
+    def __init__(self, mapping=None, trade_date=None, chunk_size=None):
+        self.mapping = {field: column.upper() for field, column in (mapping or {}).items()}
+        unknown = set(self.mapping) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown bhavcopy fields {sorted(unknown)}; expected some of {sorted(self.COLUMNS)}")
+        self.trade_date = trade_date.isoformat() if trade_date else None
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.using = router.db_for_write(ISINDetailedInfo)
+        self.connection = connections[self.using]
+        self.limits = {}
+        for field in self.COLUMNS:
+            if field in ("isin", "trade_date"):
+                continue
+            model_field = ISINDetailedInfo._meta.get_field(field)
+            digits = 18 if field in self.COUNTS else model_field.max_digits - model_field.decimal_places
+            self.limits[field] = 10.0 ** digits
+        self.dates = {}
+
+    # ---- Source ----
+
+    @staticmethod
+    def open_sources(path):
+        """Yield (name, text stream) for the file, or for every CSV member of a zip."""
+        path = Path(path)
+        if path.suffix.lower() == ".zip":
+            with zipfile.ZipFile(path) as archive:
+                members = [name for name in archive.namelist() if name.lower().endswith(".csv")]
+                if not members:
+                    raise ValueError(f"{path.name} has no .csv member")
+                for name in members:
+                    with archive.open(name) as raw, io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as text:
+                        yield name, text
+        elif path.suffix.lower() == ".csv":
+            with open(path, encoding="utf-8-sig", newline="") as text:
+                yield path.name, text
+        else:
+            raise ValueError(f"Unsupported bhavcopy format: {path.name} (expected .csv or .zip)")
+
+    def resolve_columns(self, header):
+        """{field: column index} for the fields this file carries."""
+        positions = {name.strip().upper().replace(" ", "_"): index for index, name in enumerate(header)}
+        columns = {}
+        for field, spellings in self.COLUMNS.items():
+            for spelling in ((self.mapping[field],) if field in self.mapping else spellings):
+                if spelling in positions:
+                    columns[field] = positions[spelling]
+                    break
+        if "isin" not in columns:
+            raise ValueError(f"No ISIN column in header {header}")
+        if "trade_date" not in columns and self.trade_date is None:
+            raise ValueError("No trade date column; pass the file's trade date")
+        if len(columns) == 1 + ("trade_date" in columns):
+            raise ValueError(f"No market-data columns in header {header}")
+        return columns
+
+    # ---- Parsing ----
+
+    def parse_date(self, value):
+        """ISO date string for a file date, parsed once per distinct value."""
+        parsed = self.dates.get(value)
+        if parsed is None:
+            for fmt in self.DATE_FORMATS:
+                try:
+                    parsed = datetime.datetime.strptime(value.strip(), fmt).date().isoformat()
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"bad date {value!r}")
+            self.dates[value] = parsed
+        return parsed
+
+    def plan(self, columns, fields):
+        """(position, field, integer?, bound) per market-data column, in `fields` order."""
+        return [
+            (columns[field], field, field in self.COUNTS, self.limits[field] / self.SCALE.get(field, 1))
+            for field in fields
+        ]
+
+    def parse(self, row, columns, plan):
+        """
+        (isin, ISO trade date, [values in plan order]); raises ValueError
+        with the reject reason. Values stay strings for COPY, Postgres parses
+        them; float() only validates, so there is no per-cell Decimal.
+        """
+        isin_code = row[columns["isin"]].strip().upper()
+        if len(isin_code) != 12:
+            raise ValueError("bad ISIN")
+        trade_date = self.parse_date(row[columns["trade_date"]]) if "trade_date" in columns else self.trade_date
+        values = []
+        for position, field, integer, bound in plan:
+            raw = row[position].strip()
+            if "," in raw:
+                raw = raw.replace(",", "")
+            try:
+                number = float(raw)
+            except ValueError:
+                if raw.upper() in self.NULLS:
+                    values.append(None)
+                    continue
+                raise ValueError(f"bad {field} {raw!r}")
+            # Also false for nan / inf
+            if not -bound < number < bound or "_" in raw:
+                raise ValueError(f"bad or out of range {field} {raw!r}")
+            if integer:
+                if not number.is_integer():
+                    raise ValueError(f"bad {field} {raw!r}")
+                raw = str(int(number))
+            values.append(raw)
+        return isin_code, trade_date, values
+
+    # ---- Run ----
+
+    def run(self, path, report_path=None):
+        """Import `path`. Returns the run counters and the reject report path (None when nothing was rejected)."""
+        report_path = Path(report_path or f"{path}.rejects.csv")
+        started = time.perf_counter()
+        log = DataTransformationLog.objects.create(
+            operation_type="BHAVCOPY",
+            source_table=Path(path).name,
+            target_table=ISINDetailedInfo._meta.db_table,
+            started_at=timezone.now(),
+        )
+        counts = {"processed": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        report = Rejects(report_path)
+        updated = []
+        try:
+            with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+                for name, stream in self.open_sources(path):
+                    reader = csv.reader(stream)
+                    header = next(reader, None)
+                    if header is None:
+                        continue
+                    columns = self.resolve_columns(header)
+                    fields = [field for field in self.COLUMNS if field in columns and field not in ("isin", "trade_date")]
+                    plan = self.plan(columns, fields)
+                    volume = fields.index("volume_traded") if "volume_traded" in fields else None
+                    stage = self.create_stage(cursor, fields)
+                    chunk = {}
+                    for row in reader:
+                        if not row or not any(row):
+                            continue
+                        counts["processed"] += 1
+                        line = reader.line_num
+                        try:
+                            isin_code, trade_date, values = self.parse(row, columns, plan)
+                        except (ValueError, IndexError) as e:
+                            counts["failed"] += 1
+                            report.add(name, line, row[columns["isin"]] if len(row) > columns["isin"] else "", str(e))
+                            continue
+                        if volume is not None and values[volume] in (None, "0"):
+                            counts["skipped"] += 1
+                            continue
+                        if isin_code in chunk:
+                            # Same ISIN twice (e.g. two series rows): the later row wins
+                            counts["skipped"] += 1
+                        chunk[isin_code] = (line, trade_date, values)
+                        if len(chunk) >= self.chunk_size:
+                            updated += self.apply(cursor, stage, fields, chunk, counts, report, name)
+                            chunk = {}
+                    if chunk:
+                        updated += self.apply(cursor, stage, fields, chunk, counts, report, name)
+                    cursor.execute(f"DROP TABLE {stage}")
+        except Exception as e:
+            report.close()
+            log.status = "FAILED"
+            log.error_details = str(e)
+            BondETLLoader.finish(log, counts, started)
+            raise
+        report.close()
+
+        if updated:
+            BondDataVersion.bump(updated if len(updated) <= BondETLLoader.MAX_JOURNALLED_CHANGES else None)
+        log.status = "SUCCESS"
+        if report.count:
+            log.error_details = f"{report.count} rows rejected, see {report_path}\n" + "\n".join(report.sample)
+        BondETLLoader.finish(log, counts, started)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        counts["report"] = str(report_path) if report.count else None
+        logger.info(f"Bhavcopy {Path(path).name}: {counts}")
+        return counts
+
+    def create_stage(self, cursor, fields):
+        qn = self.connection.ops.quote_name
+        stage = qn("bhavcopy_stage")
+        # Untyped numeric: traded value is staged in rupees, before scaling to lakhs
+        columns = ", ".join(f"{qn(field)} {'bigint' if field in self.COUNTS else 'numeric'}" for field in fields)
+        cursor.execute(
+            f"CREATE TEMP TABLE {stage} (isin_id varchar(12), last_traded_date date, {columns}, line integer) "
+            f"ON COMMIT DROP"
+        )
+        return stage
+
+    def apply(self, cursor, stage, fields, chunk, counts, report, name):
+        """COPY one chunk into the stage and update from it. Returns the ISINs updated."""
+        qn = self.connection.ops.quote_name
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        null = BondETLLoader.NULL
+        for isin_code, (line, trade_date, values) in chunk.items():
+            writer.writerow([isin_code, trade_date, *(null if value is None else value for value in values), line])
+        buffer.seek(0)
+        columns = ["isin_id", "last_traded_date"] + [qn(field) for field in fields] + ["line"]
+        cursor.execute(f"TRUNCATE {stage}")
+        cursor.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{null}')", buffer)
+
+        table = qn(ISINDetailedInfo._meta.db_table)
+        targets = [qn(field) for field in fields] + ["last_traded_date"]
+        # Cast to the column types, so a value equal to the stored one (after rounding) compares equal
+        sources = [
+            f"(s.{qn(field)}{f' * {self.SCALE[field]:f}' if field in self.SCALE else ''})"
+            f"::{ISINDetailedInfo._meta.get_field(field).db_type(self.connection)}"
+            for field in fields
+        ] + ["s.last_traded_date"]
+        cursor.execute(
+            f"UPDATE {table} AS d SET "
+            + ", ".join(f"{target} = {source}" for target, source in zip(targets, sources))
+            + f", {qn('last_updated')} = %s FROM {stage} AS s "
+            f"WHERE d.isin_id = s.isin_id AND (d.last_traded_date IS NULL OR d.last_traded_date <= s.last_traded_date) "
+            # A rerun of the same file rewrites nothing
+            f"AND ({', '.join(f'd.{target}' for target in targets)}) IS DISTINCT FROM ({', '.join(sources)}) "
+            f"RETURNING d.isin_id",
+            [timezone.now()],
+        )
+        updated = [isin_code for isin_code, in cursor.fetchall()]
+        counts["updated"] += len(updated)
+
+        if len(updated) < len(chunk):
+            # The rest is unchanged, older than the stored trade date, or unknown
+            cursor.execute(
+                f"SELECT s.isin_id, s.line FROM {stage} AS s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table} AS d WHERE d.isin_id = s.isin_id)"
+            )
+            unknown = cursor.fetchall()
+            for isin_code, line in unknown:
+                report.add(name, line, isin_code, "unknown ISIN")
+            counts["failed"] += len(unknown)
+            counts["skipped"] += len(chunk) - len(updated) - len(unknown)
+        return updated
+
+
+class Rejects:
+    """Reject report, opened on the first rejected row so clean runs leave no file."""
+
+    SAMPLE = 20
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = self.writer = None
+        self.count = 0
+        self.sample = []
+
+    def add(self, source, line, isin_code, reason):
+        if self.writer is None:
+            self.handle = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.handle)
+            self.writer.writerow(["file", "line", "isin", "reason"])
+        self.writer.writerow([source, line, isin_code, reason])
+        self.count += 1
+        if len(self.sample) < self.SAMPLE:
+            self.sample.append(f"{source}:{line} {isin_code}: {reason}")
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
@@ -0,0 +1,315 @@
+from django.db import router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINDetailedInfo
+from apps.bonds.utils import get_payments_per_year
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bulk_sql_service import BulkSQLService
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Yield search interval (decimal, nominal at coupon frequency)
+YIELD_LOWER = -0.5
+YIELD_UPPER = 2.0
+PRICE_TOLERANCE = 1e-10   # relative to price
+MAX_ITERATIONS = 60
+DAYS_PER_YEAR = 365.0
+
+# Upper bound on (bonds x cash-flow periods) evaluated at once; keeps a
+# chunk of 30y monthly bonds to a few tens of MB.
+CHUNK_CELLS = 2_000_000
+
+
+# ---- Vectorized pricing (pure NumPy, no per-bond loop) ----
+
+def cash_flow_grid(coupon_rate, frequency, face_value, redemption, years):
+    """
+    Remaining cash flows for a batch of bonds as a (bonds x periods) grid.
+
+    Column 0 is the maturity payment, column k the coupon k periods before
+    it. `tau` is the time to each flow in coupon periods (0 on padding),
+    so the first coupon is at a fractional period for bonds between dates.
+    Returns (tau, flows, accrued).
+    """
+    periods = frequency * years
+    count = np.maximum(np.ceil(periods - 1e-9), 1).astype(np.int64)
+    k = np.arange(count.max())
+    valid = k[None, :] < count[:, None]
+
+    coupon = face_value * coupon_rate / frequency
+    tau = np.where(valid, periods[:, None] - k[None, :], 0.0)
+    flows = np.where(valid, coupon[:, None], 0.0)
+    flows[:, 0] += redemption
+    accrued = coupon * (count - periods)
+    return tau, flows, accrued
+
+
+def present_value(y, tau, flows, frequency):
+    """Dirty price and dPrice/dYield at yield `y` for every bond."""
+    base = 1.0 + y / frequency
+    discounted = flows * base[:, None] ** -tau
+    pv = discounted.sum(axis=1)
+    dpv = -(discounted * tau).sum(axis=1) / (frequency * base)
+    return pv, dpv
+
+
+def solve_yield(dirty_price, tau, flows, frequency, guess):
+    """
+    Yield that reprices every bond to `dirty_price`.
+
+    Newton steps, falling back to bisection whenever a step leaves the
+    bracket (kept from the sign of each residual) or is not finite, so
+    every bond converges even from a poor guess. Bonds whose price is
+    outside the [YIELD_LOWER, YIELD_UPPER] range come back as NaN.
+    """
+    size = len(dirty_price)
+    lower = np.full(size, YIELD_LOWER)
+    upper = np.full(size, YIELD_UPPER)
+    y = np.clip(np.where(np.isfinite(guess), guess, 0.08), YIELD_LOWER + 1e-6, YIELD_UPPER - 1e-6)
+    converged = np.zeros(size, dtype=bool)
+
+    active = np.flatnonzero(np.isfinite(dirty_price) & (dirty_price > 0))
+    for _ in range(MAX_ITERATIONS):
+        if not active.size:
+            break
+        ya = y[active]
+        pv, dpv = present_value(ya, tau[active], flows[active], frequency[active])
+        residual = pv - dirty_price[active]
+        done = np.abs(residual) <= PRICE_TOLERANCE * dirty_price[active]
+        converged[active[done]] = True
+
+        # Price falls as yield rises: a positive residual means y is too low
+        too_low = residual > 0
+        lo = np.where(too_low, ya, lower[active])
+        hi = np.where(too_low, upper[active], ya)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = ya - residual / dpv
+        bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        step = np.where(bisect, (lo + hi) / 2, step)
+
+        lower[active], upper[active] = lo, hi
+        y[active] = np.where(done, ya, step)
+        active = active[~done & (hi - lo > 1e-14)]
+
+    return np.where(converged, y, np.nan)
+
+
+def risk_measures(y, tau, flows, frequency):
+    """Macaulay duration (years), modified duration and convexity at yield `y`."""
+    base = 1.0 + y / frequency
+    discounted = flows * base[:, None] ** -tau
+    pv = discounted.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        macaulay = (discounted * tau).sum(axis=1) / (frequency * pv)
+        modified = macaulay / base
+        convexity = (discounted * tau * (tau + 1)).sum(axis=1) / (frequency ** 2 * base ** 2 * pv)
+    return macaulay, modified, convexity
+
+
+def compute_analytics(batch):
+    """
+    Analytics for one batch of bonds (dict of equal-length arrays).
+
+    Inputs: coupon_rate_percent, frequency (payments/year, 0 = cumulative),
+    face_value, years (to maturity), accrual_years (issue -> maturity, for
+    cumulative bonds), clean_price, avg_price, ytm_percent (stored, NaN if
+    unknown). Prices are clean, in rupees per bond like face_value_rs.
+
+    Module level so ProcessPoolExecutor can pickle it.
+    """
+    coupon_rate = batch["coupon_rate_percent"] / 100.0
+    frequency = batch["frequency"].astype(np.float64)
+    face_value = batch["face_value"]
+
+    # Cumulative bonds: one compounded payment at maturity, annual compounding
+    cumulative = frequency == 0
+    redemption = np.where(cumulative, face_value * (1.0 + coupon_rate) ** batch["accrual_years"], face_value)
+    coupon_rate = np.where(cumulative, 0.0, coupon_rate)
+    frequency = np.where(cumulative, 1.0, frequency)
+
+    tau, flows, accrued = cash_flow_grid(coupon_rate, frequency, face_value, redemption, batch["years"])
+    stored_ytm = batch["ytm_percent"] / 100.0
+    guess = np.where(np.isfinite(stored_ytm), stored_ytm, coupon_rate)
+
+    ytm = solve_yield(batch["clean_price"] + accrued, tau, flows, frequency, guess)
+    avg_yield = solve_yield(batch["avg_price"] + accrued, tau, flows, frequency, guess)
+
+    # Risk at the solved YTM rounded to 3 dp, so reruns are stable. The YTM
+    # itself is stored by BondPricingService from the exact schedule.
+    risk_yield = np.where(np.isfinite(ytm), np.round(ytm * 100.0, 3) / 100.0, stored_ytm)
+    macaulay, modified, convexity = risk_measures(np.nan_to_num(risk_yield), tau, flows, frequency)
+    missing = ~np.isfinite(risk_yield)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_yield = np.where(cumulative, np.nan, face_value * coupon_rate / batch["clean_price"] * 100.0)
+
+    return {
+        "weighted_avg_yield_percent": avg_yield * 100.0,
+        "current_yield_percent": current_yield,
+        "duration_years": np.where(missing, np.nan, macaulay),
+        "modified_duration": np.where(missing, np.nan, modified),
+        "convexity": np.where(missing, np.nan, convexity),
+    }
+
+
+class BondAnalyticsService:
+    """
+    Batch refresh of current / weighted-average yield, duration and
+    convexity for the whole live universe. YTM is only solved here as the
+    risk yield; BondPricingService stores it.
+
+    Loads the inputs once, prices every bond with the vectorized functions
+    above (in chunks grouped by cash-flow count, optionally across a process
+    pool) and bulk-writes back only the values that changed.
+    """
+
+    INPUT_FIELDS = (
+        "isin_id",
+        "isin__coupon_rate_percent",
+        "isin__interest_payment_frequency",
+        "isin__face_value_rs",
+        "isin__maturity_date",
+        "isin__issue_date",
+        "isin__ytm_percent",
+        "last_traded_price_rs",
+        "weighted_avg_price_rs",
+    )
+    # result key -> (model, field, decimal places, max abs value)
+    OUTPUTS = {
+        "weighted_avg_yield_percent": (ISINDetailedInfo, "weighted_avg_yield_percent", 3, 999),
+        "current_yield_percent": (ISINDetailedInfo, "current_yield_percent", 3, 999),
+        "duration_years": (ISINDetailedInfo, "duration_years", 4, 9999),
+        "modified_duration": (ISINDetailedInfo, "modified_duration", 4, 9999),
+        "convexity": (ISINDetailedInfo, "convexity", 8, 999999999999),
+    }
+
+    @classmethod
+    def load_universe(cls, today=None):
+        """Input arrays for every bond with a detailed row that has not matured."""
+        today = today or timezone.now().date()
+        rows = [
+            row for row in ISINDetailedInfo.objects.filter(isin__maturity_date__gt=today)
+            .values_list(*cls.INPUT_FIELDS)
+            .iterator(chunk_size=5000)
+            if row[1] is not None and row[3] and get_payments_per_year(row[2]) is not None
+        ]
+
+        def floats(position):
+            return np.array([np.nan if r[position] is None else float(r[position]) for r in rows], dtype=np.float64)
+
+        maturity = np.array([r[4].toordinal() for r in rows], dtype=np.float64)
+        issue = np.array([np.nan if r[5] is None else r[5].toordinal() for r in rows], dtype=np.float64)
+        batch = {
+            "coupon_rate_percent": floats(1),
+            "frequency": np.array([get_payments_per_year(r[2]) for r in rows], dtype=np.int64),
+            "face_value": floats(3),
+            "years": (maturity - today.toordinal()) / DAYS_PER_YEAR,
+            "accrual_years": (maturity - issue) / DAYS_PER_YEAR,
+            "ytm_percent": floats(6),
+            "clean_price": floats(7),
+            "avg_price": floats(8),
+        }
+        # Cumulative bonds without an issue date cannot be valued
+        keep = ~((batch["frequency"] == 0) & np.isnan(batch["accrual_years"]))
+        isin_codes = np.array([r[0] for r in rows], dtype=object)[keep]
+        return isin_codes, {k: v[keep] for k, v in batch.items()}
+
+    @classmethod
+    def chunks(cls, batch):
+        """Index chunks sorted by cash-flow count, each within CHUNK_CELLS."""
+        periods = np.ceil(np.where(batch["frequency"] == 0, 1, batch["frequency"]) * batch["years"])
+        order = np.argsort(periods, kind="stable")
+        start = 0
+        while start < len(order):
+            end = start + 1
+            # periods are ascending, so the last row in a chunk sets its width
+            while end < len(order) and (end - start + 1) * periods[order[end]] <= CHUNK_CELLS:
+                end += 1
+            yield order[start:end]
+            start = end
+
+    @classmethod
+    def compute(cls, batch, workers=1):
+        size = len(batch["years"])
+        results = {key: np.full(size, np.nan) for key in cls.OUTPUTS}
+        chunks = list(cls.chunks(batch))
+        parts = [{k: v[index] for k, v in batch.items()} for index in chunks]
+
+        if workers > 1 and len(parts) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(compute_analytics, parts))
+        else:
+            outputs = [compute_analytics(part) for part in parts]
+
+        for index, output in zip(chunks, outputs):
+            for key, values in output.items():
+                results[key][index] = values
+        return results
+
+    @staticmethod
+    def to_decimal(value, places, limit):
+        if not np.isfinite(value) or abs(value) > limit:
+            return None
+        return Decimal(f"{value:.{places}f}")
+
+    @classmethod
+    def refresh(cls, workers=1, batch_size=2000, dry_run=False):
+        """Recompute analytics for the live universe and persist the changes."""
+        started = time.perf_counter()
+        isin_codes, batch = cls.load_universe()
+        loaded = time.perf_counter()
+        results = cls.compute(batch, workers=workers)
+        computed = time.perf_counter()
+
+        # Values that could not be computed (no price, no stored YTM, solver
+        # out of range) are skipped, so loaded data is never nulled out
+        values_by_model = {model: {} for model, *_ in cls.OUTPUTS.values()}
+        for key, (model, field, places, limit) in cls.OUTPUTS.items():
+            column = results[key]
+            for i, code in enumerate(isin_codes):
+                value = cls.to_decimal(column[i], places, limit)
+                if value is not None:
+                    values_by_model[model].setdefault(code, {})[field] = value
+
+        updated = {}
+        if not dry_run:
+            with transaction.atomic(using=router.db_for_write(ISINDetailedInfo)):
+                for model, values in values_by_model.items():
+                    updated[model.__name__] = cls.write(model, values, batch_size)
+            if any(updated.values()):
+                BondDataVersion.bump()
+
+        finished = time.perf_counter()
+        logger.info(
+            f"Bond analytics: {len(isin_codes)} bonds, load {loaded - started:.2f}s, "
+            f"compute {computed - loaded:.2f}s, write {finished - computed:.2f}s, updated {updated}"
+        )
+        return {
+            "bonds": len(isin_codes),
+            "priced": int(np.isfinite(batch["clean_price"]).sum()),
+            "updated": updated,
+            "load_seconds": round(loaded - started, 3),
+            "compute_seconds": round(computed - loaded, 3),
+            "write_seconds": round(finished - computed, 3),
+        }
+
+    @classmethod
+    def write(cls, model, values, batch_size):
+        """Bulk update the rows whose stored values differ from `values`."""
+        pk = model._meta.pk.attname
+        fields = sorted({field for row in values.values() for field in row})
+        keys = list(values)
+        changed = {}
+        for start in range(0, len(keys), batch_size):
+            current = model.objects.filter(pk__in=keys[start:start + batch_size]).values_list(pk, *fields)
+            for key, *stored in current:
+                row = dict(zip(fields, stored))
+                new = values[key]
+                if any(row[field] != value for field, value in new.items()):
+                    row.update(new)
+                    changed[key] = row
+        return BulkSQLService.bulk_update_values(model, changed, fields, batch_size=batch_size)
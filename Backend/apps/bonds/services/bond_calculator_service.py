@@ -0,0 +1,245 @@
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.utils import get_payments_per_year, get_day_count_convention, get_settlement_days
+from apps.bonds.services.bond_analytics_service import risk_measures
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_pricing_service import accrued_to, redemption_flows, flow_grids, solve, price
+from apps.bonds.services.cash_flow_schedule import CashFlowSchedule, CashFlowScheduleService, NO_DATE
+from collections import OrderedDict
+import datetime
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CalculatorError(ValueError):
+    pass
+
+
+def risk(flows, y, frequency, size):
+    """(Macaulay duration in years, modified duration, convexity) of redemption_flows() at yield `y`."""
+    result = np.full((3, size), np.nan)
+    for rows, tau, amounts in flow_grids(*flows, size):
+        result[:, rows] = risk_measures(np.nan_to_num(y[rows]), tau, amounts, frequency[rows])
+    return np.where(np.isfinite(y), result, np.nan)
+
+
+class BondCalculatorService:
+    """
+    Price <-> yield for any number of scenarios in one vectorized pass.
+
+    A scenario names a bond (an ISIN, or explicit terms) and gives either a
+    clean price or a yield, with an optional settlement date, quantity and
+    redemption (maturity / call / put). The scenarios' schedules are
+    stacked into one CashFlowSchedule and priced with the same functions as
+    BondPricingService; yields are Newton solves seeded from the bond's
+    stored YTM.
+
+    Each bond's schedule is memoized per process (LRU, MAX_SCHEDULES). An
+    ISIN entry stays valid while BondDataVersion reports no change to that
+    ISIN, so a repeated call does no database work for its schedule.
+    """
+
+    MAX_SCENARIOS = 500
+    MAX_SCHEDULES = 10_000
+    REDEMPTIONS = {"maturity": "maturity", "call": "call_date", "put": "put_date"}
+
+    _schedules = OrderedDict()
+    _lock = threading.Lock()
+
+    # ---- Schedules ----
+
+    @classmethod
+    def _remember(cls, key, entry):
+        with cls._lock:
+            cls._schedules[key] = entry
+            cls._schedules.move_to_end(key)
+            while len(cls._schedules) > cls.MAX_SCHEDULES:
+                cls._schedules.popitem(last=False)
+
+    @classmethod
+    def isin_schedules(cls, isin_codes):
+        """{isin_code: (one-bond CashFlowSchedule, stored YTM decimal)}; unknown / unschedulable ISINs are left out."""
+        version = BondDataVersion.get()
+        found, missing, stale = {}, [], {}
+        with cls._lock:
+            for isin_code in isin_codes:
+                entry = cls._schedules.get(isin_code)
+                if entry is None:
+                    missing.append(isin_code)
+                    continue
+                cls._schedules.move_to_end(isin_code)
+                if entry[0] == version:
+                    found[isin_code] = entry[1:]
+                else:
+                    # Keep the entry itself: it may be evicted once the lock is released
+                    stale.setdefault(entry[0], []).append((isin_code, entry[1:]))
+
+        # Entries from an older version survive if their ISIN was not written since
+        for entry_version, codes in stale.items():
+            changed = BondDataVersion.changes_since(entry_version, version)
+            for isin_code, entry in codes:
+                if changed is not None and isin_code not in changed:
+                    cls._remember(isin_code, (version, *entry))
+                    found[isin_code] = entry
+                else:
+                    missing.append(isin_code)
+
+        if missing:
+            schedule = CashFlowScheduleService.schedules(missing)
+            ytms = dict(ISINBasicInfo.objects.filter(isin_code__in=missing).values_list("isin_code", "ytm_percent"))
+            for row, isin_code in enumerate(schedule.isin_codes):
+                ytm = ytms.get(isin_code)
+                entry = (schedule.select([row]), np.nan if ytm is None else float(ytm) / 100.0)
+                cls._remember(isin_code, (version, *entry))
+                found[isin_code] = entry
+        return found
+
+    @classmethod
+    def terms_schedule(cls, terms, settlement):
+        """(one-bond CashFlowSchedule, NaN) for explicit terms (see CalculatorScenarioSerializer)."""
+        frequency = get_payments_per_year(terms["interest_payment_frequency"])
+        if frequency is None:
+            raise CalculatorError(f"Unknown interest_payment_frequency {terms['interest_payment_frequency']!r}")
+        start = terms.get("issue_date")
+        if start is None:
+            if frequency == 0:
+                raise CalculatorError("issue_date is required for cumulative bonds")
+            # Seasoned bond: any start a coupon period before settlement
+            # leaves the current period regular
+            start = min(settlement, terms["maturity_date"]) - datetime.timedelta(days=400)
+        if start >= terms["maturity_date"]:
+            raise CalculatorError("issue_date must be before maturity_date")
+        key = (
+            "terms", terms["maturity_date"], start, frequency, terms["coupon_rate_percent"], terms["face_value"],
+            terms.get("day_count_convention"), terms.get("call_date"), terms.get("put_date"),
+        )
+        with cls._lock:
+            entry = cls._schedules.get(key)
+        if entry is None:
+            dates = np.array([terms["maturity_date"], start, terms.get("call_date"), terms.get("put_date")], dtype="datetime64[D]")
+            schedule = CashFlowSchedule.build(
+                np.array(["TERMS"], dtype=object), np.array([None], dtype=object), {
+                    "maturity": dates[:1],
+                    "start": dates[1:2],
+                    "frequency": np.array([frequency], dtype=np.int64),
+                    "coupon_rate": np.array([float(terms["coupon_rate_percent"]) / 100.0]),
+                    "face_value": np.array([float(terms["face_value"])]),
+                    "convention": np.array([get_day_count_convention(terms.get("day_count_convention"))], dtype=np.int8),
+                    "settlement_days": np.array([get_settlement_days(terms.get("settlement_cycle"))], dtype=np.int64),
+                    "call_date": dates[2:3],
+                    "put_date": dates[3:4],
+                },
+            )
+            entry = (None, schedule, np.nan)
+        cls._remember(key, entry)
+        return entry[1:]
+
+    # ---- Calculation ----
+
+    @classmethod
+    def calculate(cls, scenarios, today=None):
+        """
+        One result dict per validated scenario, in order. Scenarios that
+        cannot be priced (unknown ISIN, settled after redemption, yield out
+        of range) get {"error": ...} instead of failing the batch.
+        """
+        if len(scenarios) > cls.MAX_SCENARIOS:
+            raise CalculatorError(f"At most {cls.MAX_SCENARIOS} scenarios per request")
+        today = today or timezone.now().date()
+        by_isin = cls.isin_schedules({s["isin"] for s in scenarios if s.get("isin")})
+
+        results = [None] * len(scenarios)
+        parts, ytms, settlement, index = [], [], [], []
+        for i, scenario in enumerate(scenarios):
+            try:
+                if scenario.get("isin"):
+                    if scenario["isin"] not in by_isin:
+                        raise CalculatorError(f"No live bond with a cash-flow schedule for ISIN {scenario['isin']}")
+                    schedule, ytm = by_isin[scenario["isin"]]
+                    settles = scenario.get("settlement_date") or schedule.settlement_dates(today)[0].item()
+                else:
+                    terms = scenario["terms"]
+                    settles = scenario.get("settlement_date") or np.busday_offset(
+                        np.datetime64(today, "D"), get_settlement_days(terms.get("settlement_cycle")), roll="forward"
+                    ).item()
+                    schedule, ytm = cls.terms_schedule(terms, settles)
+            except CalculatorError as e:
+                results[i] = {"error": str(e)}
+                continue
+            parts.append(schedule)
+            ytms.append(ytm)
+            settlement.append(settles)
+            index.append(i)
+
+        if parts:
+            batch = [scenarios[i] for i in index]
+            for i, result in zip(index, cls.compute(CashFlowSchedule.concat(parts), np.array(ytms), np.array(settlement, dtype="datetime64[D]"), batch)):
+                results[i] = result
+        return results
+
+    @classmethod
+    def compute(cls, schedule, stored_ytm, settlement, scenarios):
+        size = len(schedule)
+        terms = schedule.terms
+        no_date = NO_DATE
+        redemption_field = [cls.REDEMPTIONS[s.get("redemption") or "maturity"] for s in scenarios]
+        redemption = np.array(
+            [terms[field][i] for i, field in enumerate(redemption_field)], dtype="datetime64[D]"
+        ) if size else np.empty(0, dtype="datetime64[D]")
+        redemption = np.where(redemption > settlement, redemption, no_date)
+
+        first = schedule.next_flow(settlement)
+        alive = (first < schedule.offsets[1:]) & ~np.isnat(redemption)
+        cumulative = terms["frequency"] == 0
+        accrued = accrued_to(schedule, np.minimum(first, schedule.flow_count - 1), settlement)
+        accrued = np.where(cumulative, 0.0, accrued)
+        frequency = np.where(cumulative, 1.0, terms["frequency"]).astype(np.float64)
+        flows = redemption_flows(schedule, first, settlement, np.where(alive, redemption, no_date))
+
+        clean_in = np.array([np.nan if s.get("price") is None else float(s["price"]) for s in scenarios])
+        yield_in = np.array([np.nan if s.get("yield_percent") is None else float(s["yield_percent"]) / 100.0 for s in scenarios])
+        by_price = np.isfinite(clean_in)
+        guess = np.where(np.isfinite(stored_ytm), stored_ytm, terms["coupon_rate"])
+        # Each direction only runs when some scenario needs it
+        y, dirty = yield_in, clean_in + accrued
+        if by_price.any():
+            y = np.where(by_price, solve(flows, dirty, frequency, guess, size), yield_in)
+        if not by_price.all():
+            dirty = np.where(by_price, dirty, price(flows, yield_in, frequency, size))
+        macaulay, modified, convexity = risk(flows, y, frequency, size)
+        next_flow_date = schedule.dates[np.minimum(first, schedule.flow_count - 1)]
+
+        results = []
+        for i, scenario in enumerate(scenarios):
+            if not alive[i]:
+                what = scenario.get("redemption") or "maturity"
+                results.append({"error": f"Bond has no {what} date after settlement date {settlement[i]}"})
+                continue
+            if not (np.isfinite(y[i]) and np.isfinite(dirty[i])):
+                results.append({"error": "Price and yield are out of the solvable range"})
+                continue
+            quantity = scenario.get("quantity") or 1
+            results.append({
+                "isin": scenario.get("isin"),
+                "settlement_date": str(settlement[i]),
+                "redemption_date": str(redemption[i]),
+                "next_coupon_date": None if cumulative[i] else str(next_flow_date[i]),
+                "quantity": quantity,
+                "clean_price": round(float(dirty[i] - accrued[i]), 4),
+                "accrued_interest": round(float(accrued[i]), 4),
+                "dirty_price": round(float(dirty[i]), 4),
+                "yield_percent": round(float(y[i] * 100.0), 4) + 0.0,
+                "consideration": round(float(dirty[i] * quantity), 2),
+                "macaulay_duration": round(float(macaulay[i]), 4),
+                "modified_duration": round(float(modified[i]), 4),
+                "convexity": round(float(convexity[i]), 4),
+            })
+        return results
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._schedules.clear()
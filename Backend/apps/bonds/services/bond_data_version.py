@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.cache import cache
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondDataVersion:
+    """
+    Global version stamp for the bond catalogue.
+
+    Bumped on every ISINBasicInfo / ISINRating / ISINDetailedInfo write
+    (see signals.py) and after bulk jobs that bypass signals. Anything that
+    keeps a derived copy of the catalogue (e.g. BondUniverseSnapshot)
+    compares its own version against this one to know it is stale.
+
+    Lives in the default cache, which has to be shared between processes
+    (Redis in config.settings) for a bump in a Celery task to reach the web
+    workers; shared() tells whether it is.
+    """
+
+    CACHE_KEY = "bonds:data_version"
+    JOURNAL_KEY = "bonds:data_changes:{}"
+    JOURNAL_TTL = 24 * 3600
+    JOURNAL_MAX_REPLAY = 1000
+    BULK = "*"
+    PER_PROCESS_BACKENDS = (
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+    )
+
+    @classmethod
+    def _initial(cls):
+        # Seeded from the clock so a version lost to cache eviction never
+        # restarts at a value some worker has already seen.
+        return time.time_ns() // 1_000_000
+
+    @classmethod
+    def shared(cls):
+        """Whether every process reads the same version (i.e. the default cache is not per process)."""
+        return settings.CACHES.get("default", {}).get("BACKEND") not in cls.PER_PROCESS_BACKENDS
+
+    @classmethod
+    def get(cls):
+        version = cache.get(cls.CACHE_KEY)
+        if version is None:
+            cache.add(cls.CACHE_KEY, cls._initial(), timeout=None)
+            version = cache.get(cls.CACHE_KEY)
+        return version
+
+    @classmethod
+    def bump(cls, isin_codes=None):
+        """
+        Advance the version and journal which ISINs changed, so consumers can
+        refresh incrementally (see changes_since). None = bulk / unknown.
+        """
+        try:
+            version = cache.incr(cls.CACHE_KEY)
+        except ValueError:
+            cache.add(cls.CACHE_KEY, cls._initial(), timeout=None)
+            version = cache.incr(cls.CACHE_KEY)
+        changed = cls.BULK if isin_codes is None else list(isin_codes)
+        cache.set(cls.JOURNAL_KEY.format(version), changed, cls.JOURNAL_TTL)
+        return version
+
+    @classmethod
+    def changes_since(cls, version, current=None):
+        """
+        ISINs changed after `version` up to `current`, or None when that is
+        unknown (bulk write, journal expired, or too far behind) and the
+        consumer has to rebuild from scratch.
+        """
+        current = cls.get() if current is None else current
+        if current - version > cls.JOURNAL_MAX_REPLAY:
+            return None
+        keys = [cls.JOURNAL_KEY.format(v) for v in range(version + 1, current + 1)]
+        entries = cache.get_many(keys)
+        changed = set()
+        for key in keys:
+            codes = entries.get(key)
+            if codes is None or codes == cls.BULK:
+                return None
+            changed.update(codes)
+        return changed
@@ -0,0 +1,386 @@
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+from apps.bonds.models import CompanyInfo, DataTransformationLog, ISINBasicInfo, ISINDetailedInfo
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_snapshot_service import BondSnapshotService
+from decimal import Decimal
+from pathlib import Path
+import csv
+import datetime
+import hashlib
+import io
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondETLLoader:
+    """
+    Change-detecting bulk loader for the bonds tables that carry `data_hash`.
+
+    For each chunk of source records (CSV, JSON array or JSON lines):
+    1. normalize every record through the model fields and hash it
+    2. read the stored data_hash of the chunk's keys in one query
+    3. COPY only new / changed rows into a temp staging table and apply
+       them with one INSERT ... ON CONFLICT (key) DO UPDATE
+
+    Unchanged rows cost a hash and a dict lookup, so a nightly refresh with
+    little churn is bound by parsing, not by the database. The whole run is
+    one transaction and is recorded in DataTransformationLog; a SUCCESS row
+    triggers the post-ETL refreshes (see signals.py). Row signals do not
+    fire, so the loader bumps BondDataVersion / flags snapshots itself.
+
+    Columns come from the CSV header (or the first JSON record, or
+    `columns`); a record without one of them loads it as NULL. Columns that
+    the source does not carry are never overwritten on update.
+    """
+
+    CHUNK_SIZE = 5000
+    HASH_FIELD = "data_hash"
+    # Targets by table name, as accepted by manage.py load_bond_data
+    MODELS = {model._meta.db_table: model for model in (ISINBasicInfo, ISINDetailedInfo, CompanyInfo)}
+    # Natural keys for models whose primary key is a surrogate
+    KEYS = {CompanyInfo: "issuer_name"}
+    # Maintained by other services / the database, never taken from a source
+    MANAGED_FIELDS = {
+        "data_hash", "search_vector",
+        "current_rating", "current_rating_agency", "current_rating_date", "current_rating_rank",
+    }
+    NULL = "\\N"
+    # Larger change sets are journalled as a bulk write
+    MAX_JOURNALLED_CHANGES = 1000
+
+    def __init__(self, model, key=None, columns=None, chunk_size=None):
+        if model._meta.db_table not in self.MODELS:
+            raise ValueError(f"{model.__name__} is not an ETL target")
+        self.model = model
+        self.key = model._meta.get_field(key or self.KEYS.get(model) or model._meta.pk.name)
+        if not (self.key.primary_key or self.key.unique):
+            raise ValueError(f"{model.__name__}.{self.key.name} is not unique; ON CONFLICT needs a unique key")
+        self.columns = columns
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.using = router.db_for_write(model)
+        self.connection = connections[self.using]
+        self.fields = self.source_fields(model)
+
+    @classmethod
+    def source_fields(cls, model):
+        """{name / attname: field} of the columns a source may set."""
+        fields = {}
+        for field in model._meta.concrete_fields:
+            if field.name in cls.MANAGED_FIELDS or getattr(field, "generated", False):
+                continue
+            if isinstance(field, models.AutoField) or getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                continue
+            fields[field.name] = fields[field.attname] = field
+        return fields
+
+    # ---- Source ----
+
+    @staticmethod
+    def read_records(path):
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                yield from csv.DictReader(handle)
+        elif path.suffix.lower() in (".jsonl", ".ndjson"):
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        yield json.loads(line)
+        elif path.suffix.lower() == ".json":
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            yield from data["records"] if isinstance(data, dict) else data
+        else:
+            raise ValueError(f"Unsupported source format: {path.name} (expected .csv, .json or .jsonl)")
+
+    def resolve_columns(self, first_record):
+        names = self.columns or list(first_record)
+        unknown = [name for name in names if name not in self.fields and name != self.key.name and name != self.key.attname]
+        if unknown:
+            logger.warning(f"ETL {self.model._meta.db_table}: ignoring unknown / managed columns {unknown}")
+        fields = []
+        for name in names:
+            field = self.fields.get(name) or (self.key if name in (self.key.name, self.key.attname) else None)
+            if field is not None and field not in fields:
+                fields.append(field)
+        if self.key not in fields:
+            raise ValueError(f"Source has no {self.key.name} column")
+        return fields
+
+    # ---- Normalization ----
+
+    @staticmethod
+    def converter(field):
+        """Source value -> python value for `field`; built once per column, run per cell."""
+        keep_blank = isinstance(field, (models.CharField, models.TextField)) and not field.null
+        if isinstance(field, models.ForeignKey):
+            base = field.target_field.to_python
+        elif isinstance(field, (models.CharField, models.TextField)):
+            def base(value):
+                return value if isinstance(value, str) else field.to_python(value)
+        elif isinstance(field, models.JSONField):
+            def base(value):
+                return json.loads(value) if isinstance(value, str) else value
+        elif isinstance(field, models.BooleanField):
+            words = {"yes": True, "y": True, "1": True, "no": False, "n": False, "0": False}
+
+            def base(value):
+                if isinstance(value, str):
+                    value = words.get(value.lower(), value)
+                return field.to_python(value)
+        elif isinstance(field, models.DecimalField):
+            # Same scale as the column, so "7.5" and "7.500" hash alike
+            exponent = Decimal(1).scaleb(-field.decimal_places)
+
+            def base(value):
+                return field.to_python(value).quantize(exponent)
+        elif isinstance(field, models.DateField) and not isinstance(field, models.DateTimeField):
+            def base(value):
+                try:
+                    return datetime.date.fromisoformat(value)
+                except (TypeError, ValueError):
+                    return field.to_python(value)
+        else:
+            base = field.to_python
+
+        def convert(value):
+            if isinstance(value, str):
+                value = value.strip()
+                if not value and not keep_blank:
+                    return None
+            return None if value is None else base(value)
+        return convert
+
+    def normalize(self, record, converters):
+        return {attname: convert(record.get(name, record.get(attname))) for name, attname, convert in converters}
+
+    @staticmethod
+    def data_hash(row):
+        """sha256 over the row's values in column-name order."""
+        payload = "\x1f".join(
+            "\x00" if value is None
+            else json.dumps(value, sort_keys=True) if isinstance(value, (dict, list))
+            else str(value)
+            for _, value in sorted(row.items())
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---- Database ----
+
+    def stored_hashes(self, cursor, keys):
+        qn = self.connection.ops.quote_name
+        cursor.execute(
+            f"SELECT {qn(self.key.column)}, {qn(self.HASH_FIELD)} FROM {qn(self.model._meta.db_table)} "
+            f"WHERE {qn(self.key.column)} = ANY(%s)",
+            [list(keys)],
+        )
+        return dict(cursor.fetchall())
+
+    def insert_defaults(self, fields):
+        """
+        Values for NOT NULL columns the source lacks (managed ones included),
+        used on insert only: Postgres checks them on the proposed row even
+        when ON CONFLICT turns it into an update.
+        """
+        present = set(fields)
+        defaults = {}
+        for field in self.model._meta.concrete_fields:
+            if field in present or field.null or field.name == self.HASH_FIELD or getattr(field, "generated", False):
+                continue
+            if isinstance(field, models.AutoField) or getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                continue
+            if not field.has_default():
+                raise ValueError(f"Source has no {field.name} column and the field has no default")
+            defaults[field.attname] = field.get_default()
+        return defaults
+
+    def copy_value(self, value):
+        if value is None:
+            return self.NULL
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return str(value)
+
+    def apply(self, cursor, stage, columns, update_columns, rows):
+        """COPY `rows` into the staging table and upsert them. Returns [(key, pk, inserted)]."""
+        qn = self.connection.ops.quote_name
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self.copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+
+        column_sql = ", ".join(qn(column) for column in columns)
+        cursor.execute(f"TRUNCATE {stage}")
+        cursor.copy_expert(f"COPY {stage} ({column_sql}) FROM STDIN WITH (FORMAT csv, NULL '{self.NULL}')", buffer)
+        cursor.execute(
+            f"INSERT INTO {qn(self.model._meta.db_table)} ({column_sql}) SELECT {column_sql} FROM {stage} "
+            f"ON CONFLICT ({qn(self.key.column)}) DO UPDATE SET "
+            + ", ".join(f"{qn(column)} = EXCLUDED.{qn(column)}" for column in update_columns)
+            + f" RETURNING {qn(self.key.column)}, {qn(self.model._meta.pk.column)}, (xmax = 0)"
+        )
+        return cursor.fetchall()
+
+    # ---- Run ----
+
+    def load(self, path, dry_run=False):
+        """Load `path` into the target table. Returns the run counters."""
+        started_at = timezone.now()
+        started = time.perf_counter()
+        log = DataTransformationLog.objects.create(
+            operation_type="ETL",
+            source_table=Path(path).name,
+            target_table=self.model._meta.db_table,
+            started_at=started_at,
+        )
+        counts = {"processed": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        errors = []
+        changed = []
+        try:
+            with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+                stage = None
+                fields = converters = columns = update_columns = defaults = references = None
+                chunk = []
+                for number, record in enumerate(self.read_records(path), start=1):
+                    if fields is None:
+                        fields = self.resolve_columns(record)
+                        defaults = self.insert_defaults(fields)
+                        converters = [(field.name, field.attname, self.converter(field)) for field in fields]
+                        references = [field for field in fields if field.many_to_one or field.one_to_one]
+                    counts["processed"] += 1
+                    try:
+                        chunk.append(self.normalize(record, converters))
+                    except (ValidationError, ValueError, TypeError) as e:
+                        counts["failed"] += 1
+                        if len(errors) < 50:
+                            errors.append(f"record {number}: {e}")
+                    if len(chunk) < self.chunk_size:
+                        continue
+                    if stage is None and not dry_run:
+                        stage, columns, update_columns = self.create_stage(cursor, fields, defaults)
+                    changed += self.load_chunk(
+                        cursor, chunk, stage, columns, update_columns, defaults, references, counts, errors, dry_run
+                    )
+                    chunk = []
+                if chunk:
+                    if stage is None and not dry_run:
+                        stage, columns, update_columns = self.create_stage(cursor, fields, defaults)
+                    changed += self.load_chunk(
+                        cursor, chunk, stage, columns, update_columns, defaults, references, counts, errors, dry_run
+                    )
+                if dry_run:
+                    transaction.set_rollback(True, using=self.using)
+        except Exception as e:
+            log.status = "FAILED"
+            log.error_details = str(e)
+            self.finish(log, counts, started)
+            raise
+
+        if not dry_run and changed:
+            self.after_load(changed)
+        log.status = "SUCCESS" if not dry_run else "DRY_RUN"
+        log.error_details = "\n".join(errors) or None
+        self.finish(log, counts, started)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"ETL {self.model._meta.db_table} from {Path(path).name}: {counts}")
+        return counts
+
+    def create_stage(self, cursor, fields, defaults):
+        qn = self.connection.ops.quote_name
+        source = [field.attname for field in fields]
+        columns = source + list(defaults) + [self.HASH_FIELD]
+        update_columns = source + [self.HASH_FIELD]
+        for field in self.model._meta.concrete_fields:
+            if getattr(field, "auto_now_add", False):
+                columns.append(field.attname)
+            elif getattr(field, "auto_now", False):
+                columns.append(field.attname)
+                update_columns.append(field.attname)
+        stage = qn(f"etl_stage_{self.model._meta.db_table}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(qn(c) for c in columns)} "
+            f"FROM {qn(self.model._meta.db_table)} WITH NO DATA"
+        )
+        return stage, columns, update_columns
+
+    def missing_references(self, cursor, field, values):
+        """The `values` of foreign key `field` that have no row in the referenced table."""
+        qn = self.connection.ops.quote_name
+        target = field.target_field
+        cursor.execute(
+            f"SELECT {qn(target.column)} FROM {qn(target.model._meta.db_table)} WHERE {qn(target.column)} = ANY(%s)",
+            [list(values)],
+        )
+        return set(values) - {value for value, in cursor.fetchall()}
+
+    def load_chunk(self, cursor, chunk, stage, columns, update_columns, defaults, references, counts, errors, dry_run):
+        key = self.key.attname
+        latest = {}
+        for row in chunk:
+            if row[key] in (None, ""):
+                counts["failed"] += 1
+                continue
+            if row[key] in latest:
+                # Duplicate key in the source: the last record wins
+                counts["skipped"] += 1
+            latest[row[key]] = row
+
+        # Rows pointing at a parent that does not exist would abort the whole run
+        for field in references:
+            values = {row[field.attname] for row in latest.values() if row[field.attname] is not None}
+            missing = self.missing_references(cursor, field, values) if values else set()
+            for value in [value for value, row in latest.items() if row[field.attname] in missing]:
+                counts["failed"] += 1
+                if len(errors) < 50:
+                    errors.append(f"{self.key.name} {value}: unknown {field.name} {latest[value][field.attname]}")
+                del latest[value]
+
+        stored = self.stored_hashes(cursor, latest)
+        now = timezone.now()
+        pending = []
+        for value, row in latest.items():
+            digest = self.data_hash(row)
+            if stored.get(value) == digest:
+                counts["skipped"] += 1
+                continue
+            if value in stored:
+                counts["updated"] += 1
+            else:
+                counts["inserted"] += 1
+            row = {**defaults, **row, self.HASH_FIELD: digest}
+            for field in self.model._meta.concrete_fields:
+                if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                    row[field.attname] = now
+            pending.append(row)
+
+        if dry_run or not pending:
+            return []
+        return self.apply(cursor, stage, columns, update_columns, pending)
+
+    def after_load(self, changed):
+        """Stand-in for the row signals the bulk path skips."""
+        if self.model is ISINBasicInfo or self.model is ISINDetailedInfo:
+            isin_codes = [key for key, _, _ in changed]
+            BondDataVersion.bump(isin_codes if len(isin_codes) <= self.MAX_JOURNALLED_CHANGES else None)
+        elif self.model is CompanyInfo:
+            BondDataVersion.bump([])
+            BondSnapshotService.mark_stale(company_ids=[pk for _, pk, _ in changed])
+
+    @staticmethod
+    def finish(log, counts, started):
+        log.records_processed = counts["processed"]
+        log.records_success = counts["inserted"] + counts["updated"]
+        log.records_skipped = counts["skipped"]
+        log.records_failed = counts["failed"]
+        log.execution_time_seconds = round(time.perf_counter() - started, 3)
+        log.completed_at = timezone.now()
+        log.save()
@@ -0,0 +1,114 @@
+from django.db import connections, router
+from django.db.models import Case, CharField, F, Value, When
+from apps.bonds.filters import CaseInsensitiveChoiceBaseFilter, tenure_cutoff_date, validate_rating
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.services.catalogue_stats_service import CatalogueStatsService
+from apps.bonds.utils import RATING_BUCKETS
+from decimal import Decimal
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondFacetService:
+    """
+    Screener facet counts: how many bonds of a filtered BondFilter queryset
+    fall on each value of every facet.
+
+    All facets come out of one statement: the filtered queryset is wrapped
+    as a subquery (with the rating / tenure buckets computed per row) and
+    grouped by GROUPING SETS, one set per facet plus the grand total. So
+    the cost is one scan of the matching bonds, not a count() per value.
+    """
+
+    FACETS = (
+        "issuer_type", "tax_category", "rating_bucket", "interest_payment_frequency",
+        "secured", "perpetual", "tenure_bucket",
+    )
+    RATING_BUCKETS = RATING_BUCKETS
+    # Same buckets as StatsView's byMaturity, on the balance_tenure filters' years
+    TENURE_BUCKETS = CatalogueStatsService.MATURITY_BUCKETS
+
+    @classmethod
+    def rows(cls, queryset):
+        """values() queryset with one column per facet."""
+        rating_bucket = Case(
+            *[When(current_rating_rank__range=(low, high), then=Value(name)) for name, low, high in cls.RATING_BUCKETS],
+            default=Value("UNRATED"),
+            output_field=CharField(),
+        )
+        tenure_bucket = Case(
+            *[
+                When(maturity_date__lt=tenure_cutoff_date(years, round_up=True), then=Value(name))
+                for name, years in cls.TENURE_BUCKETS
+            ],
+            default=Value(f"OVER_{cls.TENURE_BUCKETS[-1][1]}Y"),
+            output_field=CharField(),
+        )
+        return queryset.order_by().values(
+            "issuer_type", "tax_category", "interest_payment_frequency", "secured",
+            perpetual=F("prepetual"),
+            rating_bucket=rating_bucket,
+            tenure_bucket=tenure_bucket,
+        )
+
+    @classmethod
+    def _sql(cls, inner_sql, qn):
+        columns = [qn(facet) for facet in cls.FACETS]
+        return f"""
+            SELECT {", ".join(f"GROUPING({column}) = 0" for column in columns)},
+                   {", ".join(columns)},
+                   COUNT(*)
+            FROM ({inner_sql}) AS bonds
+            GROUP BY GROUPING SETS ((), {", ".join(f"({column})" for column in columns)})
+        """
+
+    @classmethod
+    def counts(cls, queryset):
+        """{"total": n, "facets": {facet: [{"value", "count"}, ...]}}, values by count (descending)."""
+        started = time.perf_counter()
+        inner_sql, params = cls.rows(queryset).query.sql_with_params()
+        connection = connections[router.db_for_read(ISINBasicInfo)]
+        with connection.cursor() as cursor:
+            cursor.execute(cls._sql(inner_sql, connection.ops.quote_name), params)
+            rows = cursor.fetchall()
+
+        size = len(cls.FACETS)
+        total, facets = 0, {facet: [] for facet in cls.FACETS}
+        for row in rows:
+            grouped, values, count = row[:size], row[size:2 * size], row[-1]
+            if not any(grouped):
+                total = count
+                continue
+            index = grouped.index(True)
+            facets[cls.FACETS[index]].append({"value": values[index], "count": count})
+        for values in facets.values():
+            values.sort(key=lambda item: (-item["count"], str(item["value"])))
+
+        logger.debug(f"Bond facets: {total} bonds, {len(rows)} groups in {time.perf_counter() - started:.3f}s")
+        return {"total": total, "facets": facets}
+
+    @staticmethod
+    def signature(filterset):
+        """
+        Normalized values of a valid BondFilter: requests that filter the
+        same way (param order, case and order of comma-separated choices,
+        "8" vs "8.00", no-op values) map to the same signature.
+        """
+        signature = []
+        for name, value in sorted(filterset.form.cleaned_data.items()):
+            if value in (None, "") or (name == "investment_grade_only" and not value):
+                continue
+            filter_ = filterset.filters[name]
+            if isinstance(filter_, CaseInsensitiveChoiceBaseFilter):
+                values = str(value).split(",") if filter_.allow_multiple else [str(value)]
+                value = ",".join(sorted({v.strip().upper() for v in values if v.strip()}))
+            elif filter_.method in ("filter_rating_min", "filter_rating_max"):
+                value = validate_rating(value)
+            elif isinstance(value, Decimal):
+                value = format(value.normalize(), "f")
+            elif not isinstance(value, bool):
+                value = str(value)
+            signature.append([name, value])
+        return signature
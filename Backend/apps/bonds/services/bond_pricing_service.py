@@ -0,0 +1,298 @@
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo, ISINDetailedInfo
+from apps.bonds.utils import ACT_ACT, THIRTY_360
+from apps.bonds.services.bond_analytics_service import CHUNK_CELLS, DAYS_PER_YEAR, present_value, solve_yield
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.bonds.services.bulk_sql_service import BulkSQLService
+from apps.bonds.services.cash_flow_schedule import CashFlowScheduleService, days_30_360
+from decimal import Decimal
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ---- Vectorized pricing on a CashFlowSchedule (pure NumPy) ----
+
+def accrued_to(schedule, positions, when):
+    """
+    Interest accrued on the flows at `positions` from their accrual start
+    to `when` (one date per position, clipped to the period) under each
+    bond's day count. Cumulative bonds compound annually.
+    """
+    start, end = schedule.accrual_start[positions], schedule.dates[positions]
+    when = np.minimum(np.maximum(when, start), end)
+    bond = schedule.bond[positions]
+    terms = schedule.terms
+    convention, rate = terms["convention"][bond], terms["coupon_rate"][bond]
+    face_value = terms["face_value"][bond]
+    days = (when - start).astype(np.float64)
+    accrued = np.select(
+        [convention == ACT_ACT, convention == THIRTY_360],
+        [
+            schedule.coupon[positions] * days / (end - start).astype(np.float64),
+            face_value * rate * days_30_360(start, when) / 360.0,
+        ],
+        face_value * rate * days / DAYS_PER_YEAR,
+    )
+    compounded = face_value * ((1.0 + rate) ** (days / DAYS_PER_YEAR) - 1.0)
+    return np.where(terms["frequency"][bond] == 0, compounded, accrued)
+
+
+def redemption_flows(schedule, first, settlement, redemption):
+    """
+    Flows a holder settling on `settlement` receives if each bond is
+    redeemed at par on `redemption` (one date per bond, NaT = not
+    redeemable then).
+
+    `first` is each bond's next flow (CashFlowSchedule.next_flow). Coupons
+    are kept up to the redemption date, the one running over it cut to
+    the interest accrued until then. Returns flat arrays (bond, rank, tau,
+    amount) with tau the time to each flow in coupon periods (in years
+    for cumulative bonds, which are priced with annual compounding).
+    """
+    bond, positions = schedule.bond, np.arange(schedule.flow_count)
+    redeem = redemption[bond]
+    keep = (positions >= first[bond]) & (schedule.accrual_start < redeem) & ~np.isnat(redeem)
+    positions = positions[keep]
+    bond, redeem = bond[keep], redeem[keep]
+
+    terms = schedule.terms
+    frequency = terms["frequency"][bond]
+    cumulative = frequency == 0
+    end = schedule.dates[positions]
+    paid = np.minimum(end, redeem)
+    # Periods are counted from their notional start, so a broken (short or
+    # long) first period counts as one regular period ending on its coupon date
+    period_start = schedule.period_start[positions]
+    period = (end - period_start).astype(np.float64)
+
+    # Whole periods to the start of each flow's period, plus the part of it paid
+    rank = positions - first[bond]
+    first_position = first[bond]
+    next_end = schedule.dates[first_position]
+    next_period = (next_end - schedule.period_start[first_position]).astype(np.float64)
+    remaining = (next_end - settlement[bond]).astype(np.float64) / next_period
+    tau = np.where(
+        cumulative,
+        (paid - settlement[bond]).astype(np.float64) / DAYS_PER_YEAR,
+        remaining + rank - 1 + (paid - period_start).astype(np.float64) / period,
+    )
+
+    cut = end > redeem
+    amount = np.where(cut, accrued_to(schedule, positions, redeem), schedule.coupon[positions])
+    # Par redemption on the last flow kept
+    last = np.r_[bond[1:] != bond[:-1], True] if len(bond) else np.zeros(0, dtype=bool)
+    amount = amount + np.where(last, terms["face_value"][bond], 0.0)
+    return bond, rank, tau, amount
+
+
+def flow_grids(bond, rank, tau, amount, size):
+    """
+    (rows, tau, flows) grids of redemption_flows() output for chunks of
+    bonds with similar flow counts, each within CHUNK_CELLS.
+    """
+    counts = np.bincount(bond, minlength=size)
+    order = np.argsort(counts, kind="stable")
+    order = order[counts[order] > 0]
+    row_of = np.full(size, -1, dtype=np.int64)
+    start = 0
+    while start < len(order):
+        end = start + 1
+        # counts are ascending, so the last row in a chunk sets its width
+        while end < len(order) and (end - start + 1) * counts[order[end]] <= CHUNK_CELLS:
+            end += 1
+        rows = order[start:end]
+        row_of[rows] = np.arange(len(rows))
+        selected = row_of[bond] >= 0
+        grid_tau = np.zeros((len(rows), counts[rows[-1]]))
+        grid_flows = np.zeros_like(grid_tau)
+        grid_tau[row_of[bond[selected]], rank[selected]] = tau[selected]
+        grid_flows[row_of[bond[selected]], rank[selected]] = amount[selected]
+        row_of[rows] = -1
+        yield rows, grid_tau, grid_flows
+        start = end
+
+
+def solve(flows, dirty_price, frequency, guess, size):
+    """Yield (decimal) of each bond's redemption_flows() at `dirty_price`, NaN where unsolved."""
+    result = np.full(size, np.nan)
+    for rows, tau, amounts in flow_grids(*flows, size):
+        result[rows] = solve_yield(dirty_price[rows], tau, amounts, frequency[rows], guess[rows])
+    return result
+
+
+def price(flows, y, frequency, size):
+    """Dirty price of each bond's redemption_flows() at yield `y` (decimal)."""
+    result = np.full(size, np.nan)
+    for rows, tau, amounts in flow_grids(*flows, size):
+        result[rows] = present_value(np.nan_to_num(y[rows]), tau, amounts, frequency[rows])[0]
+    return np.where(np.isfinite(y), result, np.nan)
+
+
+def compute_pricing(schedule, clean_price, stored_ytm, settlement):
+    """
+    Accrued interest, dirty price and yields to maturity / call / put /
+    worst for every bond of `schedule`, settling on `settlement` (one date
+    per bond). Prices are clean, in rupees per bond; yields are decimals.
+
+    Bonds without a traded price are priced off their stored YTM, so the
+    option yields and yield to worst cover them too.
+    """
+    size = len(schedule)
+    terms = schedule.terms
+    first = schedule.next_flow(settlement)
+    alive = first < schedule.offsets[1:]
+    no_date = np.datetime64("NaT")
+
+    cumulative = terms["frequency"] == 0
+    # Cumulative bonds trade on a price that includes the interest to date
+    accrued = accrued_to(schedule, np.minimum(first, schedule.flow_count - 1), settlement)
+    accrued = np.where(alive, np.where(cumulative, 0.0, accrued), np.nan)
+    frequency = np.where(cumulative, 1.0, terms["frequency"]).astype(np.float64)
+    guess = np.where(np.isfinite(stored_ytm), stored_ytm, terms["coupon_rate"])
+
+    maturity_flows = redemption_flows(schedule, first, settlement, np.where(alive, terms["maturity"], no_date))
+    traded = np.isfinite(clean_price) & alive
+    dirty_price = np.where(traded, clean_price + accrued, price(maturity_flows, stored_ytm, frequency, size))
+    ytm = np.where(traded, solve(maturity_flows, dirty_price, frequency, guess, size), stored_ytm)
+    ytm = np.where(alive, ytm, np.nan)
+
+    yields = {}
+    for name, field in (("ytc", "call_date"), ("ytp", "put_date")):
+        option_date = np.where(alive & (terms[field] > settlement), terms[field], no_date)
+        if np.isnat(option_date).all():
+            yields[name] = np.full(size, np.nan)
+            continue
+        flows = redemption_flows(schedule, first, settlement, option_date)
+        yields[name] = np.where(np.isnat(option_date), np.nan, solve(flows, dirty_price, frequency, guess, size))
+
+    return {
+        "accrued_interest_rs": accrued,
+        "dirty_price_rs": np.where(np.isfinite(dirty_price) & alive, dirty_price, np.nan),
+        "ytm": ytm,
+        "yield_to_call_percent": yields["ytc"] * 100.0,
+        "yield_to_put_percent": yields["ytp"] * 100.0,
+        # The put is the holder's option, so only a call can make it worse
+        "ytw_percent": np.fmin(ytm, yields["ytc"]) * 100.0,
+    }
+
+
+class BondPricingService:
+    """
+    Batch refresh of the pricing columns of ISINBasicInfo: accrued
+    interest, dirty price and yields to maturity / call / put / worst, for
+    a trade settling today's T+n (settlement_cycle) business day.
+
+    ytm_percent is solved here on the exact schedule, so it agrees with the
+    yield to worst beside it. Where it cannot be solved (no trade, matured,
+    solver out of range) the stored value is kept rather than nulled.
+
+    Works on the cached CashFlowSchedule of the universe, so a refresh is
+    one price query, a few vectorized passes and a write of the changed
+    rows. It runs after every analytics refresh and on the beat schedule,
+    which picks up intraday prices from MarketDataUpdater.
+    """
+
+    # result key -> (decimal places, max abs value)
+    OUTPUTS = {
+        "accrued_interest_rs": (4, 10 ** 14),
+        "dirty_price_rs": (4, 10 ** 14),
+        "ytm_percent": (3, 999),
+        "yield_to_call_percent": (3, 999),
+        "yield_to_put_percent": (3, 999),
+        "ytw_percent": (3, 999),
+    }
+    FIELDS = ("pricing_settlement_date",) + tuple(OUTPUTS)
+
+    @staticmethod
+    def to_decimals(values, places, limit):
+        """Decimal (None where not finite or over `limit`) for every value of an array."""
+        valid = (np.isfinite(values) & (np.abs(np.nan_to_num(values)) <= limit)).tolist()
+        return [Decimal(f"{value:.{places}f}") if ok else None for value, ok in zip(values.tolist(), valid)]
+
+    @classmethod
+    def load_prices(cls, schedule):
+        """(clean price, stored YTM as decimal) arrays in schedule order."""
+        prices = {
+            code: (price, ytm)
+            for code, price, ytm in ISINDetailedInfo.objects.values_list(
+                "isin_id", "last_traded_price_rs", "isin__ytm_percent"
+            ).iterator(chunk_size=5000)
+        }
+        clean_price = np.full(len(schedule), np.nan)
+        stored_ytm = np.full(len(schedule), np.nan)
+        for i, code in enumerate(schedule.isin_codes):
+            price, ytm = prices.get(code, (None, None))
+            if price is not None and price > 0:
+                clean_price[i] = float(price)
+            if ytm is not None:
+                stored_ytm[i] = float(ytm) / 100.0
+        return clean_price, stored_ytm
+
+    @classmethod
+    def compute(cls, today=None):
+        """{isin_code: {field: value}} for every scheduled bond."""
+        today = today or timezone.now().date()
+        schedule = CashFlowScheduleService.schedules(today=today)
+        if not len(schedule):
+            return {}
+        clean_price, stored_ytm = cls.load_prices(schedule)
+        settlement = schedule.settlement_dates(today)
+        results = compute_pricing(schedule, clean_price, stored_ytm, settlement)
+        results["ytm_percent"] = np.where(np.isfinite(results["ytm"]), results["ytm"], stored_ytm) * 100.0
+
+        columns = {field: cls.to_decimals(results[field], *bounds) for field, bounds in cls.OUTPUTS.items()}
+        columns["pricing_settlement_date"] = [
+            day if accrued is not None else None
+            for day, accrued in zip(settlement.tolist(), columns["accrued_interest_rs"])
+        ]
+        return {
+            code: dict(zip(cls.FIELDS, row))
+            for code, row in zip(schedule.isin_codes, zip(*(columns[field] for field in cls.FIELDS)))
+        }
+
+    @classmethod
+    def refresh(cls, batch_size=2000, today=None):
+        """Recompute every bond's pricing and persist the changes. Returns a summary."""
+        started = time.perf_counter()
+        values = cls.compute(today)
+        computed = time.perf_counter()
+
+        stored = {
+            row[0]: dict(zip(cls.FIELDS, row[1:]))
+            for row in ISINBasicInfo.objects.filter(
+                Q(pricing_settlement_date__isnull=False) | Q(ytw_percent__isnull=False)
+            ).values_list("isin_code", *cls.FIELDS)
+        }
+        empty = dict.fromkeys(cls.FIELDS)
+        changed = {code: row for code, row in values.items() if stored.get(code, empty) != row}
+        # Matured or no longer schedulable: the YTM stays as last stored
+        for code in stored.keys() - values.keys():
+            changed[code] = dict(empty, ytm_percent=stored[code]["ytm_percent"])
+
+        with transaction.atomic(using=router.db_for_write(ISINBasicInfo)):
+            updated = BulkSQLService.bulk_update_values(ISINBasicInfo, changed, cls.FIELDS, batch_size=batch_size)
+        if changed:
+            BondDataVersion.bump(list(changed) if len(changed) <= BondETLLoader.MAX_JOURNALLED_CHANGES else None)
+
+        finished = time.perf_counter()
+        optioned = sum(
+            1 for row in values.values()
+            if row["yield_to_call_percent"] is not None or row["yield_to_put_percent"] is not None
+        )
+        logger.info(
+            f"Bond pricing: {len(values)} bonds ({optioned} with option yields), compute {computed - started:.2f}s, "
+            f"write {finished - computed:.2f}s, updated {updated}"
+        )
+        return {
+            "bonds": len(values),
+            "optioned": optioned,
+            "updated": updated,
+            "compute_seconds": round(computed - started, 3),
+            "write_seconds": round(finished - computed, 3),
+        }
@@ -0,0 +1,66 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Case, When, Value, F, Q, FloatField, ExpressionWrapper
+from django.db.models.functions import Upper
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondSearchService:
+    """
+    Database-native bond search (no Elasticsearch needed).
+
+    Matches on:
+    - exact / prefix ISIN (btree + isin_basic_isin_trgm_idx)
+    - fuzzy issuer name via pg_trgm word similarity on UPPER(issuer_name)
+      (isin_basic_issuer_trgm_idx), so misspellings still match
+    - prefix full text over the weighted search_vector
+      (issuer_name A, isin_description B, issue_description C, series D)
+
+    and annotates a `relevance` score the views order by before their
+    usual tenure ordering.
+    """
+
+    TOKEN_RE = re.compile(r"\w+")
+    EXACT_ISIN_BOOST = 10.0
+
+    @classmethod
+    def build_query(cls, text):
+        """'hdfc ban' -> to_tsquery('simple', 'hdfc:* & ban:*'); None if no tokens."""
+        tokens = cls.TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return None
+        return SearchQuery(" & ".join(f"{t}:*" for t in tokens), search_type="raw", config="simple")
+
+    @classmethod
+    def search(cls, queryset, text):
+        text = (text or "").strip()
+        if not text:
+            return queryset
+
+        upper = text.upper()
+        ts_query = cls.build_query(text)
+
+        match = (
+            Q(isin_code=upper)
+            | Q(isin_code__startswith=upper)
+            | Q(issuer_upper__trigram_word_similar=upper)
+        )
+        relevance = (
+            Case(
+                When(isin_code=upper, then=Value(cls.EXACT_ISIN_BOOST)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            + TrigramWordSimilarity(upper, Upper("issuer_name"))
+        )
+        if ts_query is not None:
+            match |= Q(search_vector=ts_query)
+            relevance = relevance + SearchRank(F("search_vector"), ts_query)
+
+        return (
+            queryset.alias(issuer_upper=Upper("issuer_name"))
+            .filter(match)
+            .annotate(relevance=ExpressionWrapper(relevance, output_field=FloatField()))
+        )
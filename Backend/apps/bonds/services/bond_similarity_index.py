@@ -0,0 +1,222 @@
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.filters import tenure_cutoff_date
+from apps.bonds.services.bond_data_version import BondDataVersion
+import numpy as np
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondSimilarityIndex:
+    """
+    In-process nearest-neighbour index over the active bond universe.
+
+    Each bond is embedded as one row of a feature matrix:
+    - numeric: ytm, rating rank, tenure (maturity in years, so differences
+      equal remaining-tenure differences on any day), coupon; z-scored with
+      the universe mean / std and scaled by sqrt(weight)
+    - categorical: issuer_type, secured, tax_category one-hot encoded and
+      scaled by sqrt(weight / 2), so a mismatch adds exactly the weight
+
+    Distance is the Euclidean distance between embeddings. Top-k is one
+    mat-vec (|x|^2 - 2 x.q + |q|^2) plus argpartition over the contiguous
+    matrix: with ~1e5 rows that is ~3ms, faster than walking a tree.
+
+    The index follows BondDataVersion: rows named in the change journal are
+    re-read and patched in place; bulk writes, journal gaps or a category
+    value never seen before trigger a full rebuild.
+    """
+
+    VALUE_FIELDS = (
+        "isin_code", "isin_active", "maturity_date",
+        "ytm_percent", "current_rating_rank", "coupon_rate_percent",
+        "issuer_type", "secured", "tax_category",
+    )
+    NUMERIC_FEATURES = ("ytm_percent", "current_rating_rank", "tenure_years", "coupon_rate_percent")
+    CATEGORICAL_FEATURES = ("issuer_type", "secured", "tax_category")
+    WEIGHTS = {
+        "ytm_percent": 3.0,
+        "current_rating_rank": 3.0,
+        "tenure_years": 2.0,
+        "coupon_rate_percent": 1.0,
+        "issuer_type": 1.0,
+        "secured": 0.5,
+        "tax_category": 0.5,
+    }
+    # Unrated (999) sits one notch below D instead of ~1000 notches away
+    UNRATED_FEATURE_RANK = 19
+    DAYS_PER_YEAR = 365.25
+
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, version, rows):
+        self.version = version
+        raw = self.raw_numeric(rows)
+
+        # Normalization and category vocabularies are fixed at build time;
+        # incremental rows reuse them
+        self.mean = np.nan_to_num(np.nanmean(raw, axis=0)) if len(rows) else np.zeros(raw.shape[1])
+        std = np.nan_to_num(np.nanstd(raw, axis=0)) if len(rows) else np.ones(raw.shape[1])
+        self.scale = np.where(std > 1e-9, std, 1.0)
+        self.categories = {
+            name: {value: code for code, value in enumerate(sorted({row[6 + j] for row in rows}, key=str))}
+            for j, name in enumerate(self.CATEGORICAL_FEATURES)
+        }
+
+        self.isin_codes = np.array([row[0] for row in rows], dtype=object)
+        self.position = {code: i for i, code in enumerate(self.isin_codes)}
+        self.maturity = self.maturities(rows)
+        self.matrix = self.embed(raw, rows)
+        self.norms = (self.matrix ** 2).sum(axis=1)
+        self.alive = np.ones(len(rows), dtype=bool)
+
+    # ---- Features ----
+
+    @staticmethod
+    def ordinal(value):
+        return np.nan if value is None else float(value.toordinal())
+
+    @classmethod
+    def maturities(cls, rows):
+        return np.array([cls.ordinal(row[2]) for row in rows], dtype=np.float64)
+
+    @classmethod
+    def raw_numeric(cls, rows):
+        def number(value):
+            return np.nan if value is None else float(value)
+
+        raw = np.empty((len(rows), len(cls.NUMERIC_FEATURES)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            _, _, maturity, ytm, rank, coupon = row[:6]
+            raw[i] = (
+                number(ytm),
+                cls.UNRATED_FEATURE_RANK if rank is None or rank > cls.UNRATED_FEATURE_RANK else rank,
+                cls.ordinal(maturity) / cls.DAYS_PER_YEAR,
+                number(coupon),
+            )
+        return raw
+
+    def embed(self, raw, rows):
+        """Feature matrix rows; None if a category value is not in the vocabulary."""
+        # Missing numeric values are imputed with the mean (zero after centering)
+        numeric = np.nan_to_num((raw - self.mean) / self.scale)
+        numeric *= np.sqrt([self.WEIGHTS[name] for name in self.NUMERIC_FEATURES])
+
+        blocks = [numeric]
+        for j, name in enumerate(self.CATEGORICAL_FEATURES):
+            vocabulary = self.categories[name]
+            one_hot = np.zeros((len(rows), len(vocabulary)))
+            for i, row in enumerate(rows):
+                code = vocabulary.get(row[6 + j])
+                if code is None:
+                    return None
+                one_hot[i, code] = np.sqrt(self.WEIGHTS[name] / 2)
+            blocks.append(one_hot)
+        return np.hstack(blocks)
+
+    # ---- Lifecycle ----
+
+    @classmethod
+    def load(cls, isin_codes=None):
+        queryset = ISINBasicInfo.objects.order_by()
+        if isin_codes is None:
+            queryset = queryset.filter(isin_active=True)
+        else:
+            queryset = queryset.filter(isin_code__in=isin_codes)
+        return list(queryset.values_list(*cls.VALUE_FIELDS))
+
+    @classmethod
+    def build(cls):
+        version = BondDataVersion.get()
+        started = time.perf_counter()
+        index = cls(version, cls.load())
+        logger.info(f"Built bond similarity index v{version}: {len(index.isin_codes)} bonds in {time.perf_counter() - started:.2f}s")
+        return index
+
+    @classmethod
+    def current(cls):
+        """The index, synced with the global data version."""
+        with cls._lock:
+            index = cls._current
+            version = BondDataVersion.get()
+            if index is not None and index.version != version:
+                changed = BondDataVersion.changes_since(index.version, version)
+                if changed is None or not index.apply(changed, version):
+                    index = None
+            if index is None:
+                cls._current = index = cls.build()
+            return index
+
+    def apply(self, isin_codes, version):
+        """
+        Patch the rows for `isin_codes` in place (update, add or drop).
+        Returns False when the index has to be rebuilt instead.
+        """
+        rows = [row for row in self.load(isin_codes) if row[1]]
+        matrix = self.embed(self.raw_numeric(rows), rows)
+        if matrix is None:
+            return False
+
+        live = {row[0] for row in rows}
+        for code in isin_codes:
+            if code not in live and code in self.position:
+                self.alive[self.position[code]] = False
+
+        maturity = self.maturities(rows)
+        norms = (matrix ** 2).sum(axis=1)
+        new = []
+        for i, row in enumerate(rows):
+            position = self.position.get(row[0])
+            if position is None:
+                new.append(i)
+                continue
+            self.matrix[position] = matrix[i]
+            self.norms[position] = norms[i]
+            self.maturity[position] = maturity[i]
+            self.alive[position] = True
+
+        if new:
+            start = len(self.isin_codes)
+            self.isin_codes = np.concatenate([self.isin_codes, np.array([rows[i][0] for i in new], dtype=object)])
+            self.matrix = np.vstack([self.matrix, matrix[new]])
+            self.norms = np.concatenate([self.norms, norms[new]])
+            self.maturity = np.concatenate([self.maturity, maturity[new]])
+            self.alive = np.concatenate([self.alive, np.ones(len(new), dtype=bool)])
+            for offset, i in enumerate(new):
+                self.position[rows[i][0]] = start + offset
+
+        self.version = version
+        logger.debug(f"Similarity index patched to v{version}: {len(isin_codes)} bonds reloaded, {len(new)} added")
+        return True
+
+    # ---- Query ----
+
+    def nearest(self, isin_code, k):
+        """
+        Up to k (isin_code, distance) pairs closest to `isin_code`, among
+        live bonds that have not matured. None if the bond is not indexed.
+        """
+        position = self.position.get(isin_code)
+        if position is None or not self.alive[position]:
+            return None
+
+        query = self.matrix[position]
+        distance = self.norms - 2.0 * (self.matrix @ query) + self.norms[position]
+        candidates = self.alive & (self.maturity >= tenure_cutoff_date(0, round_up=True).toordinal())
+        candidates[position] = False
+        distance[~candidates] = np.inf
+
+        k = min(k, int(candidates.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(distance, k - 1)[:k]
+        top = top[np.argsort(distance[top], kind="stable")]
+        # max(): the norm expansion can go a hair below zero for identical rows
+        return [(self.isin_codes[i], float(np.sqrt(max(distance[i], 0.0)))) for i in top]
+
+    @classmethod
+    def search(cls, isin_code, k):
+        return cls.current().nearest(isin_code, k)
@@ -0,0 +1,154 @@
+from apps.bonds.models import BondSnapshotDocument, CompanyInfo, ISINCompanyMap, ISINRating, SnapshotDefinition
+from apps.bonds.services.financial_profile_service import FinancialProfileService
+from apps.bonds.utils import RATING_DESCRIPTIONS
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondSnapshotService:
+    """
+    Builds the BondSnapshotDocument rows behind BondSnapshotView.
+
+    A snapshot is a pure function of ETL data: the latest rating per agency
+    for the ISIN, plus the latest value of each financial SnapshotDefinition
+    metric of its primary company. The builder works on batches of ISINs:
+    DISTINCT ON queries for mappings and ratings, and the companies' pivoted
+    CompanyFinancialProfile rows for metrics, never a query per metric.
+
+    Signals flag documents stale when their inputs change (mark_stale);
+    rebuild_stale() then rebuilds only those, plus ISINs mapped to a
+    company that have no document yet.
+    """
+
+    BATCH_SIZE = 1000
+
+    # ---- Building ----
+
+    @classmethod
+    def primary_companies(cls, isin_codes):
+        """{isin: company_id} for the first primary mapping of each ISIN."""
+        return dict(
+            ISINCompanyMap.objects.filter(isin_id__in=isin_codes, primary_company=True)
+            .order_by("isin_id", "id")
+            .distinct("isin_id")
+            .values_list("isin_id", "company_id")
+        )
+
+    @classmethod
+    def latest_ratings(cls, isin_codes):
+        """{isin: [(agency, rating)]} - latest per agency, agencies in order."""
+        ratings = {}
+        rows = (
+            ISINRating.objects.filter(isin_id__in=isin_codes)
+            .order_by("isin_id", "rating_agency", "-rating_date")
+            .distinct("isin_id", "rating_agency")
+            .values_list("isin_id", "rating_agency", "credit_rating")
+        )
+        for isin_code, agency, rating in rows:
+            ratings.setdefault(isin_code, []).append((agency, rating))
+        return ratings
+
+    @classmethod
+    def definitions(cls):
+        return list(
+            SnapshotDefinition.objects.filter(metric_type="financial")
+            .order_by("order")
+            .values_list("metric_name", "display_name")
+        )
+
+    @classmethod
+    def documents(cls, isin_codes, definitions):
+        """{isin: (company_id, document)} for the ISINs that have a primary company."""
+        companies = cls.primary_companies(isin_codes)
+        if not companies:
+            return {}
+        company_ids = set(companies.values())
+        names = dict(CompanyInfo.objects.filter(company_id__in=company_ids).values_list("company_id", "issuer_name"))
+        ratings = cls.latest_ratings(list(companies))
+        metric_values = FinancialProfileService.latest_values(company_ids, {name for name, _ in definitions})
+
+        documents = {}
+        for isin_code, company_id in companies.items():
+            rating_str = "; ".join(
+                f"[{agency}] {rating} ({RATING_DESCRIPTIONS.get(rating, '')})"
+                for agency, rating in ratings.get(isin_code, [])
+            )
+            snapshot = [{"metric": "Credit Rating / Outlook", "value": rating_str}]
+            for metric_name, display_name in definitions:
+                latest = metric_values.get((company_id, metric_name))
+                if latest is not None:
+                    year, value = latest
+                    snapshot.append({"metric": display_name, "value": f"~ ₹ {value} Crore (as of {year})"})
+            documents[isin_code] = (company_id, {"company": names[company_id], "snapshot": snapshot})
+        return documents
+
+    @classmethod
+    def rebuild(cls, isin_codes=None):
+        """
+        Rebuild the documents for `isin_codes` (all mapped ISINs when None).
+        Returns the number of documents written.
+        """
+        started = time.perf_counter()
+        if isin_codes is None:
+            isin_codes = (
+                ISINCompanyMap.objects.filter(primary_company=True)
+                .order_by("isin_id").distinct("isin_id").values_list("isin_id", flat=True)
+            )
+        isin_codes = list(isin_codes)
+        definitions = cls.definitions()
+
+        written = 0
+        for start in range(0, len(isin_codes), cls.BATCH_SIZE):
+            batch = isin_codes[start:start + cls.BATCH_SIZE]
+            documents = cls.documents(batch, definitions)
+            BondSnapshotDocument.objects.bulk_create(
+                [
+                    BondSnapshotDocument(isin_id=isin_code, company_id=company_id, document=document, stale=False)
+                    for isin_code, (company_id, document) in documents.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["isin"],
+                update_fields=["company", "document", "stale", "built_at"],
+            )
+            # ISINs in the batch that lost their primary company
+            BondSnapshotDocument.objects.filter(isin_id__in=batch).exclude(isin_id__in=list(documents)).delete()
+            written += len(documents)
+
+        logger.info(f"Rebuilt {written} bond snapshot documents in {time.perf_counter() - started:.2f}s")
+        return written
+
+    @classmethod
+    def rebuild_stale(cls):
+        """Rebuild stale documents and create missing ones."""
+        stale = BondSnapshotDocument.objects.filter(stale=True).values_list("isin_id", flat=True)
+        missing = (
+            ISINCompanyMap.objects.filter(primary_company=True, isin__snapshot_document__isnull=True)
+            .values_list("isin_id", flat=True)
+        )
+        return cls.rebuild(set(stale) | set(missing))
+
+    @classmethod
+    def get(cls, isin_code):
+        """The snapshot document for `isin_code`, built on the spot if missing or stale. None if unmapped."""
+        document = (
+            BondSnapshotDocument.objects.filter(isin_id=isin_code, stale=False)
+            .values_list("document", flat=True)
+            .first()
+        )
+        if document is None and cls.rebuild([isin_code]):
+            document = BondSnapshotDocument.objects.values_list("document", flat=True).get(isin_id=isin_code)
+        return document
+
+    # ---- Invalidation ----
+
+    @classmethod
+    def mark_stale(cls, isin_codes=None, company_ids=None):
+        """Flag documents of the given ISINs / companies stale (every document when both are None)."""
+        documents = BondSnapshotDocument.objects.filter(stale=False)
+        if isin_codes is not None:
+            documents = documents.filter(isin_id__in=isin_codes)
+        if company_ids is not None:
+            documents = documents.filter(company_id__in=company_ids)
+        return documents.update(stale=True)
@@ -0,0 +1,94 @@
+from django.db import router, transaction
+from django.db.models import Q
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.bonds.services.bulk_sql_service import BulkSQLService
+from apps.bonds.services.yield_curve_service import YieldCurveService, MAX_YTM
+from decimal import Decimal
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondSpreadService:
+    """
+    Maintains ISINBasicInfo.gsec_spread_bps / rating_spread_bps.
+
+    One pass over the live universe: YieldCurveService.evaluate_universe()
+    gives every bond's sovereign and rating-bucket curve yield at its own
+    tenure, the spreads are (ytm - curve) in basis points, and only rows
+    whose stored spreads differ are written. The rating curve is fitted on
+    per-tenure medians, so rating_spread_bps is the spread over the
+    bucket's (smoothed) median at the same tenure. Bonds that left the live
+    universe, or have no plausible YTM, get NULL spreads.
+
+    Both columns are indexed, so BondFilter's spread filters and ordering
+    are plain index range scans.
+    """
+
+    FIELDS = ("gsec_spread_bps", "rating_spread_bps")
+    # numeric(8, 2)
+    LIMIT = 999_999
+
+    @classmethod
+    def compute(cls, universe):
+        """{isin_code: (gsec_spread_bps, rating_spread_bps)} for the universe arrays."""
+        with np.errstate(invalid="ignore"):
+            spreads = np.round(
+                np.stack([universe["ytm"] - universe["sovereign"], universe["ytm"] - universe["rating_curve"]], axis=1) * 100.0,
+                2,
+            )
+        # YTMs the curves treat as bad data get no spread either
+        ytm = universe["ytm"]
+        spreads[~((ytm > 0) & (ytm <= MAX_YTM))] = np.nan
+        spreads[~np.isfinite(spreads) | (np.abs(spreads) > cls.LIMIT)] = np.nan
+        return {
+            # Decimals as numeric(8, 2) holds them, so they compare equal to stored values
+            code: tuple(None if np.isnan(value) else Decimal(f"{value:.2f}") for value in row)
+            for code, row in zip(universe["isin_code"], spreads)
+        }
+
+    @classmethod
+    def refresh(cls, batch_size=2000):
+        """Recompute every spread and persist the changes. Returns a summary."""
+        started = time.perf_counter()
+        universe = YieldCurveService.evaluate_universe()
+        values = cls.compute(universe)
+        computed = time.perf_counter()
+
+        stored = {
+            code: (gsec, rating)
+            for code, gsec, rating in ISINBasicInfo.objects.filter(
+                Q(gsec_spread_bps__isnull=False) | Q(rating_spread_bps__isnull=False)
+            ).values_list("isin_code", *cls.FIELDS)
+        }
+        changed = {
+            code: dict(zip(cls.FIELDS, spreads))
+            for code, spreads in values.items()
+            if stored.get(code, (None, None)) != spreads
+        }
+        for code in stored.keys() - values.keys():
+            changed[code] = dict.fromkeys(cls.FIELDS)
+
+        with transaction.atomic(using=router.db_for_write(ISINBasicInfo)):
+            updated = BulkSQLService.bulk_update_values(ISINBasicInfo, changed, cls.FIELDS, batch_size=batch_size)
+        if changed:
+            BondDataVersion.bump(list(changed) if len(changed) <= BondETLLoader.MAX_JOURNALLED_CHANGES else None)
+
+        finished = time.perf_counter()
+        priced = sum(1 for spreads in values.values() if spreads[0] is not None)
+        logger.info(
+            f"Bond spreads: {len(values)} bonds ({priced} with a G-sec spread), compute {computed - started:.2f}s, "
+            f"write {finished - computed:.2f}s, updated {updated}"
+        )
+        return {
+            "bonds": len(values),
+            "priced": priced,
+            "updated": updated,
+            "compute_seconds": round(computed - started, 3),
+            "write_seconds": round(finished - computed, 3),
+        }
+
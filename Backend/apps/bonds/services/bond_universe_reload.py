@@ -0,0 +1,531 @@
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connections, router, transaction
+from django.utils import timezone
+from apps.bonds.models import DataTransformationLog, ISINBasicInfo, ISINDetailedInfo, ISINRating
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.bonds.services.bond_snapshot_service import BondSnapshotService
+from apps.bonds.services.current_rating_service import CurrentRatingService
+from apps.bonds.utils import get_rating_rank, UNRATED_RANK
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import csv
+import io
+import re
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = "__shadow"
+
+
+def shadow_name(name):
+    """Shadow table / index / constraint name for `name`, within Postgres' 63 characters."""
+    return name[:63 - len(SHADOW_SUFFIX)] + SHADOW_SUFFIX
+
+
+def unquote(name):
+    return name.strip('"')
+
+
+def load_shadow_partition(table, path, partition, partitions, rating_table):
+    """
+    Load one partition of `path` into the shadow of `table`.
+    Module level so ProcessPoolExecutor can pickle it.
+    """
+    try:
+        loader = ShadowPartitionLoader(
+            BondUniverseReloader.MODELS[table], partition, partitions, rating_table=rating_table
+        )
+        return loader.load(path)
+    finally:
+        connections.close_all()
+
+
+class ShadowPartitionLoader(BondETLLoader):
+    """
+    Loads the records of one ISIN-prefix partition of a source file into a
+    shadow table with a plain COPY: the shadow has no indexes yet and
+    nothing reads it, so there is nothing to diff against.
+
+    Records are normalized and hashed like BondETLLoader does, so the
+    reloaded rows carry a data_hash the next incremental load can diff
+    against. Duplicate records (same ISIN, or same ISIN / agency / date for
+    ratings) keep the last one. isin_basic_info rows get their current_*
+    rating columns from the (shadow) rating table here, so the reload never
+    has to UPDATE the freshly loaded table.
+    """
+
+    PREFIX_LENGTH = 9  # country, issuer and security type codes, e.g. "INE002A08"
+
+    def __init__(self, model, partition, partitions, rating_table=None, chunk_size=None):
+        self.model = model
+        self.key = model._meta.get_field("isin_code" if model is ISINBasicInfo else "isin")
+        self.columns = None
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.using = router.db_for_write(model)
+        self.connection = connections[self.using]
+        self.fields = self.source_fields(model)
+        self.shadow = shadow_name(model._meta.db_table)
+        self.partition = partition
+        self.partitions = partitions
+        self.rating_table = rating_table
+        unique = model._meta.unique_together[0] if model._meta.unique_together else (self.key.name,)
+        self.unique = [model._meta.get_field(name).attname for name in unique]
+        self.has_hash = any(field.name == self.HASH_FIELD for field in model._meta.concrete_fields)
+
+    @classmethod
+    def partition_of(cls, isin_code, partitions):
+        return zlib.crc32(isin_code[:cls.PREFIX_LENGTH].encode("utf-8")) % partitions
+
+    def load(self, path):
+        started_at = timezone.now()
+        started = time.perf_counter()
+        log = DataTransformationLog.objects.create(
+            operation_type="RELOAD",
+            source_table=f"{Path(path).name} [{self.partition + 1}/{self.partitions}]",
+            target_table=self.shadow,
+            started_at=started_at,
+        )
+        counts = {"processed": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        errors = []
+        try:
+            rows = {}
+            fields = converters = None
+            for number, record in enumerate(self.read_records(path), start=1):
+                if fields is None:
+                    fields = self.resolve_columns(record)
+                    converters = [(field.name, field.attname, self.converter(field)) for field in fields]
+                isin_code = str(record.get(self.key.name, record.get(self.key.attname)) or "").strip()
+                # Records without an ISIN are counted (as failed) by the first partition only
+                if self.partition_of(isin_code, self.partitions) != self.partition:
+                    continue
+                counts["processed"] += 1
+                try:
+                    row = self.normalize(record, converters)
+                except (ValidationError, ValueError, TypeError) as e:
+                    row = None
+                    if len(errors) < 50:
+                        errors.append(f"record {number}: {e}")
+                if row is None or not row[self.key.attname]:
+                    counts["failed"] += 1
+                    continue
+                unique = tuple(row[attname] for attname in self.unique)
+                if unique in rows:
+                    counts["skipped"] += 1
+                rows[unique] = row
+
+            if rows:
+                defaults = self.insert_defaults(fields)
+                with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+                    rows = list(rows.values())
+                    # One pass over the (unindexed) shadow ratings for the whole partition
+                    ratings = (
+                        self.current_ratings(cursor, [row[self.key.attname] for row in rows])
+                        if self.model is ISINBasicInfo and self.rating_table else None
+                    )
+                    for start in range(0, len(rows), self.chunk_size):
+                        counts["inserted"] += self.copy(cursor, rows[start:start + self.chunk_size], defaults, ratings)
+        except Exception as e:
+            log.status = "FAILED"
+            log.error_details = str(e)
+            self.finish(log, counts, started)
+            raise
+
+        log.status = "SUCCESS"
+        log.error_details = "\n".join(errors) or None
+        self.finish(log, counts, started)
+        counts["log_id"] = log.pk
+        return counts
+
+    def current_ratings(self, cursor, isin_codes):
+        """{isin: current_* columns} from the latest rating of each ISIN, as CurrentRatingService picks it."""
+        qn = self.connection.ops.quote_name
+        cursor.execute(
+            f"SELECT DISTINCT ON (isin_id) isin_id, credit_rating, rating_agency, rating_date "
+            f"FROM {qn(self.rating_table)} WHERE isin_id = ANY(%s) "
+            f"ORDER BY isin_id, rating_date DESC NULLS LAST, id DESC",
+            [isin_codes],
+        )
+        return {
+            isin_code: {
+                "current_rating": rating,
+                "current_rating_agency": agency,
+                "current_rating_date": rating_date,
+                "current_rating_rank": get_rating_rank(rating),
+            }
+            for isin_code, rating, agency, rating_date in cursor.fetchall()
+        }
+
+    def copy(self, cursor, rows, defaults, ratings=None):
+        now = timezone.now()
+        extra = {field.attname: now for field in self.model._meta.concrete_fields
+                 if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)}
+        unrated = {
+            "current_rating": None, "current_rating_agency": None,
+            "current_rating_date": None, "current_rating_rank": UNRATED_RANK,
+        }
+
+        columns = None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            values = {**defaults, **row, **extra}
+            if self.has_hash:
+                values[self.HASH_FIELD] = self.data_hash(row)
+            if ratings is not None:
+                values.update(ratings.get(row[self.key.attname], unrated))
+            if columns is None:
+                columns = list(values)
+            writer.writerow([self.copy_value(values[column]) for column in columns])
+        buffer.seek(0)
+
+        qn = self.connection.ops.quote_name
+        cursor.copy_expert(
+            f"COPY {qn(self.shadow)} ({', '.join(qn(column) for column in columns)}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '{self.NULL}')",
+            buffer,
+        )
+        return len(rows)
+
+
+class BondUniverseReloader:
+    """
+    Full reload of isin_basic_info / isin_rating / isin_detailed_info
+    through shadow tables, for days when upstream changes wholesale and
+    row-level upserts would rewrite (and bloat) the live tables under traffic.
+
+    1. create an empty, index-less shadow of each table (CREATE TABLE LIKE)
+    2. COPY the sources in, one worker process per ISIN-prefix partition
+       (ratings first, so isin_basic_info gets its current_* columns at load)
+    3. drop shadow rows with unknown foreign keys, then check the shadow row
+       counts against the workers' DataTransformationLog rows
+    4. build the live tables' indexes and constraints on the shadows, ANALYZE
+    5. swap: one short transaction that drops the live tables and renames the
+       shadows (and their indexes / constraints) into place
+    6. re-point foreign keys of other tables (isin_company_map, ...) at the
+       new tables NOT VALID in the swap, and VALIDATE them after it
+
+    Readers see either the old universe or the new one. Rows of other tables
+    that reference ISINs missing from the new universe block the swap unless
+    `prune` deletes them (what ON DELETE CASCADE would do), and a universe
+    that shrank below `min_row_ratio` of the live row count is refused.
+    """
+
+    # Load order: ratings before basic info (current_* columns), detailed info last
+    MODELS = {model._meta.db_table: model for model in (ISINRating, ISINBasicInfo, ISINDetailedInfo)}
+    MIN_ROW_RATIO = 0.5
+    LOCK_TIMEOUT = "5s"
+    SWAP_ATTEMPTS = 3
+    INDEX_DEF = re.compile(r"^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON (?:ONLY )?)(\S+)( USING .*)$")
+    REFERENCES = re.compile(r"REFERENCES (\S+?)\(")
+
+    def __init__(self, sources, workers=1, prune=False, min_row_ratio=None):
+        unknown = set(sources) - set(self.MODELS)
+        if unknown:
+            raise ValueError(f"Cannot reload {sorted(unknown)}; expected some of {sorted(self.MODELS)}")
+        self.sources = {table: sources[table] for table in self.MODELS if table in sources}
+        self.workers = max(1, workers)
+        self.prune = prune
+        self.min_row_ratio = self.MIN_ROW_RATIO if min_row_ratio is None else min_row_ratio
+        self.using = router.db_for_write(ISINBasicInfo)
+        self.connection = connections[self.using]
+        self.qn = self.connection.ops.quote_name
+
+    # ---- Catalog ----
+
+    def fetch(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def execute(self, *statements):
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def structure(self, table):
+        """Indexes, constraints and identity sequences of live `table`, as rebuilt on its shadow."""
+        constraints = self.fetch(
+            """
+            SELECT c.conname, c.contype, pg_get_constraintdef(c.oid), a.attname,
+                   c.confrelid::regclass::text, fa.attname
+            FROM pg_constraint AS c
+            LEFT JOIN pg_attribute AS a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            LEFT JOIN pg_attribute AS fa ON fa.attrelid = c.confrelid AND fa.attnum = c.confkey[1]
+            WHERE c.conrelid = %s::regclass AND c.contype IN ('p', 'u', 'f', 'x')
+            ORDER BY c.contype DESC, c.conname
+            """,
+            [table],
+        )
+        indexes = self.fetch(
+            """
+            SELECT i.relname, pg_get_indexdef(x.indexrelid)
+            FROM pg_index AS x
+            JOIN pg_class AS i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint AS c WHERE c.conindid = x.indexrelid AND c.conrelid = x.indrelid)
+            ORDER BY i.relname
+            """,
+            [table],
+        )
+        referencing = self.fetch(
+            """
+            SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid), a.attname, fa.attname
+            FROM pg_constraint AS c
+            JOIN pg_attribute AS a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            JOIN pg_attribute AS fa ON fa.attrelid = c.confrelid AND fa.attnum = c.confkey[1]
+            WHERE c.contype = 'f' AND c.confrelid = %s::regclass AND c.conrelid <> c.confrelid
+            ORDER BY 1, 2
+            """,
+            [table],
+        )
+        sequences = self.fetch(
+            """
+            SELECT attname, pg_get_serial_sequence(%s, attname)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attidentity <> '' AND NOT attisdropped
+            """,
+            [table, table],
+        )
+        return {
+            "constraints": [(name, contype, definition, column, unquote(referenced), referenced_column)
+                            for name, contype, definition, column, referenced, referenced_column in constraints],
+            "indexes": indexes,
+            # Foreign keys of tables that are not reloaded themselves
+            "referencing": [(unquote(referencing), *rest) for referencing, *rest in referencing
+                            if unquote(referencing) not in self.sources],
+            "sequences": [(column, unquote(sequence.rsplit(".", 1)[-1])) for column, sequence in sequences],
+        }
+
+    def target(self, table):
+        """The table a reloaded row should reference: the shadow when `table` is reloaded too."""
+        return shadow_name(table) if table in self.sources else table
+
+    # ---- Run ----
+
+    def reload(self):
+        started = time.perf_counter()
+        log = DataTransformationLog.objects.create(
+            operation_type="ETL",
+            source_table="full reload: " + ", ".join(Path(path).name for path in self.sources.values()),
+            target_table=", ".join(self.sources),
+            started_at=timezone.now(),
+        )
+        counts = {"processed": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        timings = {}
+        try:
+            self.structures = {table: self.structure(table) for table in self.sources}
+            self.create_shadows()
+            timings["load"] = self.timed(self.load_shadows, counts)
+            timings["validate"] = self.timed(self.validate, counts)
+            timings["index"] = self.timed(self.build_indexes)
+            timings["references"] = self.timed(self.check_references)
+            timings["swap"] = self.timed(self.swap)
+        except Exception as e:
+            self.drop_shadows()
+            log.status = "FAILED"
+            log.error_details = str(e)
+            BondETLLoader.finish(log, counts, started)
+            raise
+
+        self.validate_foreign_keys()
+        BondDataVersion.bump()
+        if ISINRating._meta.db_table in self.sources and ISINBasicInfo._meta.db_table not in self.sources:
+            CurrentRatingService.rebuild()
+        BondSnapshotService.mark_stale()
+
+        log.status = "SUCCESS"
+        BondETLLoader.finish(log, counts, started)
+        counts["timings"] = timings
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Reloaded {', '.join(self.sources)}: {counts}")
+        return counts
+
+    @staticmethod
+    def timed(step, *args):
+        started = time.perf_counter()
+        step(*args)
+        return round(time.perf_counter() - started, 3)
+
+    def create_shadows(self):
+        for table in self.sources:
+            shadow = self.qn(shadow_name(table))
+            self.execute(
+                f"DROP TABLE IF EXISTS {shadow}",
+                # No INCLUDING INDEXES: indexes are built once the data is in
+                f"CREATE TABLE {shadow} (LIKE {self.qn(table)} INCLUDING DEFAULTS INCLUDING GENERATED "
+                f"INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE)",
+            )
+
+    def drop_shadows(self):
+        try:
+            self.execute(*(f"DROP TABLE IF EXISTS {self.qn(shadow_name(table))} CASCADE" for table in self.sources))
+        except Exception:
+            logger.exception("Could not drop the shadow tables of a failed reload")
+
+    def load_shadows(self, counts):
+        rating_table = self.target(ISINRating._meta.db_table)
+        self.log_ids = {}
+        # Forked workers must not share the parent's connection
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for table, path in self.sources.items():
+                jobs = [(table, str(path), partition, self.workers, rating_table) for partition in range(self.workers)]
+                if pool:
+                    results = list(pool.map(load_shadow_partition, *zip(*jobs)))
+                else:
+                    results = [load_shadow_partition(*job) for job in jobs]
+                self.log_ids[table] = [result["log_id"] for result in results]
+                for result in results:
+                    for name in counts:
+                        counts[name] += result[name]
+        finally:
+            if pool:
+                pool.shutdown()
+
+    def validate(self, counts):
+        """Drop rows with unknown foreign keys, then check the shadows against the workers' logs."""
+        orphans = dict.fromkeys(self.sources, 0)
+        for table in self.sources:
+            shadow = self.qn(shadow_name(table))
+            for _, contype, _, column, referenced, referenced_column in self.structures[table]["constraints"]:
+                if contype != "f":
+                    continue
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {shadow} AS s WHERE s.{self.qn(column)} IS NOT NULL AND NOT EXISTS "
+                        f"(SELECT 1 FROM {self.qn(self.target(referenced))} AS r "
+                        f"WHERE r.{self.qn(referenced_column)} = s.{self.qn(column)})"
+                    )
+                    dropped = cursor.rowcount
+                if dropped:
+                    logger.warning(f"Reload {table}: dropped {dropped} rows with an unknown {column}")
+                    orphans[table] += dropped
+                    counts["inserted"] -= dropped
+                    counts["failed"] += dropped
+
+        for table in self.sources:
+            logs = DataTransformationLog.objects.filter(pk__in=self.log_ids[table])
+            if logs.exclude(status="SUCCESS").exists() or logs.count() != self.workers:
+                raise ValueError(f"Reload {table}: a partition load did not succeed")
+            [(loaded,)] = self.fetch(f"SELECT COUNT(*) FROM {self.qn(shadow_name(table))}")
+            [(live,)] = self.fetch(f"SELECT COUNT(*) FROM {self.qn(table)}")
+            expected = sum(logs.values_list("records_success", flat=True)) - orphans[table]
+            if loaded != expected:
+                raise ValueError(f"Reload {table}: shadow has {loaded} rows, the partition logs account for {expected}")
+            if live and loaded < live * self.min_row_ratio:
+                raise ValueError(
+                    f"Reload {table}: {loaded} rows would replace {live}, below the "
+                    f"{self.min_row_ratio:.0%} minimum; refusing to swap"
+                )
+            logger.info(f"Reload {table}: {loaded} rows in the shadow, {live} live")
+
+    def build_indexes(self):
+        # Keys first: the shadows' foreign keys need the referenced shadow's primary key
+        keys, foreign_keys, indexes = [], [], []
+        for table, structure in self.structures.items():
+            shadow = self.qn(shadow_name(table))
+            for name, contype, definition, _, referenced, _ in structure["constraints"]:
+                if contype == "f":
+                    definition = self.REFERENCES.sub(
+                        lambda match: f"REFERENCES {self.qn(self.target(unquote(match.group(1))))}(", definition
+                    )
+                    # A live referenced table is validated against after the swap
+                    if referenced not in self.sources:
+                        definition += " NOT VALID"
+                (foreign_keys if contype == "f" else keys).append(
+                    f"ALTER TABLE {shadow} ADD CONSTRAINT {self.qn(shadow_name(name))} {definition}"
+                )
+            for name, definition in structure["indexes"]:
+                match = self.INDEX_DEF.match(definition)
+                if match is None:
+                    raise ValueError(f"Cannot rebuild index {name}: {definition}")
+                indexes.append(f"{match.group(1)}{self.qn(shadow_name(name))}{match.group(3)}{shadow}{match.group(5)}")
+        self.execute(*keys, *foreign_keys, *indexes)
+        self.execute(*(f"ANALYZE {self.qn(shadow_name(table))}" for table in self.sources))
+
+    def check_references(self):
+        """Rows of other tables pointing at ISINs the new universe lacks: prune them or refuse to swap."""
+        for table in self.sources:
+            for referencing, name, _, column, referenced_column in self.structures[table]["referencing"]:
+                condition = (
+                    f"FROM {self.qn(referencing)} AS s WHERE s.{self.qn(column)} IS NOT NULL "
+                    f"AND NOT EXISTS (SELECT 1 FROM {self.qn(shadow_name(table))} AS r "
+                    f"WHERE r.{self.qn(referenced_column)} = s.{self.qn(column)})"
+                )
+                if self.prune:
+                    with self.connection.cursor() as cursor:
+                        cursor.execute(f"DELETE {condition}")
+                        if cursor.rowcount:
+                            logger.warning(f"Reload {table}: pruned {cursor.rowcount} {referencing} rows")
+                    continue
+                [(dangling,)] = self.fetch(f"SELECT COUNT(*) {condition}")
+                if dangling:
+                    raise ValueError(
+                        f"Reload {table}: {dangling} {referencing} rows reference ISINs missing from the "
+                        f"new universe; rerun with prune to delete them"
+                    )
+
+    def swap(self):
+        live = [self.qn(table) for table in self.sources]
+        referencing = sorted({
+            self.qn(row[0]) for structure in self.structures.values() for row in structure["referencing"]
+        })
+        statements = [
+            f"SET LOCAL lock_timeout = '{self.LOCK_TIMEOUT}'",
+            f"LOCK TABLE {', '.join(live + referencing)} IN ACCESS EXCLUSIVE MODE",
+        ]
+        for structure in self.structures.values():
+            for table, name, _, _, _ in structure["referencing"]:
+                statements.append(f"ALTER TABLE {self.qn(table)} DROP CONSTRAINT {self.qn(name)}")
+        statements.append(f"DROP TABLE {', '.join(live)}")
+        for table, structure in self.structures.items():
+            shadow = shadow_name(table)
+            statements.append(f"ALTER TABLE {self.qn(shadow)} RENAME TO {self.qn(table)}")
+            for name, *_ in structure["constraints"]:
+                statements.append(
+                    f"ALTER TABLE {self.qn(table)} RENAME CONSTRAINT {self.qn(shadow_name(name))} TO {self.qn(name)}"
+                )
+            for name, _ in structure["indexes"]:
+                statements.append(f"ALTER INDEX {self.qn(shadow_name(name))} RENAME TO {self.qn(name)}")
+            for column, sequence in structure["sequences"]:
+                [(shadow_sequence,)] = self.fetch("SELECT pg_get_serial_sequence(%s, %s)", [self.qn(shadow), column])
+                statements.append(f"ALTER SEQUENCE {shadow_sequence} RENAME TO {self.qn(sequence)}")
+        for structure in self.structures.values():
+            for table, name, definition, _, _ in structure["referencing"]:
+                statements.append(
+                    f"ALTER TABLE {self.qn(table)} ADD CONSTRAINT {self.qn(name)} {definition} NOT VALID"
+                )
+
+        for attempt in range(1, self.SWAP_ATTEMPTS + 1):
+            try:
+                with transaction.atomic(using=self.using):
+                    self.execute(*statements)
+                return
+            except OperationalError as e:
+                # lock_not_available: a long reader holds the tables, let it finish
+                if getattr(e.__cause__, "pgcode", None) != "55P03" or attempt == self.SWAP_ATTEMPTS:
+                    raise
+                logger.warning(f"Reload swap could not lock the live tables (attempt {attempt}), retrying")
+                time.sleep(attempt)
+
+    def validate_foreign_keys(self):
+        """VALIDATE the NOT VALID foreign keys; this only takes a SHARE UPDATE EXCLUSIVE lock."""
+        pending = [
+            (table, name)
+            for table, structure in self.structures.items()
+            for name, contype, _, _, referenced, _ in structure["constraints"]
+            if contype == "f" and referenced not in self.sources
+        ] + [
+            (row[0], row[1]) for structure in self.structures.values() for row in structure["referencing"]
+        ]
+        for table, name in pending:
+            try:
+                self.execute(f"ALTER TABLE {self.qn(table)} VALIDATE CONSTRAINT {self.qn(name)}")
+            except Exception as e:
+                # Still enforced for new rows; a later VALIDATE can finish the job
+                logger.warning(f"Reload: could not validate {table}.{name}: {e}")
@@ -0,0 +1,287 @@
+from django.db import connections
+from django.db.models import Value
+from django.db.models.expressions import OrderBy, F
+from django.core.exceptions import ValidationError
+from apps.bonds.models import ISINBasicInfo
+from apps.bonds.filters import CaseInsensitiveChoiceBaseFilter, tenure_cutoff_date, validate_rating
+from apps.bonds.utils import RATING_ORDER, INVESTMENT_GRADE_THRESHOLD
+from apps.bonds.services.bond_data_version import BondDataVersion
+import numpy as np
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BondUniverseSnapshot:
+    """
+    In-process columnar copy of the active bond universe.
+
+    Each worker keeps the active ISINBasicInfo rows as NumPy arrays (numeric
+    columns as float64 with NaN for NULL, dates as ordinals, categoricals as
+    integer codes) and evaluates BondFilter, ordering and skip/take as
+    vectorized masks + lexsort. Only the page's rows are then loaded from the
+    database by primary key.
+
+    The snapshot is tagged with the BondDataVersion it was built from. When
+    the global version moves on, `current()` returns None (callers fall back
+    to SQL) and a rebuild is started in the background.
+
+    `query()` returns None for anything it cannot evaluate exactly the way
+    the SQL path would (unknown filter, invalid value, unsupported ordering),
+    so the SQL path stays the source of truth for errors and edge cases.
+    """
+
+    NUMERIC_FIELDS = ("ytm_percent", "coupon_rate_percent", "face_value_rs", "gsec_spread_bps", "rating_spread_bps", "ytw_percent")
+    DATE_FIELDS = ("maturity_date", "issue_date")
+    CATEGORICAL_FIELDS = ("issuer_type", "tax_category", "interest_payment_frequency", "option_type", "current_rating")
+    FLAG_FIELDS = {
+        "secured": "secured",
+        "call_option": "detailed_info__call_option",
+        "put_option": "detailed_info__put_option",
+    }
+
+    _current = None
+    _lock = threading.Lock()
+    _rebuilding = False
+
+    def __init__(self, version, isin_codes, columns, categories):
+        self.version = version
+        self.built_at = time.time()
+        self.isin_codes = isin_codes
+        self.columns = columns
+        self.categories = categories
+        self.size = len(isin_codes)
+        self._orders = {}
+
+    # ---- Lifecycle ----
+
+    @classmethod
+    def build(cls):
+        # Read the version first: a write during the load leaves the new
+        # snapshot already stale rather than wrongly fresh.
+        version = BondDataVersion.get()
+        started = time.perf_counter()
+
+        value_fields = (
+            ["isin_code", "current_rating_rank"]
+            + list(cls.NUMERIC_FIELDS) + list(cls.DATE_FIELDS)
+            + list(cls.CATEGORICAL_FIELDS) + list(cls.FLAG_FIELDS.values())
+        )
+        rows = list(
+            ISINBasicInfo.objects.filter(isin_active=True)
+            .order_by("isin_code")
+            .values_list(*value_fields)
+        )
+        by_field = dict(zip(value_fields, zip(*rows))) if rows else {f: () for f in value_fields}
+
+        columns = {
+            "current_rating_rank": np.array(by_field["current_rating_rank"], dtype=np.float64),
+            # rows are read in isin_code order, so the row index is the tie-break rank
+            "isin_code": np.arange(len(rows), dtype=np.float64),
+        }
+        for field in cls.NUMERIC_FIELDS:
+            columns[field] = np.array([np.nan if v is None else float(v) for v in by_field[field]], dtype=np.float64)
+        for field in cls.DATE_FIELDS:
+            columns[field] = np.array([np.nan if v is None else v.toordinal() for v in by_field[field]], dtype=np.float64)
+        for name, field in cls.FLAG_FIELDS.items():
+            columns[name] = np.array([-1 if v is None else int(v) for v in by_field[field]], dtype=np.int8)
+
+        categories = {}
+        for field in cls.CATEGORICAL_FIELDS:
+            # Categorical filters are iexact, so codes are built on upper-cased values
+            labels = {}
+            codes = np.empty(len(rows), dtype=np.int32)
+            for i, v in enumerate(by_field[field]):
+                key = None if v is None else str(v).upper()
+                codes[i] = labels.setdefault(key, len(labels))
+            columns[field] = codes
+            categories[field] = labels
+
+        snapshot = cls(version, np.array(by_field["isin_code"], dtype=object), columns, categories)
+        logger.info(f"Built bond universe snapshot v{version}: {snapshot.size} bonds in {time.perf_counter() - started:.2f}s")
+        return snapshot
+
+    @classmethod
+    def rebuild(cls):
+        snapshot = cls.build()
+        cls._current = snapshot
+        return snapshot
+
+    @classmethod
+    def current(cls, refresh=True):
+        """The snapshot if it matches the global data version, else None."""
+        snapshot = cls._current
+        if snapshot is not None:
+            version = BondDataVersion.get()
+            if snapshot.version == version:
+                return snapshot
+            # Writes that touched no bond rows (research data, mappings) keep it valid
+            if BondDataVersion.changes_since(snapshot.version, version) == set():
+                snapshot.version = version
+                return snapshot
+        if refresh:
+            cls.refresh_async()
+        return None
+
+    @classmethod
+    def refresh_async(cls):
+        with cls._lock:
+            if cls._rebuilding:
+                return
+            cls._rebuilding = True
+        threading.Thread(target=cls._rebuild_in_background, daemon=True).start()
+
+    @classmethod
+    def _rebuild_in_background(cls):
+        try:
+            cls.rebuild()
+        except Exception:
+            logger.exception("Bond universe snapshot rebuild failed")
+        finally:
+            connections.close_all()
+            cls._rebuilding = False
+
+    # ---- Query ----
+
+    def query(self, filterset, ordering):
+        """
+        Ordered isin codes matching a bound BondFilter, or None if the
+        filters / ordering cannot be evaluated on the snapshot.
+        """
+        if not filterset.is_valid():
+            return None
+        mask = self.columns["maturity_date"] >= tenure_cutoff_date(0, round_up=True).toordinal()
+        try:
+            for name, value in filterset.form.cleaned_data.items():
+                if value in (None, "") or (name == "investment_grade_only" and not value):
+                    continue
+                condition = self.evaluate(filterset.filters[name], value)
+                if condition is None:
+                    return None
+                mask &= condition
+        except ValidationError:
+            return None
+
+        keys = self.sort_keys(ordering)
+        if keys is None:
+            return None
+        order = self.sorted_index(keys)
+        return self.isin_codes[order[mask[order]]]
+
+    def evaluate(self, filter_, value):
+        method = filter_.method
+        if method == "filter_tenure_year_min":
+            if value < 0:
+                return None
+            return self.columns["maturity_date"] >= tenure_cutoff_date(value, round_up=True).toordinal()
+        if method == "filter_tenure_year_max":
+            if value < 0:
+                return None
+            return self.columns["maturity_date"] <= tenure_cutoff_date(value, round_up=False).toordinal()
+        if method == "filter_rating_min":
+            return self.columns["current_rating_rank"] <= RATING_ORDER[validate_rating(value)]
+        if method == "filter_rating_max":
+            return self.columns["current_rating_rank"] >= RATING_ORDER[validate_rating(value)]
+        if method == "filter_investment_grade":
+            return self.columns["current_rating_rank"] <= INVESTMENT_GRADE_THRESHOLD
+        if method == "filter_has_option":
+            call, put = self.columns["call_option"], self.columns["put_option"]
+            return (call == 1) | (put == 1) if value else (call == 0) & (put == 0)
+        if method is not None:
+            return None
+
+        field = filter_.field_name
+        if isinstance(filter_, CaseInsensitiveChoiceBaseFilter) and field in self.categories:
+            return self.evaluate_choice(filter_, value)
+        if field in self.FLAG_FIELDS and filter_.lookup_expr == "exact":
+            return self.columns[field] == int(value)
+        if field in self.NUMERIC_FIELDS:
+            column = self.columns[field]
+            if filter_.lookup_expr == "gte":
+                return column >= float(value)
+            if filter_.lookup_expr == "lte":
+                return column <= float(value)
+        return None
+
+    def evaluate_choice(self, filter_, value):
+        """Mirror of CaseInsensitiveChoiceBaseFilter.filter on category codes."""
+        values = [v.strip() for v in str(value).split(",")] if filter_.allow_multiple else [str(value).strip()]
+        wanted = {v.upper() for v in values}
+        if filter_.strict_validation and filter_.valid_choices and not wanted <= set(filter_.valid_choices):
+            return None
+        if "UNRATED" in wanted:
+            wanted |= {None, ""}
+
+        labels = self.categories[filter_.field_name]
+        codes = [labels[v] for v in wanted if v in labels]
+        return np.isin(self.columns[filter_.field_name], codes)
+
+    def sort_keys(self, ordering):
+        """
+        Normalize a queryset's order_by into (column, descending, nulls_last)
+        keys, keeping Postgres NULL placement. None if a key is unsupported.
+        """
+        keys = []
+        for item in ordering:
+            if isinstance(item, str):
+                name, descending, nulls_last = item.lstrip("-"), item.startswith("-"), None
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                name, descending = item.expression.name, item.descending
+                nulls_last = True if item.nulls_last else False if item.nulls_first else None
+            elif isinstance(item, Value):
+                continue
+            else:
+                return None
+            if name == "priority":
+                continue  # constant unless isin / issuer_name is given (SQL path)
+            if name not in self.columns or name in self.categories:
+                return None
+            if nulls_last is None:
+                nulls_last = not descending
+            keys.append((name, descending, nulls_last))
+            if name == "isin_code":
+                break
+        return tuple(keys)
+
+    def sorted_index(self, keys):
+        """
+        Permutation of the whole universe for an ordering, computed once per
+        snapshot. Filtering then keeps that order with a single mask gather,
+        so requests never sort.
+        """
+        order = self._orders.get(keys)
+        if order is None:
+            lexsort_keys = []
+            for name, descending, nulls_last in reversed(keys):  # lexsort wants the primary key last
+                column = self.columns[name]
+                nulls = np.isnan(column)
+                values = np.where(nulls, 0.0, column)
+                lexsort_keys.append(-values if descending else values)
+                lexsort_keys.append(nulls if nulls_last else ~nulls)
+            order = np.lexsort(lexsort_keys) if lexsort_keys else np.arange(self.size)
+            self._orders[keys] = order
+        return order
+
+
+class SnapshotPage:
+    """
+    Sequence handed to the paginator: len() is the match count and slicing
+    loads just that page from the database, in snapshot order.
+    """
+
+    def __init__(self, queryset, isin_codes):
+        self.queryset = queryset
+        self.isin_codes = isin_codes
+
+    def __len__(self):
+        return len(self.isin_codes)
+
+    def count(self):
+        return len(self.isin_codes)
+
+    def __getitem__(self, item):
+        codes = list(self.isin_codes[item])
+        rows = {row.isin_code: row for row in self.queryset.filter(isin_code__in=codes)}
+        return [rows[code] for code in codes if code in rows]
@@ -0,0 +1,83 @@
+from django.db import connections, router
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BulkSQLService:
+    """
+    Set-based write helpers for large batch jobs on Postgres.
+
+    Django's bulk_update emits one CASE WHEN branch per row and column,
+    which is quadratic per batch and costs ~1.5ms of Python per row; over
+    the whole universe that is minutes. These helpers send one
+    UPDATE ... FROM (VALUES ...) per batch instead.
+    """
+
+    @classmethod
+    def bulk_update_values(cls, model, rows, fields, batch_size=1000):
+        """
+        rows: {pk: {field: value}} - every row must carry all `fields`.
+        Returns the number of rows updated.
+        """
+        if not rows:
+            return 0
+        using = router.db_for_write(model)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        pk = model._meta.pk
+        columns = [model._meta.get_field(name) for name in fields]
+
+        assignments = ", ".join(
+            f"{qn(field.column)} = v.{qn(field.column)}::{field.db_type(connection)}" for field in columns
+        )
+        alias = ", ".join([qn(pk.column)] + [qn(field.column) for field in columns])
+        row_sql = "(" + ", ".join(["%s"] * (len(columns) + 1)) + ")"
+
+        keys = list(rows)
+        updated = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(keys), batch_size):
+                chunk = keys[start:start + batch_size]
+                params = []
+                for key in chunk:
+                    params.append(key)
+                    params.extend(rows[key][name] for name in fields)
+                cursor.execute(
+                    f"UPDATE {qn(model._meta.db_table)} AS t SET {assignments} "
+                    f"FROM (VALUES {', '.join([row_sql] * len(chunk))}) AS v({alias}) "
+                    f"WHERE t.{qn(pk.column)} = v.{qn(pk.column)}::{pk.db_type(connection)}",
+                    params,
+                )
+                updated += cursor.rowcount
+        return updated
+
+    @classmethod
+    def bulk_upsert_values(cls, model, rows, unique_fields, fields, batch_size=1000):
+        """
+        rows: [(unique field values..., field values...)] in the order of
+        `unique_fields` + `fields`. Inserts them, updating `fields` where a
+        row with the same unique fields exists.
+        Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        connection = connections[router.db_for_write(model)]
+        qn = connection.ops.quote_name
+        keys = [qn(model._meta.get_field(name).column) for name in unique_fields]
+        columns = [qn(model._meta.get_field(name).column) for name in fields]
+        assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+        row_sql = "(" + ", ".join(["%s"] * (len(keys) + len(columns))) + ")"
+
+        written = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                cursor.execute(
+                    f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(keys + columns)}) "
+                    f"VALUES {', '.join([row_sql] * len(chunk))} "
+                    f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {assignments}",
+                    [value for row in chunk for value in row],
+                )
+                written += cursor.rowcount
+        return written
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db import connections
+import math
+import random
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = ":lock"
+WAIT_INTERVAL = 0.05
+
+# How a cached_compute_with_status() call was served
+FRESH = "fresh"        # cached value within its ttl
+STALE = "stale"        # cached value past ttl (or early / other version); a refresh is running
+COMPUTED = "computed"  # fn() ran in this call
+WAITED = "waited"      # another caller computed it while this one waited
+
+
+def cached_compute(key, fn, ttl, stale_ttl=None, version=None, beta=1.0, background=True, lock_timeout=30):
+    """
+    Return the cached result of `fn()` under `key`, protected against stampedes.
+
+    - fresh for `ttl` seconds; after that the value is still served for up to
+      `stale_ttl` more seconds (default: ttl) while ONE worker recomputes it
+      (stale-while-revalidate). With background=True the refresh runs in a
+      daemon thread, so no request waits on it: `fn` must then only close
+      over plain values, not request / view state, and a refresh cut short
+      by a worker restart just leaves the lock to expire. With
+      background=False the caller that takes the lock recomputes inline.
+    - probabilistic early expiration (XFetch): each read may trigger the
+      refresh a little before expiry, with a probability that grows as expiry
+      nears and with how long `fn` took, so refreshes spread out instead of
+      landing on the same instant.
+    - cold key: a cache lock gives single-flight computation; other callers
+      wait for the value instead of running `fn` themselves.
+    - `version`: an entry stored under another version counts as expired, so
+      it is served stale while being recomputed (e.g. BondDataVersion).
+
+    Exceptions from `fn` propagate and nothing is stored.
+    """
+    return cached_compute_with_status(key, fn, ttl, stale_ttl, version, beta, background, lock_timeout)[0]
+
+
+def cached_compute_with_status(key, fn, ttl, stale_ttl=None, version=None, beta=1.0, background=True, lock_timeout=30):
+    """cached_compute(), returning (value, FRESH | STALE | COMPUTED | WAITED)."""
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+    entry = cache.get(key)
+
+    if entry is not None:
+        if not _needs_refresh(entry, version, beta):
+            return entry["value"], FRESH
+        token = acquire_lock(key, lock_timeout)
+        if token:
+            if background:
+                threading.Thread(
+                    target=_refresh_in_background, args=(key, fn, ttl, stale_ttl, version, token), daemon=True
+                ).start()
+            else:
+                try:
+                    return _compute(key, fn, ttl, stale_ttl, version), COMPUTED
+                finally:
+                    release_lock(key, token)
+        return entry["value"], STALE
+
+    # Cold key: whoever takes the lock computes, the rest wait for its result.
+    # A holder that failed releases the lock, so the next waiter takes over.
+    deadline = time.monotonic() + lock_timeout
+    waited = False
+    while time.monotonic() < deadline:
+        token = acquire_lock(key, lock_timeout)
+        if token:
+            try:
+                entry = cache.get(key) if waited else None
+                if entry is not None:
+                    return entry["value"], WAITED
+                return _compute(key, fn, ttl, stale_ttl, version), COMPUTED
+            finally:
+                release_lock(key, token)
+        time.sleep(WAIT_INTERVAL)
+        waited = True
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"], WAITED
+    logger.warning(f"cached_compute: gave up waiting for {key}, computing it here")
+    return _compute(key, fn, ttl, stale_ttl, version), COMPUTED
+
+
+def _needs_refresh(entry, version, beta):
+    if version is not None and entry.get("version") != version:
+        return True
+    # XFetch: now - delta * beta * ln(rand) >= expiry   (ln(rand) <= 0)
+    jitter = entry["delta"] * beta * math.log(1.0 - random.random())
+    return time.time() - jitter >= entry["expires_at"]
+
+
+def _compute(key, fn, ttl, stale_ttl, version):
+    started = time.time()
+    value = fn()
+    finished = time.time()
+    entry = {"value": value, "version": version, "delta": finished - started, "expires_at": finished + ttl}
+    cache.set(key, entry, ttl + stale_ttl)
+    return value
+
+
+def _refresh_in_background(key, fn, ttl, stale_ttl, version, token):
+    try:
+        _compute(key, fn, ttl, stale_ttl, version)
+    except Exception:
+        logger.exception(f"cached_compute: background refresh of {key} failed")
+    finally:
+        release_lock(key, token)
+        connections.close_all()
+
+
+def acquire_lock(key, timeout):
+    """Take the cache lock of `key` for up to `timeout` seconds: a token to release it with, or None if held."""
+    token = uuid.uuid4().hex
+    return token if cache.add(key + LOCK_SUFFIX, token, timeout) else None
+
+
+def release_lock(key, token):
+    if cache.get(key + LOCK_SUFFIX) == token:
+        cache.delete(key + LOCK_SUFFIX)
+
+
+def locked(key):
+    return cache.get(key + LOCK_SUFFIX) is not None
@@ -0,0 +1,434 @@
+from django.utils import timezone
+from apps.bonds.models import ISINDetailedInfo
+from apps.bonds.utils import (
+    get_payments_per_year, get_day_count_convention, get_settlement_days, ACT_ACT, ACT_365, THIRTY_360,
+)
+from apps.bonds.services.bond_analytics_service import DAYS_PER_YEAR
+from apps.bonds.services.bond_data_version import BondDataVersion
+import numpy as np
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+NO_DATE = np.datetime64("NaT", "D")
+
+
+# ---- Date arithmetic (pure NumPy) ----
+#
+# Dates are datetime64[D] at the edges; inside generate() they are int64
+# day numbers and month numbers (months since 1970-01), with month starts
+# looked up in a small table instead of converting every flow's date.
+
+def month_table(first_month, last_month):
+    """Day number of the first day of each month first_month .. last_month + 1."""
+    return np.arange(first_month, last_month + 2).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def split_dates(dates):
+    """(month number, 0-based day of month) of datetime64[D] dates."""
+    months = dates.astype("datetime64[M]")
+    return months.astype(np.int64), (dates - months.astype("datetime64[D]")).astype(np.int64)
+
+
+def day_in_month(table, first_month, month, day, end_of_month):
+    """
+    Day number and 0-based day of `day` in `month`, clamped to the month's
+    length; end-of-month schedules land on the last day.
+    """
+    first = table[month - first_month]
+    length = table[month - first_month + 1] - first
+    day = np.where(end_of_month, length - 1, np.minimum(day, length - 1))
+    return first + day, day
+
+
+def days_30_360(start, end):
+    """Day count between datetime64[D] dates under the 30/360 bond basis."""
+    (m1, d1), (m2, d2) = split_dates(start), split_dates(end)
+    return _days_30_360(m1, d1, m2, d2)
+
+
+def _days_30_360(m1, d1, m2, d2):
+    # 0-based days: 29 is the 30th, 30 the 31st
+    d1 = np.minimum(d1, 29)
+    d2 = np.where((d2 == 30) & (d1 == 29), 29, d2)
+    return 30 * (m2 - m1) + (d2 - d1)
+
+
+def year_fraction(start, end, convention, frequency, period_days):
+    """
+    Year fraction from `start` to `end` (datetime64[D]) for each
+    (convention, frequency).
+
+    Actual/Actual is the ICMA rule: actual days over the days of the
+    regular coupon period they fall in (`period_days`), divided by the
+    coupon frequency. Cumulative bonds (frequency 0) have no coupon period,
+    so they count actual days over 365 instead.
+    """
+    actual = (end - start).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        act_act = np.where(frequency > 0, actual / (np.maximum(period_days, 1) * frequency), actual / DAYS_PER_YEAR)
+    return np.select(
+        [convention == ACT_ACT, convention == THIRTY_360],
+        [act_act, days_30_360(start, end) / 360.0],
+        actual / DAYS_PER_YEAR,
+    )
+
+
+def generate(terms):
+    """
+    Every cash flow from the first accrual date to maturity for a batch of
+    bonds, in CSR layout (see CashFlowSchedule).
+
+    `terms` holds equal-length arrays: maturity and start (datetime64[D],
+    maturity after start), frequency (payments/year, 0 = cumulative),
+    coupon_rate (decimal), face_value and convention (day count code).
+
+    Coupon dates are rolled back from maturity in whole months, unadjusted
+    for holidays. A regular period pays coupon / frequency under
+    Actual/Actual and 30/360 and actual days / 365 under Actual/365; the
+    first period runs from `start` and is prorated under the bond's
+    convention. Cumulative bonds pay one compounded (annual) amount at
+    maturity.
+    """
+    frequency, convention = terms["frequency"], terms["convention"]
+    size = len(frequency)
+    cumulative = frequency == 0
+    step = np.where(cumulative, 0, 12 // np.maximum(frequency, 1))
+    maturity_month, maturity_day = split_dates(terms["maturity"])
+    start_month, start_day = split_dates(terms["start"])
+    start = terms["start"].astype(np.int64)
+    end_of_month = (terms["maturity"] + 1).astype("datetime64[M]").astype(np.int64) != maturity_month
+    first_month = int(start_month.min()) - 12 if size else 0
+    table = month_table(first_month, int(maturity_month.max()) if size else 0)
+
+    # Dates k = 0 .. count - 1 periods before maturity fall in or after the
+    # start month; the oldest of them may still be on or before the start
+    count = np.where(cumulative, 1, (maturity_month - start_month) // np.maximum(step, 1) + 1)
+    oldest, _ = day_in_month(table, first_month, maturity_month - step * (count - 1), maturity_day, end_of_month)
+    count = np.maximum(np.where(oldest <= start, count - 1, count), 1)
+
+    # First flow of each bond: the only one whose period can be broken
+    first_flow_month = maturity_month - step * (count - 1)
+    first_date, first_day = day_in_month(table, first_month, first_flow_month, maturity_day, end_of_month)
+    period_start, period_day = day_in_month(table, first_month, first_flow_month - step, maturity_day, end_of_month)
+    broken = cumulative | (period_start < start)
+    first_accrual = np.where(broken, start, period_start)
+    actual = (first_date - first_accrual).astype(np.float64)
+    thirty = _days_30_360(
+        np.where(broken, start_month, first_flow_month - step), np.where(broken, start_day, period_day),
+        first_flow_month, first_day,
+    ) / 360.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        regular = 1.0 / frequency
+        act_act = np.where(cumulative, actual / DAYS_PER_YEAR, actual / ((first_date - period_start) * frequency))
+    fraction = np.select(
+        [convention == ACT_ACT, convention == THIRTY_360],
+        [np.where(broken, act_act, regular), np.where(broken, thirty, regular)],
+        actual / DAYS_PER_YEAR,
+    )
+    rate, face_value = terms["coupon_rate"], terms["face_value"]
+    first_coupon = np.where(cumulative, face_value * ((1.0 + rate) ** fraction - 1.0), face_value * rate * fraction)
+
+    # Every flow: dates from the month arithmetic, regular coupons
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(count, out=offsets[1:])
+    first, last = offsets[:-1], offsets[1:] - 1
+    bond = np.repeat(np.arange(size), count)
+    # Periods before maturity, so each bond's flows run oldest first
+    k = last[bond] - np.arange(offsets[-1])
+    dates, _ = day_in_month(table, first_month, maturity_month[bond] - step[bond] * k, maturity_day[bond], end_of_month[bond])
+
+    accrual_start = np.empty_like(dates)
+    accrual_start[1:] = dates[:-1]
+    accrual_start[first] = first_accrual
+    # Notional start of each coupon period: a broken first period is
+    # measured against the regular one ending on its coupon date
+    period_start_flows = accrual_start.copy()
+    period_start_flows[first] = np.where(cumulative, start, period_start)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_period = face_value * rate / frequency
+    actual_365 = convention[bond] == ACT_365
+    coupon = per_period[bond]
+    coupon[actual_365] = (face_value * rate)[bond][actual_365] * (dates - accrual_start)[actual_365] / DAYS_PER_YEAR
+    coupon[first] = first_coupon
+    principal = np.zeros(len(dates))
+    principal[last] = face_value
+    return {
+        "offsets": offsets,
+        "dates": dates.astype("datetime64[D]"),
+        "accrual_start": accrual_start.astype("datetime64[D]"),
+        "period_start": period_start_flows.astype("datetime64[D]"),
+        "coupon": coupon,
+        "principal": principal,
+    }
+
+
+class CashFlowSchedule:
+    """
+    Dated cash flows for a set of bonds.
+
+    Flows are stored flat: bond i owns positions offsets[i]:offsets[i + 1]
+    of `dates`, `accrual_start`, `period_start`, `coupon` and `principal`
+    (rupees per bond, like face_value_rs), oldest first, the last one at
+    maturity. `period_start` equals `accrual_start` except on a broken
+    first period, where it is the regular coupon date before the first
+    flow (the issue date for cumulative bonds). `terms`
+    keeps the per-bond inputs (TERMS arrays) alongside, including the
+    call / put dates and settlement lag the pricing code needs.
+    """
+
+    FLOW_FIELDS = ("dates", "accrual_start", "period_start", "coupon", "principal")
+    TERMS = (
+        "maturity", "start", "frequency", "coupon_rate", "face_value", "convention",
+        "settlement_days", "call_date", "put_date",
+    )
+
+    def __init__(self, isin_codes, keys, terms, flows):
+        self.isin_codes = isin_codes
+        self.keys = keys
+        self.terms = terms
+        self.offsets = flows["offsets"]
+        for field in self.FLOW_FIELDS:
+            setattr(self, field, flows[field])
+        self._positions = None
+        self._bond = None
+
+    def __len__(self):
+        return len(self.isin_codes)
+
+    @property
+    def flow_count(self):
+        return int(self.offsets[-1])
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    @property
+    def bond(self):
+        """Row of the owning bond for every flow."""
+        if self._bond is None:
+            self._bond = np.repeat(np.arange(len(self)), self.counts)
+        return self._bond
+
+    def position(self, isin_code):
+        if self._positions is None:
+            self._positions = {code: i for i, code in enumerate(self.isin_codes)}
+        return self._positions.get(isin_code)
+
+    @classmethod
+    def build(cls, isin_codes, keys, terms):
+        return cls(isin_codes, keys, terms, generate(terms))
+
+    @classmethod
+    def empty(cls):
+        terms = {field: np.empty(0) for field in cls.TERMS}
+        flows = {field: np.empty(0) for field in cls.FLOW_FIELDS}
+        flows["offsets"] = np.zeros(1, dtype=np.int64)
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype=object), terms, flows)
+
+    def select(self, rows):
+        """Schedule of the bonds at `rows`, in that order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.counts[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Source position of every selected flow
+        source = np.repeat(self.offsets[rows] - offsets[:-1], counts) + np.arange(offsets[-1])
+        flows = {field: getattr(self, field)[source] for field in self.FLOW_FIELDS}
+        flows["offsets"] = offsets
+        terms = {field: values[rows] for field, values in self.terms.items()}
+        return CashFlowSchedule(self.isin_codes[rows], self.keys[rows], terms, flows)
+
+    @classmethod
+    def concat(cls, schedules):
+        schedules = [schedule for schedule in schedules if len(schedule)] or [cls.empty()]
+        if len(schedules) == 1:
+            return schedules[0]
+        flows = {field: np.concatenate([getattr(s, field) for s in schedules]) for field in cls.FLOW_FIELDS}
+        shifts = np.cumsum([0] + [s.flow_count for s in schedules[:-1]])
+        flows["offsets"] = np.concatenate([[0]] + [s.offsets[1:] + shift for s, shift in zip(schedules, shifts)])
+        terms = {field: np.concatenate([s.terms[field] for s in schedules]) for field in cls.TERMS}
+        return cls(
+            np.concatenate([s.isin_codes for s in schedules]), np.concatenate([s.keys for s in schedules]), terms, flows
+        )
+
+    # ---- Dates ----
+
+    def settlement_dates(self, trade_date):
+        """Settlement date of a trade on `trade_date` for every bond (T+n business days, weekends only)."""
+        return np.busday_offset(np.datetime64(trade_date, "D"), self.terms["settlement_days"], roll="forward")
+
+    def next_flow(self, settlement):
+        """
+        Position of each bond's first flow strictly after `settlement` (a
+        date or one per bond); offsets[i + 1] when nothing is left.
+        """
+        settlement = np.broadcast_to(np.asarray(settlement, dtype="datetime64[D]"), (len(self),))
+        # Flows are sorted by (bond, date), so one searchsorted finds them all
+        stride = np.int64(1 << 24)
+        keys = self.bond * stride + self.dates.astype(np.int64)
+        targets = np.arange(len(self)) * stride + settlement.astype(np.int64)
+        return np.searchsorted(keys, targets, side="right")
+
+    def future(self, settlement):
+        """Mask of the flows paid after `settlement` (a date or one per bond)."""
+        settlement = np.broadcast_to(np.asarray(settlement, dtype="datetime64[D]"), (len(self),))
+        return self.dates > settlement[self.bond]
+
+    def flows(self, isin_code):
+        """[{date, coupon, principal}] for one bond, oldest first (JSON-ready)."""
+        row = self.position(isin_code)
+        if row is None:
+            return []
+        span = slice(self.offsets[row], self.offsets[row + 1])
+        return [
+            {"date": str(date), "coupon": round(float(coupon), 4), "principal": round(float(principal), 4)}
+            for date, coupon, principal in zip(self.dates[span], self.coupon[span], self.principal[span])
+        ]
+
+
+class CashFlowScheduleService:
+    """
+    Loads bond terms and serves their CashFlowSchedule.
+
+    Schedules run from the allotment date (else the issue date) to
+    maturity, so they do not depend on the valuation date. The last
+    universe schedule is kept per process, keyed per bond by the data_hash
+    of its ISINBasicInfo and ISINDetailedInfo rows: a later call only
+    regenerates bonds whose hash changed (or that are new). Bonds without a
+    hash, or without a start date (which then defaults to today), are
+    always regenerated.
+
+    Only the loaders write data_hash, so an ORM / admin edit of a bond's
+    terms leaves it unchanged: the cache is also tagged with the
+    BondDataVersion it was built at, and bonds journalled as changed since
+    then are regenerated too (everything after a bulk or unknown change).
+    """
+
+    TERM_FIELDS = (
+        "isin_id",
+        "isin__maturity_date",
+        "allotment_date",
+        "isin__issue_date",
+        "isin__interest_payment_frequency",
+        "isin__coupon_rate_percent",
+        "isin__face_value_rs",
+        "day_count_convention",
+        "settlement_cycle",
+        "call_option",
+        "call_option_date",
+        "put_option",
+        "put_option_date",
+        "isin__data_hash",
+        "data_hash",
+    )
+
+    _cache = None
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def queryset(isin_codes, today):
+        queryset = ISINDetailedInfo.objects.filter(isin__maturity_date__gt=today)
+        if isin_codes is not None:
+            queryset = queryset.filter(isin_id__in=list(isin_codes))
+        return queryset
+
+    @staticmethod
+    def key(basic_hash, detailed_hash):
+        return f"{basic_hash}:{detailed_hash}" if basic_hash and detailed_hash else None
+
+    @classmethod
+    def load_terms(cls, isin_codes=None, today=None):
+        """(isin_codes, keys, terms) for every unmatured bond that can be scheduled."""
+        today = today or timezone.now().date()
+        rows = []
+        for row in cls.queryset(isin_codes, today).values_list(*cls.TERM_FIELDS).iterator(chunk_size=5000):
+            frequency = get_payments_per_year(row[4])
+            start = row[2] or row[3]
+            if frequency is None or row[5] is None or not row[6] or (start and start >= row[1]):
+                continue
+            rows.append((row, frequency, start))
+
+        def dates(values):
+            return np.array([NO_DATE if value is None else value for value in values], dtype="datetime64[D]")
+
+        def option_date(flag, value, maturity):
+            # Only exercisable dates inside the bond's life count
+            return value if flag and value and value < maturity else None
+
+        terms = {
+            "maturity": dates(r[1] for r, _, _ in rows),
+            "start": dates(start or today for _, _, start in rows),
+            "frequency": np.array([frequency for _, frequency, _ in rows], dtype=np.int64),
+            "coupon_rate": np.array([float(r[5]) / 100.0 for r, _, _ in rows], dtype=np.float64),
+            "face_value": np.array([float(r[6]) for r, _, _ in rows], dtype=np.float64),
+            "convention": np.array([get_day_count_convention(r[7]) for r, _, _ in rows], dtype=np.int8),
+            "settlement_days": np.array([get_settlement_days(r[8]) for r, _, _ in rows], dtype=np.int64),
+            "call_date": dates(option_date(r[9], r[10], r[1]) for r, _, _ in rows),
+            "put_date": dates(option_date(r[11], r[12], r[1]) for r, _, _ in rows),
+        }
+        keys = np.array([cls.key(r[13], r[14]) if start else None for r, _, start in rows], dtype=object)
+        return np.array([r[0] for r, _, _ in rows], dtype=object), keys, terms
+
+    @classmethod
+    def schedules(cls, isin_codes=None, today=None):
+        """
+        CashFlowSchedule of the given bonds (default: every unmatured one
+        that can be scheduled), in no particular order: use isin_codes /
+        position() to line results up. Only a full-universe call replaces
+        the process cache.
+
+        Only the (isin, data_hash) keys are read for every bond; full terms
+        are loaded and schedules generated for the cache misses alone.
+        """
+        started = time.perf_counter()
+        today = today or timezone.now().date()
+        # Read the version first: a write during the load leaves the new
+        # cache already stale rather than wrongly fresh
+        version = BondDataVersion.get()
+        with cls._lock:
+            cached, cached_version = cls._cache, cls._version
+        changed = set()
+        if cached is not None and cached_version != version:
+            changed = BondDataVersion.changes_since(cached_version, version)
+            if changed is None:
+                cached = None
+
+        hits, misses = [], None if isin_codes is None else list(isin_codes)
+        if cached is not None:
+            misses = []
+            rows = cls.queryset(isin_codes, today).values_list("isin_id", "isin__data_hash", "data_hash")
+            for code, basic_hash, detailed_hash in rows.iterator(chunk_size=5000):
+                position = cached.position(code)
+                key = cls.key(basic_hash, detailed_hash)
+                if key is not None and position is not None and cached.keys[position] == key and code not in changed:
+                    hits.append(position)
+                else:
+                    misses.append(code)
+        loaded = time.perf_counter()
+
+        fresh = CashFlowSchedule.build(*cls.load_terms(misses, today)) if misses != [] else CashFlowSchedule.empty()
+        generated = time.perf_counter()
+        if cached is not None and not len(fresh) and hits == list(range(len(cached))):
+            schedule = cached
+        else:
+            schedule = CashFlowSchedule.concat([cached.select(hits) if hits else CashFlowSchedule.empty(), fresh])
+
+        if isin_codes is None:
+            with cls._lock:
+                cls._cache, cls._version = schedule, version
+        logger.info(
+            f"Cash-flow schedules: {len(schedule)} bonds, {schedule.flow_count} flows, {len(hits)} cached, "
+            f"keys {loaded - started:.2f}s, load + generate {generated - loaded:.3f}s, "
+            f"assemble {time.perf_counter() - generated:.3f}s"
+        )
+        return schedule
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache, cls._version = None, None
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo, CatalogueStats
+from apps.bonds.utils import RATING_BUCKETS
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogueStatsService:
+    """
+    Maintains the CatalogueStats row behind StatsView.
+
+    Every total comes out of one GROUPING SETS query over isin_basic_info
+    (grand total, per rating bucket, per maturity bucket, per issuer type),
+    so a refresh costs one sequential scan however many breakdowns we add.
+    Refreshed by the beat task and after every successful ETL run
+    (see signals.py), never on the request path.
+    """
+
+    STATS_PK = 1
+
+    # current_rating_rank -> bucket (ranks from utils.RATING_ORDER)
+    RATING_BUCKETS = RATING_BUCKETS
+    # Remaining life in years: (bucket, upper bound exclusive)
+    MATURITY_BUCKETS = (
+        ("UP_TO_1Y", 1),
+        ("1Y_3Y", 3),
+        ("3Y_5Y", 5),
+        ("5Y_10Y", 10),
+    )
+
+    @classmethod
+    def _sql(cls, qn):
+        rating_case = " ".join(
+            f"WHEN current_rating_rank BETWEEN {low} AND {high} THEN '{name}'"
+            for name, low, high in cls.RATING_BUCKETS
+        )
+        maturity_case = " ".join(
+            f"WHEN maturity_date < CURRENT_DATE + INTERVAL '{years} years' THEN '{name}'"
+            for name, years in cls.MATURITY_BUCKETS
+        )
+        return f"""
+            SELECT GROUPING(rating_bucket) = 0, GROUPING(maturity_bucket) = 0, GROUPING(issuer_type) = 0,
+                   rating_bucket, maturity_bucket, issuer_type,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE isin_active),
+                   COUNT(DISTINCT issuer_name) FILTER (WHERE isin_active),
+                   AVG(ytm_percent) FILTER (WHERE isin_active),
+                   COALESCE(SUM(issue_size_lakhs) FILTER (WHERE isin_active), 0)
+            FROM (
+                SELECT isin_active, issuer_name, ytm_percent, issue_size_lakhs,
+                       COALESCE(issuer_type, 'UNKNOWN') AS issuer_type,
+                       CASE {rating_case} ELSE 'UNRATED' END AS rating_bucket,
+                       CASE WHEN maturity_date IS NULL THEN 'UNKNOWN'
+                            WHEN maturity_date < CURRENT_DATE THEN 'MATURED'
+                            {maturity_case} ELSE 'OVER_10Y' END AS maturity_bucket
+                FROM {qn(ISINBasicInfo._meta.db_table)}
+            ) AS bonds
+            GROUP BY GROUPING SETS ((), (rating_bucket), (maturity_bucket), (issuer_type))
+        """
+
+    @staticmethod
+    def _bucket(bonds, issuers, avg_ytm, issue_size):
+        return {
+            "bonds": bonds,
+            "issuers": issuers,
+            "avg_ytm_percent": None if avg_ytm is None else round(float(avg_ytm), 3),
+            "issue_size_lakhs": round(float(issue_size), 2),
+        }
+
+    @classmethod
+    def compute(cls):
+        """Field values for CatalogueStats, from one grouped pass over the catalogue."""
+        connection = connections[router.db_for_read(ISINBasicInfo)]
+        with connection.cursor() as cursor:
+            cursor.execute(cls._sql(connection.ops.quote_name))
+            rows = cursor.fetchall()
+
+        values = {"by_rating": {}, "by_maturity": {}, "by_issuer_type": {}}
+        for by_rating, by_maturity, by_issuer_type, rating, maturity, issuer_type, total, active, issuers, avg_ytm, issue_size in rows:
+            if by_rating:
+                # Buckets describe the active catalogue; skip ones with only inactive bonds
+                if active:
+                    values["by_rating"][rating] = cls._bucket(active, issuers, avg_ytm, issue_size)
+            elif by_maturity:
+                if active:
+                    values["by_maturity"][maturity] = cls._bucket(active, issuers, avg_ytm, issue_size)
+            elif by_issuer_type:
+                if active:
+                    values["by_issuer_type"][issuer_type] = cls._bucket(active, issuers, avg_ytm, issue_size)
+            else:
+                values.update(
+                    total_bonds=total,
+                    active_bonds=active,
+                    issuers=issuers,
+                    avg_ytm_percent=None if avg_ytm is None else round(avg_ytm, 3),
+                    issue_size_lakhs=issue_size,
+                )
+
+        values["total_customers"] = get_user_model().objects.filter(is_active=True, is_staff=False).count()
+        return values
+
+    @classmethod
+    def refresh(cls):
+        started = time.perf_counter()
+        values = cls.compute()
+        values["computed_at"] = timezone.now()
+        values["computation_seconds"] = round(time.perf_counter() - started, 3)
+        stats, _ = CatalogueStats.objects.update_or_create(pk=cls.STATS_PK, defaults=values)
+        logger.info(f"Catalogue stats refreshed: {stats.active_bonds} active bonds in {values['computation_seconds']}s")
+        return stats
+
+    @classmethod
+    def current(cls):
+        """The stored stats (a primary-key read); computed once if never refreshed."""
+        return CatalogueStats.objects.filter(pk=cls.STATS_PK).first() or cls.refresh()
@@ -0,0 +1,74 @@
+from django.db.models import F
+from apps.bonds.models import ISINBasicInfo, ISINRating
+from apps.bonds.utils import get_rating_rank, UNRATED_RANK
+from apps.bonds.services.bond_data_version import BondDataVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CurrentRatingService:
+    """
+    Maintains the denormalized current_rating* columns on ISINBasicInfo.
+
+    The catalogue views and BondFilter read these columns instead of running
+    a correlated ISINRating subquery per row, so they must be refreshed
+    whenever ISINRating changes (see signals.py) or after bulk loads
+    (manage.py rebuild_current_ratings).
+    """
+
+    LATEST_ORDERING = (F("rating_date").desc(nulls_last=True), "-id")
+
+    @classmethod
+    def _values_for(cls, rating):
+        if rating is None:
+            return {
+                "current_rating": None,
+                "current_rating_agency": None,
+                "current_rating_date": None,
+                "current_rating_rank": UNRATED_RANK,
+            }
+        return {
+            "current_rating": rating.credit_rating,
+            "current_rating_agency": rating.rating_agency,
+            "current_rating_date": rating.rating_date,
+            "current_rating_rank": get_rating_rank(rating.credit_rating),
+        }
+
+    @classmethod
+    def refresh(cls, isin_code):
+        """Recompute the current rating for a single ISIN."""
+        latest = (
+            ISINRating.objects.filter(isin_id=isin_code)
+            .order_by(*cls.LATEST_ORDERING)
+            .first()
+        )
+        return ISINBasicInfo.objects.filter(isin_code=isin_code).update(**cls._values_for(latest))
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        Recompute the current rating for every ISIN.
+        Reads the latest rating per ISIN in one DISTINCT ON query and writes
+        back only the rows whose projection actually changed.
+        """
+        latest_by_isin = {
+            r.isin_id: r
+            for r in ISINRating.objects.order_by("isin_id", *cls.LATEST_ORDERING).distinct("isin_id")
+        }
+
+        fields = ["current_rating", "current_rating_agency", "current_rating_date", "current_rating_rank"]
+        changed = []
+        bonds = ISINBasicInfo.objects.only("isin_code", *fields).iterator(chunk_size=batch_size)
+        for bond in bonds:
+            values = cls._values_for(latest_by_isin.get(bond.isin_code))
+            if any(getattr(bond, k) != v for k, v in values.items()):
+                for k, v in values.items():
+                    setattr(bond, k, v)
+                changed.append(bond)
+
+        ISINBasicInfo.objects.bulk_update(changed, fields, batch_size=batch_size)
+        if changed:
+            BondDataVersion.bump()
+        logger.info(f"Rebuilt current ratings: {len(changed)} bonds updated")
+        return len(changed)
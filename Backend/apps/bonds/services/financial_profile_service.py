@@ -0,0 +1,192 @@
+from django.db import connections, router
+from apps.bonds.models import (
+    CompanyFinancialProfile, CompanyInfo, FinancialMetric, FinancialMetricValue, RatioAnalysis, RatioValue,
+)
+from apps.bonds.services.cached_compute import WAIT_INTERVAL, acquire_lock, locked, release_lock
+from decimal import Decimal
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FinancialProfileService:
+    """
+    Maintains CompanyFinancialProfile, the wide copy of the
+    FinancialMetric -> FinancialMetricValue(year) and RatioAnalysis -> RatioValue
+    EAV tables, and reads company x metric x year grids from it.
+
+    sync() pivots in SQL (jsonb_object_agg per metric, jsonb_agg per company)
+    and upserts with INSERT ... ON CONFLICT, so any number of companies costs
+    one statement. Signals flag profiles stale when their rows change; the
+    readers sync stale or missing profiles on the spot, one request per
+    company at a time (sync_once()), and sync_stale() catches up in the
+    background.
+
+    Values are stored as numeric text ("918.70") so they round-trip to the
+    same Decimal the ORM returns.
+    """
+
+    SYNC_LOCK_KEY = "bonds:financial_profile_sync:{}"
+    SYNC_LOCK_TIMEOUT = 30
+
+    @classmethod
+    def _sql(cls, qn, scoped):
+        def scope(alias):
+            return f"AND {alias}.company_id = ANY(%(company_ids)s)" if scoped else ""
+
+        def pivot(parent, value, fk, fields):
+            columns = ", ".join(f"'{field}', p.{field}" for field in fields)
+            return f"""
+                SELECT p.company_id,
+                       jsonb_agg(jsonb_build_object('id', p.id, {columns}, 'values', COALESCE(v.vals, '{{}}'::jsonb))
+                                 ORDER BY p.id) AS items
+                FROM {qn(parent._meta.db_table)} AS p
+                LEFT JOIN (
+                    SELECT vv.{fk}, jsonb_object_agg(vv.year::text, vv.value::text) AS vals
+                    FROM {qn(value._meta.db_table)} AS vv
+                    JOIN {qn(parent._meta.db_table)} AS p ON p.id = vv.{fk}
+                    WHERE TRUE {scope("p")}
+                    GROUP BY vv.{fk}
+                ) AS v ON v.{fk} = p.id
+                WHERE TRUE {scope("p")}
+                GROUP BY p.company_id
+            """
+
+        metrics = pivot(FinancialMetric, FinancialMetricValue, "metric_id", ["name"])
+        ratios = pivot(RatioAnalysis, RatioValue, "ratio_id", ["title", "benchmark", "assessment", "description"])
+        profile = qn(CompanyFinancialProfile._meta.db_table)
+        company = qn(CompanyInfo._meta.db_table)
+        return f"""
+            INSERT INTO {profile} (company_id, metrics, ratios, stale, synced_at)
+            SELECT c.company_id, COALESCE(m.items, '[]'::jsonb), COALESCE(r.items, '[]'::jsonb), FALSE, NOW()
+            FROM {company} AS c
+            LEFT JOIN ({metrics}) AS m ON m.company_id = c.company_id
+            LEFT JOIN ({ratios}) AS r ON r.company_id = c.company_id
+            WHERE (m.company_id IS NOT NULL OR r.company_id IS NOT NULL) {scope("c")}
+            ON CONFLICT (company_id) DO UPDATE
+            SET metrics = EXCLUDED.metrics, ratios = EXCLUDED.ratios, stale = FALSE, synced_at = EXCLUDED.synced_at
+        """
+
+    @classmethod
+    def sync(cls, company_ids=None):
+        """Re-pivot the given companies (all when None). Returns the number of profiles written."""
+        started = time.perf_counter()
+        scoped = company_ids is not None
+        params = {"company_ids": list(company_ids)} if scoped else {}
+        if scoped and not params["company_ids"]:
+            return 0
+
+        connection = connections[router.db_for_write(CompanyFinancialProfile)]
+        with connection.cursor() as cursor:
+            cursor.execute(cls._sql(connection.ops.quote_name, scoped), params)
+            written = cursor.rowcount
+
+        # Companies whose last metric / ratio is gone
+        orphans = CompanyFinancialProfile.objects.exclude(company__financial_metrics__isnull=False).exclude(
+            company__ratio_analyses__isnull=False
+        )
+        if scoped:
+            orphans = orphans.filter(company_id__in=params["company_ids"])
+        orphans.delete()
+
+        logger.debug(f"Synced {written} company financial profiles in {time.perf_counter() - started:.2f}s")
+        return written
+
+    @classmethod
+    def sync_stale(cls):
+        """Sync stale profiles and companies with metrics / ratios but no profile yet."""
+        stale = set(CompanyFinancialProfile.objects.filter(stale=True).values_list("company_id", flat=True))
+        for model in (FinancialMetric, RatioAnalysis):
+            stale.update(
+                model.objects.filter(company__financial_profile__isnull=True)
+                .order_by().values_list("company_id", flat=True).distinct()
+            )
+        return cls.sync(stale)
+
+    @classmethod
+    def mark_stale(cls, company_ids):
+        return CompanyFinancialProfile.objects.filter(company_id__in=company_ids, stale=False).update(stale=True)
+
+    # ---- Readers ----
+
+    @staticmethod
+    def series(item):
+        """[(year, Decimal | None)] of a profile metric / ratio, newest first."""
+        return sorted(
+            ((int(year), None if value is None else Decimal(value)) for year, value in item["values"].items()),
+            reverse=True,
+        )
+
+    @classmethod
+    def sync_once(cls, company_ids):
+        """
+        sync() the given companies, at most one caller per company at a
+        time: companies another caller is syncing are waited for instead
+        (and synced here only if their lock outlives SYNC_LOCK_TIMEOUT).
+        """
+        tokens = {
+            company_id: acquire_lock(cls.SYNC_LOCK_KEY.format(company_id), cls.SYNC_LOCK_TIMEOUT)
+            for company_id in company_ids
+        }
+        owned = [company_id for company_id, token in tokens.items() if token]
+        try:
+            cls.sync(owned)
+        finally:
+            for company_id in owned:
+                release_lock(cls.SYNC_LOCK_KEY.format(company_id), tokens[company_id])
+
+        busy = [company_id for company_id, token in tokens.items() if not token]
+        deadline = time.monotonic() + cls.SYNC_LOCK_TIMEOUT
+        while busy and time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            busy = [company_id for company_id in busy if locked(cls.SYNC_LOCK_KEY.format(company_id))]
+        if busy:
+            logger.warning(f"Financial profile sync: gave up waiting for {len(busy)} companies, syncing them here")
+            cls.sync(busy)
+
+    @classmethod
+    def get_many(cls, company_ids):
+        """{company_id: {"metrics": [...], "ratios": [...]}}, syncing stale or missing profiles first."""
+        company_ids = set(company_ids)
+        profiles = {
+            company_id: {"metrics": metrics, "ratios": ratios}
+            for company_id, metrics, ratios, stale in CompanyFinancialProfile.objects.filter(
+                company_id__in=company_ids
+            ).values_list("company_id", "metrics", "ratios", "stale")
+            if not stale
+        }
+        outdated = company_ids - set(profiles)
+        if outdated:
+            cls.sync_once(outdated)
+            profiles.update(
+                (company_id, {"metrics": metrics, "ratios": ratios})
+                for company_id, metrics, ratios in CompanyFinancialProfile.objects.filter(
+                    company_id__in=outdated
+                ).values_list("company_id", "metrics", "ratios")
+            )
+        return profiles
+
+    @classmethod
+    def get(cls, company_id):
+        """One company's profile; empty metrics / ratios when it has none."""
+        return cls.get_many([company_id]).get(company_id, {"metrics": [], "ratios": []})
+
+    @classmethod
+    def latest_values(cls, company_ids, metric_names):
+        """
+        {(company_id, metric name): (year, value)} - latest year of the first
+        metric (by id) with each name; names whose metric has no values are left out.
+        """
+        latest = {}
+        for company_id, profile in cls.get_many(company_ids).items():
+            seen = set()
+            for metric in profile["metrics"]:
+                name = metric["name"]
+                if name not in metric_names or name in seen:
+                    continue
+                seen.add(name)
+                series = cls.series(metric)
+                if series:
+                    latest[(company_id, name)] = series[0]
+        return latest
@@ -0,0 +1,192 @@
+from django.db import connections, router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINDetailedInfo
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.market_data.services.price_tick_store import PriceTickStore
+from decimal import Decimal
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TickSource:
+    """
+    Base class for market-data feeds consumed by MarketDataUpdater.
+
+    Iterating a source yields ticks: dicts with "isin", "price" (clean, Rs
+    per bond), "quantity", "traded_at" (datetime or ISO string) and
+    optionally "yield" (percent). A live source should yield None whenever
+    it has been idle for a while, so the updater can flush on time.
+    """
+
+    def __iter__(self):
+        raise NotImplementedError
+
+
+class ReplayTickSource(TickSource):
+    """
+    Replays a recorded tick file (.csv, .json or .jsonl, as read by
+    BondETLLoader). With `speed` the file is replayed in (scaled) real time
+    by traded_at; without it, as fast as the updater takes it.
+    """
+
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+
+    def __iter__(self):
+        first = started = None
+        for record in BondETLLoader.read_records(self.path):
+            if self.speed:
+                traded_at = PriceTickStore.parse_time(record["traded_at"])
+                if first is None:
+                    first, started = traded_at, time.monotonic()
+                delay = (traded_at - first).total_seconds() / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    yield None
+                    time.sleep(delay)
+            yield record
+
+
+class MarketDataUpdater:
+    """
+    Applies intraday trades to the market-data columns of ISINDetailedInfo.
+
+    Ticks are coalesced per ISIN in memory; every `window` seconds the
+    window is written with one UPDATE ... FROM (VALUES ...) per BATCH_SIZE
+    ISINs and one BondDataVersion bump for the whole flush, instead of a
+    save() (and a cache invalidation) per tick.
+
+    Per ISIN and trade date the window keeps the last trade (price, yield,
+    quantity) and the day's running volume / trades / value. The UPDATE adds
+    those to the stored same-day totals, or restarts them on a new trade
+    date, and derives weighted_avg_price_rs (from itself, not from the
+    lakh-rounded value_traded_lakhs); weighted_avg_yield_percent is
+    left to BondAnalyticsService, which solves it from that price. Ticks
+    older than the ISIN's stored last_traded_date are ignored.
+
+    Every valid tick, late ones included, is also appended to the PriceTick
+    history (apps.market_data) in the flush transaction.
+    """
+
+    WINDOW = 1.0
+    BATCH_SIZE = 1000
+    PRICE = Decimal("0.0001")
+    YIELD = Decimal("0.001")
+    LAKH = 100_000
+
+    def __init__(self, window=None):
+        self.window = self.WINDOW if window is None else window
+        self.pending = {}
+        self.ticks = []
+        self.window_started = time.monotonic()
+        self.stats = {"ticks": 0, "rejected": 0, "flushes": 0, "rows": 0, "flush_seconds": []}
+        self.using = router.db_for_write(ISINDetailedInfo)
+
+    def add(self, tick):
+        """Coalesce one tick into the current window."""
+        row = PriceTickStore.parse(tick)
+        if row is None:
+            self.stats["rejected"] += 1
+            return
+        self.stats["ticks"] += 1
+        self.ticks.append(row)
+        isin_code, traded_at, price, yield_percent, quantity = row
+
+        trade_date = timezone.localdate(traded_at)
+        state = self.pending.get(isin_code)
+        if state is None or trade_date > state[0]:
+            # [trade_date, traded_at, price, yield, quantity, volume, trades, value]
+            self.pending[isin_code] = [trade_date, traded_at, price, yield_percent, quantity, quantity, 1, price * quantity]
+            return
+        if trade_date < state[0]:
+            return
+        if traded_at >= state[1]:
+            state[1:5] = traded_at, price, yield_percent, quantity
+        state[5] += quantity
+        state[6] += 1
+        state[7] += price * quantity
+
+    def due(self):
+        return time.monotonic() - self.window_started >= self.window
+
+    def flush(self):
+        """Write the window. Returns the ISINs updated."""
+        pending, self.pending = self.pending, {}
+        ticks, self.ticks = self.ticks, []
+        self.window_started = time.monotonic()
+        if not pending:
+            return []
+        started = time.perf_counter()
+
+        connection = connections[self.using]
+        qn = connection.ops.quote_name
+        same_day = f"d.{qn('last_traded_date')} = v.trade_date"
+
+        def running(column):
+            """The stored day total, or 0 when the window starts a new trade date."""
+            return f"(CASE WHEN {same_day} THEN COALESCE(d.{qn(column)}, 0) ELSE 0 END)"
+
+        sql = (
+            f"UPDATE {qn(ISINDetailedInfo._meta.db_table)} AS d SET "
+            f"{qn('last_traded_price_rs')} = v.price, "
+            f"{qn('last_traded_yield_percent')} = v.yield, "
+            f"{qn('last_trade_volume')} = v.quantity, "
+            f"{qn('volume_traded')} = {running('volume_traded')} + v.volume, "
+            f"{qn('number_of_trades')} = {running('number_of_trades')} + v.trades, "
+            f"{qn('value_traded_lakhs')} = ROUND({running('value_traded_lakhs')} + v.value / {self.LAKH}, 4), "
+            f"{qn('weighted_avg_price_rs')} = ROUND("
+            f"({running('weighted_avg_price_rs')} * {running('volume_traded')} + v.value) "
+            f"/ ({running('volume_traded')} + v.volume), 4), "
+            f"{qn('last_traded_date')} = v.trade_date, "
+            f"{qn('last_updated')} = %s "
+            f"FROM (VALUES {{values}}) AS v(isin, trade_date, price, yield, quantity, volume, trades, value) "
+            f"WHERE d.{qn('isin_id')} = v.isin "
+            f"AND (d.{qn('last_traded_date')} IS NULL OR d.{qn('last_traded_date')} <= v.trade_date) "
+            f"RETURNING d.{qn('isin_id')}"
+        )
+        row_sql = "(%s, %s::date, %s::numeric, %s::numeric, %s::bigint, %s::bigint, %s::bigint, %s::numeric)"
+
+        now = timezone.now()
+        items = list(pending.items())
+        updated = []
+        with transaction.atomic(using=self.using), connection.cursor() as cursor:
+            PriceTickStore.append(ticks, using=self.using)
+            for start in range(0, len(items), self.BATCH_SIZE):
+                batch = items[start:start + self.BATCH_SIZE]
+                params = [now]
+                for isin_code, (trade_date, _, price, yield_percent, quantity, volume, trades, value) in batch:
+                    params += [
+                        isin_code, trade_date, price.quantize(self.PRICE),
+                        None if yield_percent is None else yield_percent.quantize(self.YIELD),
+                        quantity, volume, trades, value,
+                    ]
+                cursor.execute(sql.format(values=", ".join([row_sql] * len(batch))), params)
+                updated += [isin_code for isin_code, in cursor.fetchall()]
+
+        if updated:
+            BondDataVersion.bump(updated if len(updated) <= BondETLLoader.MAX_JOURNALLED_CHANGES else None)
+        elapsed = time.perf_counter() - started
+        self.stats["flushes"] += 1
+        self.stats["rows"] += len(updated)
+        self.stats["flush_seconds"].append(elapsed)
+        logger.debug(f"Market data flush: {len(pending)} ISINs, {len(updated)} updated in {elapsed * 1000:.1f}ms")
+        return updated
+
+    def run(self, source, max_ticks=None):
+        """Consume `source` until it is exhausted (or `max_ticks`), flushing every window."""
+        consumed = 0
+        try:
+            for tick in source:
+                if tick is not None:
+                    self.add(tick)
+                    consumed += 1
+                if self.due():
+                    self.flush()
+                if max_ticks is not None and consumed >= max_ticks:
+                    break
+        finally:
+            self.flush()
+        return self.stats
@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo, PostTaxYield, TaxCategory
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.bonds.services.bond_pricing_service import BondPricingService, compute_pricing, redemption_flows, solve
+from apps.bonds.services.bulk_sql_service import BulkSQLService
+from apps.bonds.services.cash_flow_schedule import CashFlowScheduleService, NO_DATE
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Capital gains on listed bonds are long term after 12 months
+LONG_TERM_DAYS = 365
+
+
+def post_tax_flows(schedule, flows, clean_price, accrued, dirty_price, income_rate, gains_rate):
+    """
+    redemption_flows() output with each amount net of the holder's tax.
+
+    `income_rate` / `gains_rate` are per-bond decimal rates on interest and
+    on capital gains. Coupons are interest, less the accrued interest
+    bought with the bond on the first one; par over the clean price is a
+    capital gain at redemption (a loss is a credit, i.e. assumed set off).
+    On cumulative bonds everything over the purchase price is paid at
+    maturity: interest, or a capital gain for zero-coupon bonds.
+    """
+    bond, rank, tau, amount = flows
+    terms = schedule.terms
+    face_value = terms["face_value"][bond]
+    last = np.r_[bond[1:] != bond[:-1], True] if len(bond) else np.zeros(0, dtype=bool)
+
+    interest = amount - np.where(last, face_value, 0.0) - np.where(rank == 0, accrued[bond], 0.0)
+    gain = np.where(last, face_value - clean_price[bond], 0.0)
+    tax = income_rate[bond] * interest + gains_rate[bond] * gain
+
+    zero_coupon = terms["coupon_rate"][bond] == 0
+    cumulative_tax = np.where(zero_coupon, gains_rate[bond], income_rate[bond]) * (amount - dirty_price[bond])
+    tax = np.where(terms["frequency"][bond] == 0, cumulative_tax, tax)
+    return bond, rank, tau, amount - tax
+
+
+class PostTaxYieldService:
+    """
+    Maintains PostTaxYield: every bond's yield to maturity after tax, for
+    each investor slab of settings.BOND_TAX_SLABS.
+
+    Uses the same trade as BondPricingService (last traded price, else the
+    stored YTM, settling on today's T+n) and solves the yield of the
+    after-tax flows (post_tax_flows). Interest on TAX_FREE bonds is exempt;
+    capital gains on listed bonds held past LONG_TERM_DAYS are taxed at
+    settings.BOND_LTCG_TAX_PERCENT, everything else at the slab rate.
+    PARTIALLY_TAX_FREE bonds carry no exempt share in the data and are
+    treated as taxable.
+
+    Only changed rows are written, so BondFilter's post-tax screening reads
+    a narrow indexed table instead of taxing yields per request.
+    """
+
+    # numeric(6, 3)
+    LIMIT = 999
+
+    @staticmethod
+    def load_tax_terms(schedule):
+        """(interest exempt, listed) flag arrays in schedule order."""
+        rows = {
+            code: (category == TaxCategory.TAX_FREE or tax_free, not (listed or "").strip().lower().startswith("unlisted"))
+            for code, category, tax_free, listed in ISINBasicInfo.objects.values_list(
+                "isin_code", "tax_category", "tax_free", "listed_unlisted"
+            ).iterator(chunk_size=5000)
+        }
+        flags = np.array([rows.get(code, (False, True)) for code in schedule.isin_codes], dtype=bool).reshape(-1, 2)
+        return flags[:, 0], flags[:, 1]
+
+    @classmethod
+    def compute(cls, today=None):
+        """{(isin_code, slab): post-tax YTM percent as Decimal} for every priced bond."""
+        today = today or timezone.now().date()
+        schedule = CashFlowScheduleService.schedules(today=today)
+        if not len(schedule):
+            return {}
+        size = len(schedule)
+        terms = schedule.terms
+        clean_price, stored_ytm = BondPricingService.load_prices(schedule)
+        settlement = schedule.settlement_dates(today)
+        pricing = compute_pricing(schedule, clean_price, stored_ytm, settlement)
+
+        accrued, dirty_price, ytm = pricing["accrued_interest_rs"], pricing["dirty_price_rs"], pricing["ytm"]
+        priced = np.isfinite(dirty_price) & np.isfinite(ytm)
+        clean_price = dirty_price - accrued
+        frequency = np.where(terms["frequency"] == 0, 1.0, terms["frequency"]).astype(np.float64)
+        first = schedule.next_flow(settlement)
+        flows = redemption_flows(schedule, first, settlement, np.where(priced, terms["maturity"], NO_DATE))
+
+        exempt, listed = cls.load_tax_terms(schedule)
+        long_term = listed & ((terms["maturity"] - settlement).astype(np.int64) > LONG_TERM_DAYS)
+        values = {}
+        for slab, percent in settings.BOND_TAX_SLABS.items():
+            rate = percent / 100.0
+            income_rate = np.where(exempt, 0.0, rate)
+            gains_rate = np.where(long_term, settings.BOND_LTCG_TAX_PERCENT / 100.0, rate)
+            net = post_tax_flows(schedule, flows, clean_price, accrued, dirty_price, income_rate, gains_rate)
+            post_tax = np.where(priced, solve(net, dirty_price, frequency, ytm, size) * 100.0, np.nan)
+            for code, value in zip(schedule.isin_codes, BondPricingService.to_decimals(post_tax, 3, cls.LIMIT)):
+                if value is not None:
+                    values[code, slab] = value
+        return values
+
+    @classmethod
+    def refresh(cls, batch_size=2000, today=None):
+        """Recompute every post-tax yield and persist the changes. Returns a summary."""
+        started = time.perf_counter()
+        values = cls.compute(today)
+        computed = time.perf_counter()
+
+        stored = {
+            (code, slab): (pk, value)
+            for pk, code, slab, value in PostTaxYield.objects.values_list("pk", "isin_id", "slab", "post_tax_ytm_percent")
+        }
+        upserts = [key for key, value in values.items() if stored.get(key, (None, None))[1] != value]
+        # Unpriced, matured, or a slab no longer configured
+        removed = list(stored.keys() - values.keys())
+
+        with transaction.atomic(using=router.db_for_write(PostTaxYield)):
+            BulkSQLService.bulk_upsert_values(
+                PostTaxYield, [(code, slab, values[code, slab]) for code, slab in upserts],
+                ["isin", "slab"], ["post_tax_ytm_percent"], batch_size=batch_size,
+            )
+            pks = [stored[key][0] for key in removed]
+            for start in range(0, len(pks), batch_size):
+                PostTaxYield.objects.filter(pk__in=pks[start:start + batch_size]).delete()
+        changed = {code for code, _ in upserts} | {code for code, _ in removed}
+        if changed:
+            BondDataVersion.bump(list(changed) if len(changed) <= BondETLLoader.MAX_JOURNALLED_CHANGES else None)
+
+        finished = time.perf_counter()
+        bonds = len({code for code, _ in values})
+        logger.info(
+            f"Post-tax yields: {bonds} bonds x {len(settings.BOND_TAX_SLABS)} slabs, compute {computed - started:.2f}s, "
+            f"write {finished - computed:.2f}s, upserted {len(upserts)}, deleted {len(removed)}"
+        )
+        return {
+            "bonds": bonds,
+            "slabs": len(settings.BOND_TAX_SLABS),
+            "upserted": len(upserts),
+            "deleted": len(removed),
+            "compute_seconds": round(computed - started, 3),
+            "write_seconds": round(finished - computed, 3),
+        }
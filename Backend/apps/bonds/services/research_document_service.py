@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from apps.bonds.services.cached_compute import cached_compute
+from apps.bonds.services.financial_profile_service import FinancialProfileService
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchDocumentService:
+    """
+    Builds the BondResearchDataView payload for one company.
+
+    Metric and ratio values come from the company's CompanyFinancialProfile
+    (one row holding every year -> value series, see FinancialProfileService);
+    the last YEARS years of each series become the charts the serializers
+    used to build with one query per metric.
+
+    Documents are cached per company under a per-company generation that is
+    bumped when any of that company's metric / ratio rows change (see
+    signals.py): unrelated catalogue writes do not rebuild them, and a
+    refresh still running for the old generation cannot overwrite the new one.
+    """
+
+    YEARS = 3
+    CACHE_KEY = "bonds:research:{}:{}"
+    GENERATION_KEY = "bonds:research_generation:{}"
+    CACHE_TTL = 24 * 3600
+
+    @classmethod
+    def charts(cls, item, years):
+        return {
+            str(year): value if value is not None else ""
+            for year, value in FinancialProfileService.series(item)[:years]
+        }
+
+    @classmethod
+    def build(cls, company_id, years=None):
+        years = cls.YEARS if years is None else years
+        profile = FinancialProfileService.get(company_id)
+        return {
+            "financialMetrics": [
+                {"name": metric["name"], "charts": cls.charts(metric, years)}
+                for metric in profile["metrics"]
+            ],
+            "ratioAnalysis": [
+                {
+                    "title": ratio["title"],
+                    "benchmark": ratio["benchmark"],
+                    "assessment": ratio["assessment"],
+                    "description": ratio["description"],
+                    "charts": cls.charts(ratio, years),
+                }
+                for ratio in profile["ratios"]
+            ],
+        }
+
+    @staticmethod
+    def _initial():
+        # Seeded from the clock (like BondDataVersion) so a generation lost
+        # to cache eviction never restarts at one an older document is cached under
+        return time.time_ns() // 1_000_000
+
+    @classmethod
+    def generation(cls, company_id):
+        key = cls.GENERATION_KEY.format(company_id)
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, cls._initial(), timeout=None)
+            generation = cache.get(key)
+        return generation
+
+    @classmethod
+    def get(cls, company_id):
+        key = cls.CACHE_KEY.format(company_id, cls.generation(company_id))
+        return cached_compute(key, lambda: cls.build(company_id), ttl=cls.CACHE_TTL)
+
+    @classmethod
+    def invalidate(cls, company_ids):
+        for company_id in set(company_ids):
+            key = cls.GENERATION_KEY.format(company_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, cls._initial(), timeout=None)
+                cache.incr(key)
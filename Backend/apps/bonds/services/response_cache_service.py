@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from apps.bonds.services.bond_data_version import BondDataVersion
+from apps.bonds.services.cached_compute import cached_compute_with_status, STALE, COMPUTED
+from functools import wraps
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheService:
+    """
+    Catalogue-wide cache for public bond endpoints.
+
+    Keys combine the endpoint name, the normalized query params and the
+    global BondDataVersion, so any write to the bonds models (see signals.py)
+    makes every older entry unreachable at once; the TTL only bounds memory.
+    Hit / miss counters per endpoint live in the same cache (stats()).
+
+    Entries and counters are only coherent across workers when the default
+    cache is shared (BondDataVersion.shared()); on a per-process backend
+    the cache stays off, since bumps from Celery would never reach it.
+    """
+
+    KEY_PREFIX = "bonds:response"
+    STATS_KEY = "bonds:response_stats:{}:{}"
+    STATS_INDEX_KEY = "bonds:response_stats:endpoints"
+
+    _warned = False
+
+    @classmethod
+    def enabled(cls):
+        if not settings.BOND_RESPONSE_CACHE_ENABLED:
+            return False
+        if BondDataVersion.shared():
+            return True
+        if not cls._warned:
+            cls._warned = True
+            logger.warning(
+                "BOND_RESPONSE_CACHE_ENABLED is ignored: the default cache is per process, "
+                "so data version bumps from other processes would never invalidate it"
+            )
+        return False
+
+    @classmethod
+    def normalize_params(cls, query_params):
+        """Sorted keys, sorted values; empty values kept (`?cursor=` is meaningful)."""
+        return [(key, sorted(v.strip() for v in query_params.getlist(key))) for key in sorted(query_params)]
+
+    @classmethod
+    def make_key(cls, name, request, version=None, signature=None):
+        """
+        `signature` (JSON-ready) replaces the query params in the key, for
+        endpoints that can tell which requests are equivalent.
+        """
+        version = BondDataVersion.get() if version is None else version
+        if signature is None:
+            # Host is part of the key because paginated responses carry absolute links
+            signature = [request.scheme, request.get_host(), cls.normalize_params(request.query_params)]
+        digest = hashlib.sha1(json.dumps(signature).encode("utf-8")).hexdigest()
+        return f"{cls.KEY_PREFIX}:{name}:{version}:{digest}"
+
+    @classmethod
+    def record(cls, name, outcome):
+        key = cls.STATS_KEY.format(name, outcome)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+            endpoints = cache.get(cls.STATS_INDEX_KEY) or []
+            if name not in endpoints:
+                cache.set(cls.STATS_INDEX_KEY, endpoints + [name], timeout=None)
+
+    @classmethod
+    def stats(cls):
+        endpoints = cache.get(cls.STATS_INDEX_KEY) or []
+        counters = cache.get_many([cls.STATS_KEY.format(name, outcome) for name in endpoints for outcome in ("hit", "miss")])
+        result = {}
+        for name in sorted(endpoints):
+            hits = counters.get(cls.STATS_KEY.format(name, "hit"), 0)
+            misses = counters.get(cls.STATS_KEY.format(name, "miss"), 0)
+            total = hits + misses
+            result[name] = {"hits": hits, "misses": misses, "hit_ratio": round(hits / total, 4) if total else None}
+        return {"data_version": BondDataVersion.get(), "endpoints": result}
+
+    @classmethod
+    def reset_stats(cls):
+        endpoints = cache.get(cls.STATS_INDEX_KEY) or []
+        cache.delete_many([cls.STATS_KEY.format(name, outcome) for name in endpoints for outcome in ("hit", "miss")])
+
+
+class UncacheableResponse(Exception):
+    """Carries a non-200 response out of cached_compute without storing it."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def versioned_response_cache(name, ttl=None, stale_ttl=None, stale_on_write=False, signature=None):
+    """
+    Cache successful GET responses of an APIView method under `name`.
+
+        @versioned_response_cache("bond-detail")
+        def get(self, request): ...
+
+    Computation goes through cached_compute: one request recomputes an
+    expired entry inline (it holds the view and request objects, which must
+    not outlive the request) while the others are served the stale copy. By default
+    the data version is part of the key, so a write makes old entries
+    unreachable at once; with stale_on_write=True the key is version-free
+    and an entry from an older version is served stale while it refreshes
+    (for aggregates where a few seconds of lag beats a cold recompute).
+    `signature(view, request)` may return a normalized form of the request
+    to key on instead of its raw query params (None: use the params).
+    X-Cache is HIT, STALE or MISS.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not ResponseCacheService.enabled():
+                return method(self, request, *args, **kwargs)
+
+            version = BondDataVersion.get()
+            key = ResponseCacheService.make_key(
+                name, request, "live" if stale_on_write else version,
+                signature=None if signature is None else signature(self, request),
+            )
+
+            def compute():
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise UncacheableResponse(response)
+                return response.data
+
+            try:
+                data, outcome = cached_compute_with_status(
+                    key,
+                    compute,
+                    settings.BOND_RESPONSE_CACHE_TTL if ttl is None else ttl,
+                    settings.BOND_RESPONSE_CACHE_STALE_TTL if stale_ttl is None else stale_ttl,
+                    version=version if stale_on_write else None,
+                    background=False,
+                )
+            except UncacheableResponse as uncacheable:
+                ResponseCacheService.record(name, "miss")
+                uncacheable.response["X-Cache"] = "MISS"
+                return uncacheable.response
+
+            ResponseCacheService.record(name, "miss" if outcome == COMPUTED else "hit")
+            response = Response(data)
+            response["X-Cache"] = {STALE: "STALE", COMPUTED: "MISS"}.get(outcome, "HIT")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+from django.db import router, transaction
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo, IssuerType, CurveType, YieldCurve
+from apps.bonds.utils import RATING_BUCKETS
+from apps.bonds.services.bond_analytics_service import DAYS_PER_YEAR
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bonds are smoothed into these remaining-tenure bins (years) before fitting,
+# so a bucket's curve follows the median YTM at each tenure, not outliers
+TENURE_BINS = np.array([0, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 15, 20, 25, 30, 40, 100])
+# Nelson-Siegel decay (years) searched; the betas are linear given tau
+TAU_GRID = np.geomspace(0.25, 20.0, 48)
+MIN_BONDS = 10
+# Fewer populated bins than this fits a flat curve at the median
+MIN_BINS = 4
+# Stored YTMs outside (0, MAX_YTM] percent are treated as bad data
+MAX_YTM = 30.0
+
+
+# ---- Curve maths (pure NumPy) ----
+
+def nelson_siegel(tenor, beta0, beta1, beta2, tau):
+    """Curve yield at each tenor (years); all arguments broadcast."""
+    x = np.maximum(tenor, 1e-6) / tau
+    decay = np.exp(-x)
+    slope = -np.expm1(-x) / x
+    return beta0 + beta1 * slope + beta2 * (slope - decay)
+
+
+def smooth(tenor, ytm):
+    """Median tenor and YTM per populated TENURE_BINS bin, with its bond count."""
+    bins = np.digitize(tenor, TENURE_BINS)
+    order = np.lexsort((ytm, bins))
+    bins, tenor, ytm = bins[order], tenor[order], ytm[order]
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    counts = np.diff(np.r_[starts, len(bins)])
+    # ytm is sorted within each bin, tenor is not
+    mid = starts + (counts - 1) // 2
+    mid_upper = starts + counts // 2
+    median_ytm = (ytm[mid] + ytm[mid_upper]) / 2
+    median_tenor = np.array([np.median(tenor[s:s + n]) for s, n in zip(starts, counts)])
+    return median_tenor, median_ytm, counts
+
+
+def fit_nelson_siegel(tenor, ytm, weight):
+    """
+    (beta0, beta1, beta2, tau) minimising the weighted squared error.
+
+    For every tau in TAU_GRID the betas are one weighted least-squares
+    solve; all of them are solved at once as a stack of 3x3 normal
+    equations and the tau with the smallest error wins.
+    """
+    x = tenor[None, :] / TAU_GRID[:, None]
+    decay = np.exp(-x)
+    slope = -np.expm1(-x) / x
+    basis = np.stack([np.ones_like(x), slope, slope - decay], axis=2)   # (taus, points, 3)
+    root = np.sqrt(weight)
+    basis_w = basis * root[None, :, None]
+    ytm_w = ytm * root
+
+    normal = np.einsum("gpi,gpj->gij", basis_w, basis_w) + 1e-9 * np.eye(3)
+    rhs = np.einsum("gpi,p->gi", basis_w, ytm_w)
+    betas = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    error = ((np.einsum("gpi,gi->gp", basis_w, betas) - ytm_w[None, :]) ** 2).sum(axis=1)
+    best = int(np.argmin(error))
+    return (*betas[best], TAU_GRID[best])
+
+
+def fit_curve(tenor, ytm):
+    """Nelson-Siegel parameters for one bucket's bonds."""
+    bin_tenor, bin_ytm, counts = smooth(tenor, ytm)
+    if len(counts) < MIN_BINS:
+        return float(np.median(ytm)), 0.0, 0.0, 1.0
+    return tuple(float(value) for value in fit_nelson_siegel(bin_tenor, bin_ytm, np.sqrt(counts)))
+
+
+class YieldCurveService:
+    """
+    Fits and evaluates the YieldCurve set.
+
+    fit() loads the live universe once (active, unmatured, not perpetual,
+    with a plausible stored YTM), fits one curve per rating bucket and per
+    issuer type and replaces the stored set. It runs from the
+    fit_yield_curves task after the pricing refresh that follows every
+    analytics refresh and ETL run.
+
+    evaluate() prices any number of (bucket, tenor) pairs against the
+    stored parameters in one vectorized call; evaluate_universe() does that
+    for every live bond against its rating and issuer-type curves and the
+    sovereign curve.
+    """
+
+    SOVEREIGN = (CurveType.ISSUER_TYPE, IssuerType.CENTRAL_GOVERNMENT)
+    CURVE_FIELDS = {
+        CurveType.RATING: "rating_bucket",
+        CurveType.ISSUER_TYPE: "issuer_type",
+    }
+    RATING_BUCKET_NAMES = [name for name, _, _ in RATING_BUCKETS]
+
+    @classmethod
+    def load_universe(cls, today=None):
+        """Arrays (isin_code, tenor, ytm, rating_bucket, issuer_type) for every live bond."""
+        today = today or timezone.now().date()
+        rows = list(
+            ISINBasicInfo.objects.filter(isin_active=True, maturity_date__gt=today)
+            .exclude(prepetual=True)
+            .values_list("isin_code", "maturity_date", "ytm_percent", "current_rating_rank", "issuer_type")
+            .iterator(chunk_size=5000)
+        )
+        rank = np.array([r[3] for r in rows], dtype=np.int64)
+        # RATING_BUCKETS are contiguous, so a bucket is found by its upper
+        # bound; past the last one is UNRATED
+        bounds = np.array([high for _, _, high in RATING_BUCKETS])
+        names = np.array(cls.RATING_BUCKET_NAMES + ["UNRATED"], dtype=object)
+        return {
+            "isin_code": np.array([r[0] for r in rows], dtype=object),
+            "tenor": np.array([(r[1] - today).days for r in rows], dtype=np.float64) / DAYS_PER_YEAR,
+            "ytm": np.array([np.nan if r[2] is None else float(r[2]) for r in rows], dtype=np.float64),
+            "rating_bucket": names[np.searchsorted(bounds, rank)],
+            "issuer_type": np.array([r[4] or "" for r in rows], dtype=object),
+        }
+
+    @classmethod
+    def fit(cls, today=None):
+        """Refit and replace every curve. Returns a summary."""
+        started = time.perf_counter()
+        today = today or timezone.now().date()
+        universe = cls.load_universe(today)
+        loaded = time.perf_counter()
+
+        ytm = universe["ytm"]
+        usable = np.isfinite(ytm) & (ytm > 0) & (ytm <= MAX_YTM)
+        fitted_at = timezone.now()
+        curves = []
+        for curve_type, field in cls.CURVE_FIELDS.items():
+            labels = universe[field]
+            for bucket in sorted(set(labels[usable])):
+                if curve_type == CurveType.ISSUER_TYPE and bucket not in IssuerType.values:
+                    continue
+                mask = usable & (labels == bucket)
+                if mask.sum() < MIN_BONDS:
+                    continue
+                tenor, bucket_ytm = universe["tenor"][mask], ytm[mask]
+                params = fit_curve(tenor, bucket_ytm)
+                residual = bucket_ytm - nelson_siegel(tenor, *params)
+                curves.append(YieldCurve(
+                    curve_type=curve_type, bucket=bucket,
+                    beta0=params[0], beta1=params[1], beta2=params[2], tau=params[3],
+                    bond_count=int(mask.sum()),
+                    rmse_percent=float(np.sqrt(np.mean(residual ** 2))),
+                    min_tenure_years=float(tenor.min()), max_tenure_years=float(tenor.max()),
+                    as_of=today, fitted_at=fitted_at,
+                ))
+        fitted = time.perf_counter()
+
+        with transaction.atomic(using=router.db_for_write(YieldCurve)):
+            YieldCurve.objects.all().delete()
+            YieldCurve.objects.bulk_create(curves)
+
+        finished = time.perf_counter()
+        logger.info(
+            f"Yield curves: {len(curves)} fitted over {int(usable.sum())} bonds, load {loaded - started:.2f}s, "
+            f"fit {fitted - loaded:.3f}s, write {finished - fitted:.3f}s"
+        )
+        return {
+            "curves": len(curves),
+            "bonds": int(usable.sum()),
+            "load_seconds": round(loaded - started, 3),
+            "fit_seconds": round(fitted - loaded, 3),
+            "write_seconds": round(finished - fitted, 3),
+        }
+
+    @classmethod
+    def curves(cls, curve_type=None):
+        """{(curve_type, bucket): YieldCurve} for the stored set."""
+        queryset = YieldCurve.objects.all()
+        if curve_type:
+            queryset = queryset.filter(curve_type=curve_type)
+        return {(curve.curve_type, curve.bucket): curve for curve in queryset}
+
+    @classmethod
+    def evaluate(cls, curve_type, buckets, tenors, curves=None):
+        """
+        Curve yield (percent) for each (bucket, tenor) pair, NaN where the
+        bucket has no curve. `buckets` may also be a single bucket name.
+        """
+        curves = cls.curves(curve_type) if curves is None else curves
+        curve_type = str(curve_type)
+        tenors = np.asarray(tenors, dtype=np.float64)
+        if isinstance(buckets, str):
+            buckets = np.full(tenors.shape, buckets, dtype=object)
+        unique, inverse = np.unique(np.asarray(buckets, dtype=object).astype(str), return_inverse=True)
+
+        # One parameter row per distinct bucket, NaN for buckets without a curve
+        params = np.full((len(unique), 4), np.nan)
+        for i, bucket in enumerate(unique):
+            curve = curves.get((curve_type, bucket))
+            if curve is not None:
+                params[i] = curve.beta0, curve.beta1, curve.beta2, curve.tau
+        selected = params[inverse.reshape(tenors.shape)]
+        return nelson_siegel(tenors, selected[..., 0], selected[..., 1], selected[..., 2], selected[..., 3])
+
+    @classmethod
+    def evaluate_universe(cls, today=None):
+        """
+        load_universe() arrays plus the curve yields of every live bond at
+        its own tenure: "rating_curve", "issuer_curve" and "sovereign".
+        """
+        universe = cls.load_universe(today)
+        curves = cls.curves()
+        tenor = universe["tenor"]
+        universe["rating_curve"] = cls.evaluate(CurveType.RATING, universe["rating_bucket"], tenor, curves)
+        universe["issuer_curve"] = cls.evaluate(CurveType.ISSUER_TYPE, universe["issuer_type"], tenor, curves)
+        universe["sovereign"] = cls.evaluate(cls.SOVEREIGN[0], cls.SOVEREIGN[1], tenor, curves)
+        return universe
@@ -1,11 +1,24 @@
 # G:\bond_platform\Backend\apps\bonds\signals.py
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import ISINBasicInfo, ContactMessage
+from .models import (
+    ISINBasicInfo, ISINRating, ISINDetailedInfo, CompanyInfo, ISINCompanyMap, RTAInfo, ISINRTAMap,
+    FinancialMetric, FinancialMetricValue, RatioAnalysis, RatioValue, KeyFactor, SnapshotDefinition,
+    ContactMessage, DataTransformationLog,
+)
+from django.db import router, transaction
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.conf import settings
 from .services.bond_elastic_service import BondElasticService
+from .services.current_rating_service import CurrentRatingService
+from .services.bond_data_version import BondDataVersion
+from .services.research_document_service import ResearchDocumentService
+from .services.bond_snapshot_service import BondSnapshotService
+from .services.financial_profile_service import FinancialProfileService
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -25,4 +38,108 @@ def send_thank_you_email(sender, instance, created, **kwargs):
         )
         email.content_subtype = "html"  # Important for HTML
         email.send(fail_silently=True)
-        
\ No newline at end of file
+
+
+@receiver(post_save, sender=ISINRating)
+@receiver(post_delete, sender=ISINRating)
+def refresh_current_rating(sender, instance, **kwargs):
+    CurrentRatingService.refresh(instance.isin_id)
+
+
+# Every model the public bond endpoints read from. Writes bump the global
+# BondDataVersion, which invalidates cached responses and in-process indexes.
+CATALOGUE_MODELS = (
+    ISINBasicInfo, ISINRating, ISINDetailedInfo,
+    CompanyInfo, ISINCompanyMap, RTAInfo, ISINRTAMap,
+    FinancialMetric, FinancialMetricValue, RatioAnalysis, RatioValue,
+    KeyFactor, SnapshotDefinition,
+)
+
+
+def bump_bond_data_version(sender, instance, **kwargs):
+    # Journal the ISIN whose catalogue row changed; other models change no
+    # bond-row columns, so the in-process indexes can skip them
+    if sender is ISINBasicInfo:
+        changed = [instance.isin_code]
+    elif sender in (ISINRating, ISINDetailedInfo):
+        changed = [instance.isin_id]
+    else:
+        changed = []
+    BondDataVersion.bump(changed)
+
+
+@receiver(post_save, sender=FinancialMetric)
+@receiver(post_delete, sender=FinancialMetric)
+@receiver(post_save, sender=RatioAnalysis)
+@receiver(post_delete, sender=RatioAnalysis)
+def invalidate_research_document(sender, instance, **kwargs):
+    FinancialProfileService.mark_stale([instance.company_id])
+    ResearchDocumentService.invalidate([instance.company_id])
+    if sender is FinancialMetric:
+        BondSnapshotService.mark_stale(company_ids=[instance.company_id])
+
+
+@receiver(post_save, sender=FinancialMetricValue)
+@receiver(post_delete, sender=FinancialMetricValue)
+def invalidate_research_document_for_metric_value(sender, instance, **kwargs):
+    company_ids = list(FinancialMetric.objects.filter(pk=instance.metric_id).values_list("company_id", flat=True))
+    FinancialProfileService.mark_stale(company_ids)
+    ResearchDocumentService.invalidate(company_ids)
+    BondSnapshotService.mark_stale(company_ids=company_ids)
+
+
+@receiver(post_save, sender=RatioValue)
+@receiver(post_delete, sender=RatioValue)
+def invalidate_research_document_for_ratio_value(sender, instance, **kwargs):
+    company_ids = list(RatioAnalysis.objects.filter(pk=instance.ratio_id).values_list("company_id", flat=True))
+    FinancialProfileService.mark_stale(company_ids)
+    ResearchDocumentService.invalidate(company_ids)
+
+
+# Inputs of BondSnapshotDocument: stale rows are rebuilt by the
+# rebuild_bond_snapshots task or on their next read
+@receiver(post_save, sender=ISINRating)
+@receiver(post_delete, sender=ISINRating)
+@receiver(post_save, sender=ISINCompanyMap)
+@receiver(post_delete, sender=ISINCompanyMap)
+def mark_bond_snapshot_stale(sender, instance, **kwargs):
+    BondSnapshotService.mark_stale(isin_codes=[instance.isin_id])
+
+
+@receiver(post_save, sender=CompanyInfo)
+def mark_company_snapshots_stale(sender, instance, **kwargs):
+    BondSnapshotService.mark_stale(company_ids=[instance.company_id])
+
+
+@receiver(post_save, sender=SnapshotDefinition)
+@receiver(post_delete, sender=SnapshotDefinition)
+def mark_all_snapshots_stale(sender, instance, **kwargs):
+    BondSnapshotService.mark_stale()
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(bump_bond_data_version, sender=model, dispatch_uid=f"bump_bond_data_version_{model.__name__}_save")
+    post_delete.connect(bump_bond_data_version, sender=model, dispatch_uid=f"bump_bond_data_version_{model.__name__}_delete")
+
+
+@receiver(post_save, sender=DataTransformationLog)
+def refresh_derived_data_after_etl(sender, instance, **kwargs):
+    if instance.operation_type != "ETL" or instance.status != "SUCCESS":
+        return
+    from .tasks import (
+        refresh_catalogue_stats, sync_financial_profiles, rebuild_bond_snapshots, refresh_bond_pricing,
+    )
+
+    def enqueue():
+        # Curves are fitted after pricing has stored the YTMs
+        for task in (
+            refresh_catalogue_stats.s(), sync_financial_profiles.s(), rebuild_bond_snapshots.s(),
+            refresh_bond_pricing.s(fit_curves=True),
+        ):
+            try:
+                task.delay()
+            except Exception as e:
+                # Broker down: the periodic beat run catches up
+                logger.warning(f"Could not enqueue {task.name} after ETL run: {e}")
+
+    transaction.on_commit(enqueue, using=router.db_for_write(DataTransformationLog))
@@ -0,0 +1,85 @@
+from celery import shared_task
+
+
+@shared_task
+def refresh_bond_analytics(workers=1):
+    # Prefork worker processes are daemonic and cannot start a process pool,
+    # so keep workers=1 there; --workers is for manage.py refresh_bond_analytics.
+    from apps.bonds.services.bond_analytics_service import BondAnalyticsService
+    result = BondAnalyticsService.refresh(workers=workers)
+    # YTM and yield to worst are solved from the same prices, and the
+    # curves are fitted on those YTMs
+    refresh_bond_pricing.delay(fit_curves=True)
+    return result
+
+
+@shared_task
+def fit_yield_curves():
+    from apps.bonds.services.yield_curve_service import YieldCurveService
+    result = YieldCurveService.fit()
+    # Spreads are measured against the new curves
+    refresh_bond_spreads.delay()
+    return result
+
+
+@shared_task
+def refresh_bond_spreads():
+    from apps.bonds.services.bond_spread_service import BondSpreadService
+    return BondSpreadService.refresh()
+
+
+@shared_task
+def refresh_bond_pricing(fit_curves=False):
+    from apps.bonds.services.bond_pricing_service import BondPricingService
+    result = BondPricingService.refresh()
+    # Post-tax yields are solved for the same trade
+    refresh_post_tax_yields.delay()
+    if fit_curves:
+        fit_yield_curves.delay()
+    return result
+
+
+@shared_task
+def refresh_post_tax_yields():
+    from apps.bonds.services.post_tax_yield_service import PostTaxYieldService
+    return PostTaxYieldService.refresh()
+
+
+@shared_task
+def refresh_catalogue_stats():
+    from apps.bonds.services.catalogue_stats_service import CatalogueStatsService
+    return CatalogueStatsService.refresh().pk
+
+
+@shared_task
+def rebuild_bond_snapshots(full=False):
+    from apps.bonds.services.bond_snapshot_service import BondSnapshotService
+    return BondSnapshotService.rebuild() if full else BondSnapshotService.rebuild_stale()
+
+
+@shared_task
+def sync_financial_profiles(full=False):
+    from apps.bonds.services.financial_profile_service import FinancialProfileService
+    return FinancialProfileService.sync() if full else FinancialProfileService.sync_stale()
+
+
+@shared_task
+def load_bond_data(table, path, key=None):
+    from apps.bonds.services.bond_etl_loader import BondETLLoader
+    return BondETLLoader(BondETLLoader.MODELS[table], key=key).load(path)
+
+
+@shared_task
+def reload_bond_universe(sources, prune=False):
+    # Prefork workers cannot start the loader processes (see refresh_bond_analytics),
+    # so the task loads with one process; use manage.py reload_bond_universe --workers.
+    from apps.bonds.services.bond_universe_reload import BondUniverseReloader
+    return BondUniverseReloader(sources, prune=prune).reload()
+
+
+@shared_task
+def import_bhavcopy(path, trade_date=None, mapping=None, report_path=None):
+    from apps.bonds.services.bhavcopy_importer import BhavcopyImporter
+    import datetime
+    trade_date = datetime.date.fromisoformat(trade_date) if trade_date else None
+    return BhavcopyImporter(mapping=mapping, trade_date=trade_date).run(path, report_path=report_path)
@@ -1,3 +1,350 @@
-from django.test import TestCase
+from django.db import IntegrityError, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from apps.bonds.models import CompanyInfo, ISINBasicInfo, ISINCompanyMap, ISINRating, PostTaxYield
+from apps.bonds.services.bond_calculator_service import BondCalculatorService
+from apps.bonds.services.bond_pricing_service import (
+    BondPricingService, accrued_to, compute_pricing, redemption_flows, solve, price,
+)
+from apps.bonds.services.bond_universe_reload import BondUniverseReloader, shadow_name
+from apps.bonds.services.post_tax_yield_service import post_tax_flows
+from apps.bonds.services.cash_flow_schedule import CashFlowSchedule, CashFlowScheduleService
+from apps.bonds.utils import ACT_365, ACT_ACT, THIRTY_360
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+import csv
+import datetime
+import numpy as np
+import tempfile
 
-# Create your tests here.
+
+def build_schedule(maturity, start, frequency=2, coupon_percent=8.0, face_value=100.0, convention=ACT_ACT,
+                   call_date=None, put_date=None):
+    """One-bond CashFlowSchedule from explicit terms."""
+    dates = np.array([maturity, start, call_date, put_date], dtype="datetime64[D]")
+    return CashFlowSchedule.build(
+        np.array(["TEST"], dtype=object), np.array([None], dtype=object), {
+            "maturity": dates[:1],
+            "start": dates[1:2],
+            "frequency": np.array([frequency], dtype=np.int64),
+            "coupon_rate": np.array([coupon_percent / 100.0]),
+            "face_value": np.array([face_value]),
+            "convention": np.array([convention], dtype=np.int8),
+            "settlement_days": np.array([1], dtype=np.int64),
+            "call_date": dates[2:3],
+            "put_date": dates[3:4],
+        },
+    )
+
+
+def flows_to(schedule, settlement, redemption=None):
+    settlement = np.array([settlement], dtype="datetime64[D]")
+    redemption = schedule.terms["maturity"] if redemption is None else np.array([redemption], dtype="datetime64[D]")
+    return redemption_flows(schedule, schedule.next_flow(settlement), settlement, redemption)
+
+
+def dirty_at(schedule, settlement, yield_percent, redemption=None):
+    frequency = np.maximum(schedule.terms["frequency"], 1).astype(np.float64)
+    return price(flows_to(schedule, settlement, redemption), np.array([yield_percent / 100.0]), frequency, 1)[0]
+
+
+class CashFlowScheduleTests(SimpleTestCase):
+    def test_regular_first_period(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 6, 30))
+        flows = schedule.flows("TEST")
+        self.assertEqual([flow["date"] for flow in flows[:3]], ["2025-12-31", "2026-06-30", "2026-12-31"])
+        self.assertEqual({flow["coupon"] for flow in flows}, {4.0})
+        self.assertEqual(flows[-1], {"date": "2028-06-30", "coupon": 4.0, "principal": 100.0})
+        np.testing.assert_array_equal(schedule.period_start, schedule.accrual_start)
+
+    def test_short_first_period(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30))
+        self.assertEqual(schedule.flows("TEST")[0], {"date": "2025-06-30", "coupon": round(4.0 * 61 / 181, 4), "principal": 0.0})
+        self.assertEqual(str(schedule.accrual_start[0]), "2025-04-30")
+        self.assertEqual(str(schedule.period_start[0]), "2024-12-31")
+
+    def test_short_first_period_30_360(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30), convention=THIRTY_360)
+        self.assertAlmostEqual(schedule.coupon[0], 100.0 * 0.08 * 60 / 360)
+
+    def test_no_long_first_period(self):
+        # There is no first-coupon-date term: a start just after a coupon
+        # date gives an almost full short period, never a long stub
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 7, 1))
+        self.assertEqual(str(schedule.dates[0]), "2025-12-31")
+        self.assertEqual(str(schedule.period_start[0]), "2025-06-30")
+        self.assertAlmostEqual(schedule.coupon[0], 4.0 * 183 / 184)
+
+    def test_end_of_month(self):
+        schedule = build_schedule(datetime.date(2028, 2, 29), datetime.date(2025, 8, 31))
+        self.assertEqual(
+            [str(date) for date in schedule.dates],
+            ["2026-02-28", "2026-08-31", "2027-02-28", "2027-08-31", "2028-02-29"],
+        )
+        self.assertEqual({float(coupon) for coupon in schedule.coupon}, {4.0})
+
+    def test_cumulative(self):
+        schedule = build_schedule(datetime.date(2028, 1, 1), datetime.date(2025, 1, 1), frequency=0)
+        self.assertEqual(schedule.flow_count, 1)
+        self.assertAlmostEqual(schedule.coupon[0], 100.0 * (1.08 ** 3 - 1))
+        self.assertEqual(schedule.principal[0], 100.0)
+
+    def test_zero_coupon(self):
+        schedule = build_schedule(datetime.date(2028, 1, 1), datetime.date(2025, 1, 1), frequency=0, coupon_percent=0.0)
+        self.assertEqual(schedule.flows("TEST"), [{"date": "2028-01-01", "coupon": 0.0, "principal": 100.0}])
+        _, _, tau, amount = flows_to(schedule, datetime.date(2026, 1, 1))
+        # Years to maturity, annual compounding
+        np.testing.assert_allclose(tau, [730 / 365])
+        self.assertAlmostEqual(dirty_at(schedule, datetime.date(2026, 1, 1), 8.0), 100.0 / 1.08 ** 2)
+
+    def test_select_and_concat(self):
+        first = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30))
+        second = build_schedule(datetime.date(2028, 1, 1), datetime.date(2025, 1, 1), frequency=0)
+        both = CashFlowSchedule.concat([first, second])
+        np.testing.assert_array_equal(both.offsets, [0, first.flow_count, first.flow_count + 1])
+        np.testing.assert_array_equal(both.select([0]).period_start, first.period_start)
+        np.testing.assert_array_equal(both.select([1]).coupon, second.coupon)
+
+
+class RedemptionFlowsTests(SimpleTestCase):
+    def test_short_first_coupon_time_is_measured_from_notional_start(self):
+        # Issued 2025-04-30, first coupon 2025-06-30 (short), semi-annual
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30))
+        _, rank, tau, _ = flows_to(schedule, datetime.date(2025, 5, 15))
+        # 46 days left of the regular period 2024-12-31 .. 2025-06-30
+        self.assertAlmostEqual(tau[0], 46 / 181)
+        self.assertTrue((tau > 0).all())
+        np.testing.assert_allclose(np.diff(tau), 1.0)
+        np.testing.assert_array_equal(rank, np.arange(len(rank)))
+
+    def test_short_first_coupon_price(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30))
+        settlement = datetime.date(2025, 5, 15)
+        when = np.array([settlement], dtype="datetime64[D]")
+        # Half the 8% coupon for each regular period, 15 of its 181 days accrued
+        self.assertAlmostEqual(accrued_to(schedule, schedule.next_flow(when), when)[0], 4.0 * 15 / 181)
+        # At the coupon rate the bond prices near par plus accrued
+        self.assertAlmostEqual(dirty_at(schedule, settlement, 8.0), 100.34, places=2)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BondCalculatorTests(SimpleTestCase):
+    TERMS = {
+        "maturity_date": datetime.date(2028, 6, 30),
+        "issue_date": datetime.date(2025, 4, 30),
+        "interest_payment_frequency": "SEMI_ANNUALLY",
+        "coupon_rate_percent": Decimal("8"),
+        "face_value": Decimal("100"),
+    }
+    SETTLEMENT = datetime.date(2025, 5, 15)
+
+    def setUp(self):
+        BondCalculatorService.clear()
+
+    def test_short_first_coupon_yield_to_price(self):
+        result, = BondCalculatorService.calculate(
+            [{"terms": self.TERMS, "settlement_date": self.SETTLEMENT, "yield_percent": Decimal("8")}]
+        )
+        self.assertEqual(result["next_coupon_date"], "2025-06-30")
+        self.assertAlmostEqual(result["accrued_interest"], 4.0 * 15 / 181, places=4)
+        self.assertAlmostEqual(result["dirty_price"], 100.34, places=2)
+        self.assertAlmostEqual(result["dirty_price"] - result["accrued_interest"], result["clean_price"], places=3)
+
+    def test_short_first_coupon_price_yield_round_trip(self):
+        by_yield, = BondCalculatorService.calculate(
+            [{"terms": self.TERMS, "settlement_date": self.SETTLEMENT, "yield_percent": Decimal("9.5")}]
+        )
+        by_price, = BondCalculatorService.calculate(
+            [{"terms": self.TERMS, "settlement_date": self.SETTLEMENT, "price": Decimal(str(by_yield["clean_price"]))}]
+        )
+        self.assertAlmostEqual(by_price["yield_percent"], 9.5, places=3)
+        self.assertAlmostEqual(by_price["dirty_price"], by_yield["dirty_price"], places=4)
+
+
+class PostTaxYieldTests(SimpleTestCase):
+    def post_tax_ytm(self, schedule, settlement, dirty_price, income_percent, gains_percent):
+        when = np.array([settlement], dtype="datetime64[D]")
+        first = schedule.next_flow(when)
+        flows = redemption_flows(schedule, first, when, schedule.terms["maturity"])
+        frequency = schedule.terms["frequency"].astype(np.float64)
+        accrued = accrued_to(schedule, first, when)
+        dirty_price = np.array([dirty_price])
+        net = post_tax_flows(
+            schedule, flows, dirty_price - accrued, accrued, dirty_price,
+            np.array([income_percent / 100.0]), np.array([gains_percent / 100.0]),
+        )
+        return solve(net, dirty_price, frequency, schedule.terms["coupon_rate"], 1)[0] * 100.0
+
+    def test_short_first_coupon(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30))
+        settlement = datetime.date(2025, 5, 15)
+        # Dirty price of the 8% bond at an 8% yield
+        self.assertAlmostEqual(self.post_tax_ytm(schedule, settlement, 100.3429, 0.0, 0.0), 8.0, places=3)
+        # Clean near par, so the gain is negligible and interest is taxed at the slab
+        self.assertAlmostEqual(self.post_tax_ytm(schedule, settlement, 100.3429, 31.2, 13.0), 8.0 * (1 - 0.312), places=2)
+
+    def test_par_bond(self):
+        schedule = build_schedule(datetime.date(2030, 6, 30), datetime.date(2020, 6, 30), frequency=1, coupon_percent=10.0)
+        self.assertAlmostEqual(self.post_tax_ytm(schedule, datetime.date(2025, 6, 30), 100.0, 31.2, 13.0), 6.88, places=6)
+
+
+class PricingTests(SimpleTestCase):
+    def test_call_cuts_flows_at_call_date(self):
+        schedule = build_schedule(datetime.date(2028, 6, 30), datetime.date(2025, 4, 30), call_date=datetime.date(2027, 3, 31))
+        _, rank, tau, amount = flows_to(schedule, datetime.date(2025, 5, 15), datetime.date(2027, 3, 31))
+        np.testing.assert_array_equal(rank, np.arange(5))
+        # 90 of the 181 days of 2026-12-31 .. 2027-06-30 accrued, then par
+        self.assertAlmostEqual(tau[-1], tau[-2] + 90 / 181)
+        self.assertAlmostEqual(amount[-1], 100.0 + 4.0 * 90 / 181)
+
+    def test_yields_to_call_and_put(self):
+        schedule = build_schedule(
+            datetime.date(2032, 6, 30), datetime.date(2025, 4, 30),
+            call_date=datetime.date(2030, 6, 30), put_date=datetime.date(2028, 3, 15),
+        )
+        settlement = np.array([datetime.date(2025, 5, 15)], dtype="datetime64[D]")
+        # Clean price from a 9% yield to maturity
+        accrued = accrued_to(schedule, schedule.next_flow(settlement), settlement)
+        clean = dirty_at(schedule, settlement[0], 9.0) - accrued
+        pricing = compute_pricing(schedule, clean, np.array([np.nan]), settlement)
+        self.assertAlmostEqual(pricing["ytm"][0] * 100.0, 9.0, places=6)
+        for field, name in (("call_date", "yield_to_call_percent"), ("put_date", "yield_to_put_percent")):
+            redemption = schedule.terms[field][0]
+            self.assertAlmostEqual(dirty_at(schedule, settlement[0], pricing[name][0], redemption), clean[0] + accrued[0])
+        # Below par, so an early call yields more than holding to maturity
+        self.assertGreater(pricing["yield_to_call_percent"][0], 9.0)
+        self.assertAlmostEqual(pricing["ytw_percent"][0], 9.0, places=6)
+
+    def test_stored_ytm_matches_yield_to_worst(self):
+        schedule = build_schedule(datetime.date(2029, 3, 31), datetime.date(2024, 3, 31))
+        today = datetime.date(2026, 10, 18)
+
+        def compute(clean, stored_percent):
+            with mock.patch.object(CashFlowScheduleService, "schedules", return_value=schedule), \
+                    mock.patch.object(BondPricingService, "load_prices", return_value=(
+                        np.array([clean]), np.array([stored_percent / 100.0]))):
+                return BondPricingService.compute(today)["TEST"]
+
+        # Stored YTM from a day-count approximation of the same price
+        row = compute(95.0, 10.357)
+        self.assertEqual(row["ytm_percent"], row["ytw_percent"])
+        self.assertNotEqual(row["ytm_percent"], Decimal("10.357"))
+        # Untraded: priced off the stored YTM, which is kept
+        row = compute(np.nan, 10.357)
+        self.assertEqual(row["ytm_percent"], Decimal("10.357"))
+        self.assertEqual(row["ytw_percent"], Decimal("10.357"))
+
+    def test_price_yield_round_trip(self):
+        for schedule in (
+            build_schedule(datetime.date(2035, 3, 31), datetime.date(2025, 1, 20)),
+            build_schedule(datetime.date(2035, 3, 31), datetime.date(2024, 3, 31), frequency=4, convention=ACT_365),
+            build_schedule(datetime.date(2035, 3, 31), datetime.date(2020, 3, 31), frequency=12, convention=THIRTY_360),
+            build_schedule(datetime.date(2030, 3, 31), datetime.date(2024, 3, 31), frequency=0),
+        ):
+            settlement = datetime.date(2025, 2, 3)
+            flows = flows_to(schedule, settlement)
+            frequency = np.maximum(schedule.terms["frequency"], 1).astype(np.float64)
+            for yield_percent in (0.5, 7.25, 14.0):
+                dirty = price(flows, np.array([yield_percent / 100.0]), frequency, 1)
+                solved = solve(flows, dirty, frequency, schedule.terms["coupon_rate"], 1)
+                self.assertAlmostEqual(solved[0] * 100.0, yield_percent, places=6)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BondUniverseReloadTests(TransactionTestCase):
+    """Shadow-table reload against Postgres: swap, validation and reference checks."""
+
+    databases = {"default", "transformation"}
+    TABLES = (ISINRating._meta.db_table, ISINBasicInfo._meta.db_table)
+    BONDS = {
+        "INE000A07001": ("Alpha 8% 2030", "8.000", "2030-03-31"),
+        "INE000B07002": ("Beta 9% 2031", "9.000", "2031-06-30"),
+        "INE000C07003": ("Gamma 10% 2032", "10.000", "2032-09-30"),
+    }
+
+    def setUp(self):
+        # The derived-data tasks queued after a successful run are not under test
+        patcher = mock.patch("celery.app.task.Task.apply_async")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        for code, (description, coupon, maturity) in self.BONDS.items():
+            bond = ISINBasicInfo.objects.create(
+                isin_code=code, isin_description=description, coupon_rate_percent=Decimal(coupon),
+                maturity_date=datetime.date.fromisoformat(maturity), face_value_rs=Decimal("1000"),
+            )
+            ISINRating.objects.create(isin=bond, rating_agency="CRISIL", credit_rating="AA",
+                                      rating_date=datetime.date(2025, 1, 1))
+        company = CompanyInfo.objects.create(issuer_name="Gamma Finance")
+        ISINCompanyMap.objects.create(isin_id="INE000C07003", company=company)
+        PostTaxYield.objects.create(isin_id="INE000C07003", slab="30", post_tax_ytm_percent=Decimal("7.000"))
+        self.reloader = BondUniverseReloader({})
+
+    def sources(self, codes, coupon=None):
+        """CSV sources for `codes`, optionally with every coupon replaced."""
+        basic, rating = self.directory / "isin_basic_info.csv", self.directory / "isin_rating.csv"
+        with open(basic, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["isin_code", "isin_description", "coupon_rate_percent", "maturity_date", "face_value_rs"])
+            for code in codes:
+                description, stored_coupon, maturity = self.BONDS[code]
+                writer.writerow([code, description, coupon or stored_coupon, maturity, "1000"])
+        with open(rating, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["isin", "rating_agency", "credit_rating", "rating_date"])
+            for code in codes:
+                writer.writerow([code, "ICRA", "AAA", "2026-01-01"])
+        return {ISINBasicInfo._meta.db_table: basic, ISINRating._meta.db_table: rating}
+
+    def structures(self):
+        return {table: self.reloader.structure(table) for table in self.TABLES}
+
+    def shadows(self):
+        with connections["transformation"].cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [shadow_name(table) for table in self.TABLES])
+            return [name for name in cursor.fetchone() if name is not None]
+
+    def test_swap_keeps_structure(self):
+        before = self.structures()
+        counts = BondUniverseReloader(self.sources(self.BONDS, coupon="7.500")).reload()
+
+        self.assertEqual(counts["inserted"], 6)
+        self.assertEqual(self.structures(), before)
+        self.assertEqual(self.shadows(), [])
+        self.assertEqual(set(ISINBasicInfo.objects.values_list("coupon_rate_percent", flat=True)), {Decimal("7.5")})
+        # Current rating columns come from the reloaded ratings
+        self.assertEqual(set(ISINBasicInfo.objects.values_list("current_rating", "current_rating_agency")), {("AAA", "ICRA")})
+        # The references of other tables are back in force
+        self.assertEqual(ISINCompanyMap.objects.count(), 1)
+        with self.assertRaises(IntegrityError):
+            PostTaxYield.objects.create(isin_id="INE000X07000", slab="30", post_tax_ytm_percent=Decimal("7.000"))
+        # The identity sequence carries on after the copied rows
+        rating = ISINRating.objects.create(isin_id="INE000A07001", rating_agency="CARE", credit_rating="AA")
+        self.assertGreater(rating.pk, max(ISINRating.objects.exclude(pk=rating.pk).values_list("pk", flat=True)))
+
+    def test_dangling_references_block_swap(self):
+        sources = self.sources(["INE000A07001", "INE000B07002"])
+        with self.assertRaisesRegex(ValueError, "reference ISINs missing"):
+            BondUniverseReloader(sources).reload()
+        self.assertEqual(self.shadows(), [])
+        self.assertEqual(ISINBasicInfo.objects.count(), 3)
+        self.assertEqual(ISINRating.objects.filter(rating_agency="CRISIL").count(), 3)
+
+        BondUniverseReloader(sources, prune=True).reload()
+        self.assertEqual(set(ISINBasicInfo.objects.values_list("isin_code", flat=True)), {"INE000A07001", "INE000B07002"})
+        self.assertFalse(ISINCompanyMap.objects.exists())
+        self.assertFalse(PostTaxYield.objects.exists())
+        self.assertEqual(CompanyInfo.objects.count(), 1)
+
+    def test_failed_run_drops_shadows(self):
+        before = self.structures()
+        # One bond of three is below the 50% minimum
+        with self.assertRaisesRegex(ValueError, "refusing to swap"):
+            BondUniverseReloader(self.sources(["INE000A07001"]), prune=True).reload()
+        self.assertEqual(self.shadows(), [])
+        self.assertEqual(self.structures(), before)
+        self.assertEqual(ISINBasicInfo.objects.count(), 3)
+        self.assertEqual(ISINCompanyMap.objects.count(), 1)
@@ -10,9 +10,13 @@ urlpatterns = [
     path('bond/research-data/',BondResearchDataView.as_view(), name='bond-research-data'),
     path('bond/snapshot/',BondSnapshotView.as_view(), name='bond-snapshot'),
     path('bond/',BondDetailView.as_view(), name='bond-detail'),
+    path('bonds/facets/', BondFacetsView.as_view(), name='bond-facets'),
     path('bonds/search/', BondSearchORMListView.as_view(), name='bond-search'),
     path('similar-bonds/',SimilarBondsView.as_view(), name='similar-bonds'),
+    path('yield-curves/', YieldCurveView.as_view(), name='yield-curves'),
+    path('calculator/', BondCalculatorView.as_view(), name='bond-calculator'),
     path('contact/', ContactMessageView.as_view(), name='contact'),
+    path('cache-stats/', BondResponseCacheStatsView.as_view(), name='bond-cache-stats'),
     
     
 ]
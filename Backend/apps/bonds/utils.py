@@ -20,3 +20,129 @@ RATING_DESCRIPTIONS = {
     "C": "Extremely high risk, default imminent",
     "D": "Default / Payment failure",
 }
+
+
+# ============================================
+# RATING HIERARCHY - Synced with CreditRating Model
+# ============================================
+RATING_ORDER = {
+    "AAA": 1,
+    "AA+": 2,
+    "AA": 3,
+    "AA-": 4,
+    "A+": 5,
+    "A": 6,
+    "A-": 7,
+    "BBB+": 8,
+    "BBB": 9,
+    "BBB-": 10,   # Investment grade cutoff
+    "BB+": 11,
+    "BB": 12,
+    "BB-": 13,
+    "B+": 14,
+    "B": 15,
+    "B-": 16,
+    "C": 17,
+    "D": 18,
+    "UNRATED": 999,  # Lowest priority
+}
+
+UNRATED_RANK = RATING_ORDER["UNRATED"]
+
+# Investment grade threshold
+INVESTMENT_GRADE_THRESHOLD = 10  # BBB- and above
+
+# current_rating_rank -> rating bucket: (bucket, lowest rank, highest rank);
+# anything else (999) is "UNRATED"
+RATING_BUCKETS = (
+    ("AAA", 1, 1),
+    ("AA", 2, 4),
+    ("A", 5, 7),
+    ("BBB", 8, INVESTMENT_GRADE_THRESHOLD),
+    ("BELOW_BBB", INVESTMENT_GRADE_THRESHOLD + 1, 18),
+)
+
+
+def normalize_rating(value):
+    """
+    Normalize a stored credit rating to the RATING_ORDER key.
+    Source data mixes choice values ("AA+") and enum names ("AA_PLUS").
+    """
+    if not value:
+        return "UNRATED"
+    value = str(value).upper().strip()
+    if value.endswith("_PLUS"):
+        value = value[:-5] + "+"
+    elif value.endswith("_MINUS"):
+        value = value[:-6] + "-"
+    return value if value in RATING_ORDER else "UNRATED"
+
+
+def get_rating_rank(value):
+    """Integer rank for a credit rating (1 = AAA, 999 = unrated / unknown)."""
+    return RATING_ORDER[normalize_rating(value)]
+
+
+# ============================================
+# COUPON FREQUENCY - payments per year
+# ============================================
+# Source data mixes "Semi-Annual", "HALF_YEARLY", "Annually" ... ;
+# 0 = cumulative (interest compounded and paid at maturity)
+PAYMENTS_PER_YEAR = {
+    "MONTHLY": 12,
+    "QUARTERLY": 4,
+    "SEMI_ANNUAL": 2,
+    "SEMI_ANNUALLY": 2,
+    "HALF_YEARLY": 2,
+    "ANNUAL": 1,
+    "ANNUALLY": 1,
+    "YEARLY": 1,
+    "CUMULATIVE": 0,
+    "AT_MATURITY": 0,
+}
+
+
+def get_payments_per_year(value):
+    """Coupon payments per year for a stored frequency, or None if unknown."""
+    if not value:
+        return None
+    key = str(value).upper().strip().replace("-", "_").replace(" ", "_")
+    return PAYMENTS_PER_YEAR.get(key)
+
+
+# ============================================
+# DAY COUNT CONVENTION / SETTLEMENT CYCLE
+# ============================================
+# Codes used by the vectorized schedule engine (cash_flow_schedule)
+ACT_ACT = 0
+ACT_365 = 1
+THIRTY_360 = 2
+
+DAY_COUNT_CONVENTIONS = {
+    "ACTUAL/ACTUAL": ACT_ACT,
+    "ACT/ACT": ACT_ACT,
+    "ACTUAL/ACTUAL_(ICMA)": ACT_ACT,
+    "ACTUAL/365": ACT_365,
+    "ACT/365": ACT_365,
+    "ACTUAL/365_FIXED": ACT_365,
+    "30/360": THIRTY_360,
+    "30E/360": THIRTY_360,
+}
+
+
+def get_day_count_convention(value, default=ACT_ACT):
+    """Day count code for a stored convention; unknown / missing -> `default`."""
+    if not value:
+        return default
+    key = str(value).upper().strip().replace(" ", "_")
+    return DAY_COUNT_CONVENTIONS.get(key, default)
+
+
+def get_settlement_days(value, default=1):
+    """Business days to settlement for a stored cycle ("T+1" -> 1); unknown -> `default`."""
+    if not value:
+        return default
+    key = str(value).upper().replace(" ", "")
+    if key.startswith("T+") and key[2:].isdigit():
+        return int(key[2:])
+    return 0 if key == "T" else default
@@ -1,56 +1,74 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import generics, filters
+from rest_framework import generics
 from django.shortcuts import get_object_or_404
-from .models import ISINBasicInfo,ISINRating,FinancialMetricValue,RatioValue,ISINCompanyMap,ISINRTAMap,SnapshotDefinition
-from .serializers import(ISINBasicInfoSerializer,RatioAnalysisSerializer,FinancialMetricSerializer,KeyFactorSerializer,
- ISINCompanyMapSerializer,ISINRTAMapSerializer,ISINRTAMapSerializer,ContactMessageSerializer,SnapshotItemSerializer)
-from django.db.models import F, ExpressionWrapper, FloatField, Func, Subquery, OuterRef
-from django.db.models.functions import  Now, Extract
+from django.core.exceptions import ValidationError
+from .models import ISINBasicInfo,ISINRating,ISINCompanyMap,ISINRTAMap,CurveType
+from .serializers import(ISINBasicInfoSerializer,KeyFactorSerializer,
+ ISINCompanyMapSerializer,ISINRTAMapSerializer,ISINRTAMapSerializer,ContactMessageSerializer,SnapshotItemSerializer,
+ CalculatorScenarioSerializer,CalculatorRequestSerializer)
+from django.db.models import Case, When, Value, IntegerField, F
+from django.db.models.functions import  Now
 from datetime import date
 from django.db.models import Prefetch
 from django.utils.decorators import method_decorator
 # from silk.profiling.profiler import silk_profile
 from django_filters.rest_framework import DjangoFilterBackend
-from .filters import BondFilter
-from django.core.cache import cache
+from .filters import BondFilter, TenureOrderingFilter
+from .pagination import BondCursorPagination,BondKeysetPagination
+from django.conf import settings
 from rest_framework import status
 from .services.bond_elastic_service import BondElasticService
-from decimal import Decimal
-from .utils import RATING_DESCRIPTIONS
-from rest_framework.permissions import AllowAny
+from .services.bond_search_service import BondSearchService
+from .services.bond_universe_snapshot import BondUniverseSnapshot, SnapshotPage
+from .services.bond_similarity_index import BondSimilarityIndex
+from .services.response_cache_service import ResponseCacheService, versioned_response_cache
+from .services.cached_compute import cached_compute
+from .services.catalogue_stats_service import CatalogueStatsService
+from .services.research_document_service import ResearchDocumentService
+from .services.bond_snapshot_service import BondSnapshotService
+from .services.bond_data_version import BondDataVersion
+from .services.yield_curve_service import YieldCurveService, nelson_siegel
+from .services.bond_calculator_service import BondCalculatorService
+from .services.bond_facet_service import BondFacetService
+from rest_framework.permissions import AllowAny, IsAdminUser
 from apps.utils.swagger_base import SwaggerParamAPIView
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema 
-
-
-from django.db.models import Case, When, Value, IntegerField, F, FloatField, Subquery, OuterRef, ExpressionWrapper, Prefetch
-from django.db.models.functions import Now, Extract
-from rest_framework import generics, filters
-from rest_framework.permissions import AllowAny
-from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import OpenApiParameter
-from django_filters.rest_framework import DjangoFilterBackend
-
-from .models import ISINBasicInfo, ISINRating
-from .serializers import ISINBasicInfoSerializer
-from .filters import BondFilter
-from .pagination import BondCursorPagination,BondSkipTakePagination
-from django.db.models import Q
+import numpy as np
 
 # Create your views here.
 
+# Latest rating is read from the denormalized current_rating* columns
+# (maintained by CurrentRatingService) instead of a per-row ISINRating subquery.
+CURRENT_RATING_ANNOTATIONS = {
+    "latest_rating": F("current_rating"),
+    "latest_agency": F("current_rating_agency"),
+}
+
 class StatsView(SwaggerParamAPIView):
+    """
+    Homepage catalogue totals, read from the precomputed CatalogueStats row
+    (refreshed by Celery beat and after ETL runs, see CatalogueStatsService).
+    """
     permission_classes = [AllowAny]
+    @versioned_response_cache("stats", ttl=60 * 5, stale_on_write=True)
     def get(self, request):
+        stats = CatalogueStatsService.current()
         data = {
-            "totalIssuers": ISINBasicInfo.objects.values('issuer_name').distinct().count(),
-            "totalCustomers": "1000",
-            "totalBonds": ISINBasicInfo.objects.count(),
-            "totalBonds": 10000,
-            "stableReturnPercent": 50
+            "totalIssuers": stats.issuers,
+            "totalCustomers": stats.total_customers,
+            "totalBonds": stats.active_bonds,
+            "stableReturnPercent": 50,
+            "avgYtmPercent": stats.avg_ytm_percent,
+            "totalIssueSizeLakhs": stats.issue_size_lakhs,
+            "byRating": stats.by_rating,
+            "byMaturity": stats.by_maturity,
+            "byIssuerType": stats.by_issuer_type,
+            "computedAt": stats.computed_at,
         }
         return Response(data)
 
+
 class BondSearchORMListView(SwaggerParamAPIView, generics.ListAPIView):
     """
     Search bonds by ISIN or issuer name using pure ORM.
@@ -63,59 +81,36 @@ class BondSearchORMListView(SwaggerParamAPIView, generics.ListAPIView):
     ]
 
     serializer_class = ISINBasicInfoSerializer
-    pagination_class = BondSkipTakePagination
+    pagination_class = BondKeysetPagination
 
     def get_queryset(self):
         isin = self.request.query_params.get('isin')
         issuer_name = self.request.query_params.get('issuerName')
         query = self.request.query_params.get("q")
       
-        # Prefetch ratings
-        ratings_prefetch = Prefetch(
-            "ratings",
-            queryset=ISINRating.objects.order_by("rating_agency", "-rating_date"),
-            to_attr="latest_ratings"
-        )
-
-        # ✅ FIX: Add both tenure_days and tenure_years
         queryset = ISINBasicInfo.objects.select_related("detailed_info").annotate(
-            tenure_days=ExpressionWrapper(
-                Extract(F('maturity_date') - Now(), 'epoch') / (24 * 60 * 60),
-                output_field=FloatField()
-            ),
-            tenure_years=ExpressionWrapper(  # ✅ Added this to match BondsListView
-                Extract(F('maturity_date') - Now(), 'epoch') / (365.25 * 24 * 60 * 60),
-                output_field=FloatField()
-            ),
-            latest_rating=Subquery(
-                ISINRating.objects.filter(isin=OuterRef('pk'))
-                .order_by('-rating_date')
-                .values('credit_rating')[:1]
-            ),
-            latest_agency=Subquery(
-                ISINRating.objects.filter(isin=OuterRef('pk'))
-                .order_by('-rating_date')
-                .values('rating_agency')[:1]
-            ),
+            **CURRENT_RATING_ANNOTATIONS,
             priority=Value(1, output_field=IntegerField()),
-        ).prefetch_related(ratings_prefetch).filter(isin_active=True)
+        ).filter(isin_active=True)
 
         # ✅ REMOVE ALREADY MATURED BONDS
         queryset = queryset.filter(maturity_date__gte=Now())
 
         # Apply filters
-        if query:
-            queryset = queryset.filter(
-                Q(isin_code__iexact=query) |
-                Q(issuer_name__icontains=query)
-            )
+        # (ISINs are stored upper-case; contains/icontains are served by the trigram indexes)
         if isin:
-            queryset = queryset.filter(isin_code__icontains=isin)
+            queryset = queryset.filter(isin_code__contains=isin.strip().upper())
         if issuer_name:
             queryset = queryset.filter(issuer_name__icontains=issuer_name)
 
         # ✅ Ensure ordering consistency with BondsListView
-        queryset = queryset.order_by('priority', 'tenure_days', 'tenure_years', 'isin_code')
+        # (remaining tenure sorts exactly like maturity_date, which is indexed)
+        ordering = ('priority', 'maturity_date', 'isin_code')
+        if query:
+            # Fuzzy / prefix search, most relevant first
+            queryset = BondSearchService.search(queryset, query)
+            ordering = ('-relevance',) + ordering
+        queryset = queryset.order_by(*ordering)
 
         return queryset
 
@@ -125,7 +120,7 @@ class HomePageFeaturedBonds(SwaggerParamAPIView):
         Returns a list of featured bonds for the homepage.
         Bonds are sorted by issue_date descending.
         Supports a 'limit' query param to specify number of bonds (default 5, max 100).
-        Caches results for 5 minutes.
+        Caches results for 5 minutes (stale-while-revalidate, see cached_compute).
     """
     permission_classes = [AllowAny]
     swagger_parameters = [
@@ -139,35 +134,22 @@ class HomePageFeaturedBonds(SwaggerParamAPIView):
         except (ValueError, TypeError):
             limit = 5 
 
-        cache_key = f"home_featured_bonds_{limit}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-
-        # Subquery to get latest rating (credit_rating + agency) for each bond
-        latest_rating_qs = ISINRating.objects.filter(
-            isin=OuterRef("pk")
-        ).order_by("-rating_date")
-
-        featured_bonds = (
-            ISINBasicInfo.objects.select_related("detailed_info").annotate(
-                latest_rating=Subquery(latest_rating_qs.values("credit_rating")[:1]),
-                latest_agency=Subquery(latest_rating_qs.values("rating_agency")[:1]),
+        def featured():
+            featured_bonds = (
+                ISINBasicInfo.objects.select_related("detailed_info").annotate(
+                    **CURRENT_RATING_ANNOTATIONS,
+                )
+                .filter(maturity_date__gte=Now())
+                .order_by("-issue_date")[:min(limit, 100)]
             )
-            .filter(maturity_date__gte=Now())
-            .order_by("-issue_date")[:min(limit, 100)]
-        
-            
-        )
-        serializer = ISINBasicInfoSerializer(featured_bonds, many=True)
-        cache.set(cache_key, serializer.data, 60 * 5)  # cache 5 min
-        return Response(serializer.data)
-
-
-class ExtractEpoch(Func):
-    function = 'EXTRACT'
-    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+            return ISINBasicInfoSerializer(featured_bonds, many=True).data
 
+        # Fresh for 5 min; after that (or after a catalogue write) the old list
+        # is served while one request rebuilds it
+        data = cached_compute(
+            f"home_featured_bonds_{limit}", featured, ttl=60 * 5, stale_ttl=60 * 60, version=BondDataVersion.get()
+        )
+        return Response(data)
 
 
 class BondsListView(generics.ListAPIView):
@@ -177,50 +159,24 @@ class BondsListView(generics.ListAPIView):
     """
     permission_classes = [AllowAny]
     serializer_class = ISINBasicInfoSerializer
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TenureOrderingFilter]
     filterset_class = BondFilter
-    ordering_fields = ['priority', 'tenure_days', 'tenure_years', 'ytm_percent','issue_date']
-    pagination_class = BondSkipTakePagination
+    ordering_fields = ['priority', 'tenure_days', 'tenure_years', 'ytm_percent','issue_date', 'gsec_spread_bps', 'rating_spread_bps', 'ytw_percent', 'post_tax_ytm_percent']
+    pagination_class = BondKeysetPagination
 
     swagger_parameters = [
         OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Prioritize by ISIN"),
         OpenApiParameter("issuer_name", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Prioritize by Issuer Name"),
-        OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Sort by 'priority', 'tenure_days', 'tenure_years' or 'ytm_percent'"),
+        OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Sort by 'priority', 'tenure_days', 'tenure_years', 'ytm_percent', 'ytw_percent', 'gsec_spread_bps', 'rating_spread_bps' or 'post_tax_ytm_percent' (for tax_slab)"),
     ]
 
     def get_queryset(self):
-        ratings_prefetch = Prefetch(
-            "ratings",
-            queryset=ISINRating.objects.order_by("rating_agency", "-rating_date"),
-            to_attr="latest_ratings"
-        )
-
         # Base queryset with default annotations
         queryset = (
             ISINBasicInfo.objects.select_related("detailed_info").annotate(
-                tenure_days=ExpressionWrapper(
-                    Extract('maturity_date', 'epoch') - Extract(Now(), 'epoch'),
-                    output_field=FloatField()
-                ) / (24 * 60 * 60),
-
-                tenure_years=ExpressionWrapper(
-                    ExtractEpoch(F('maturity_date') - Now()) / (365.25 * 24 * 60 * 60),
-                    output_field=FloatField()
-                ),
-
-                latest_rating=Subquery(
-                    ISINRating.objects.filter(isin=OuterRef('pk'))
-                    .order_by('-rating_date')
-                    .values('credit_rating')[:1]
-                ),
-                latest_agency=Subquery(
-                    ISINRating.objects.filter(isin=OuterRef('pk'))
-                    .order_by('-rating_date')
-                    .values('rating_agency')[:1]
-                ),
+                **CURRENT_RATING_ANNOTATIONS,
                 priority=Value(1, output_field=IntegerField()),  # default priority
             )
-            .prefetch_related(ratings_prefetch)
             .filter(isin_active=True)
         )
 
@@ -250,16 +206,13 @@ class BondsListView(generics.ListAPIView):
                     output_field=IntegerField()
                 )
             )
-        if query:
-            queryset = queryset.filter(
-                Q(isin_code__iexact=query) |
-                Q(issuer_name__icontains=query)
-            )
         # ✅ Order by priority first, then other fields
-        queryset = queryset.order_by('priority', 'tenure_days', 'tenure_years', 'ytm_percent', 'isin_code','issue_date')
-
-        # ✅ Ensure pagination respects ordering
-        self.pagination_class.ordering = ['priority', 'tenure_days', 'tenure_years', 'ytm_percent', 'isin_code','issue_date']
+        # (tenure ordering = maturity_date ordering, served by the catalogue index)
+        ordering = ('priority', 'maturity_date', 'ytm_percent', 'isin_code')
+        if query:
+            queryset = BondSearchService.search(queryset, query)
+            ordering = ('-relevance',) + ordering
+        queryset = queryset.order_by(*ordering)
 
         return queryset
     
@@ -274,17 +227,58 @@ class BondsListView(generics.ListAPIView):
 
         # Handle custom sorting for issue_date
         if ordering == "issue_date":
-            return queryset.order_by(
+            queryset = queryset.order_by(
                 F("issue_date").asc(nulls_last=True)
             )
 
-        if ordering == "-issue_date":
-            return queryset.order_by(
+        elif ordering == "-issue_date":
+            queryset = queryset.order_by(
                 F("issue_date").desc(nulls_last=True)
             )
 
-        # For all other fields, DRF OrderingFilter already handled it
-        return queryset
+        # For all other fields, DRF OrderingFilter already handled it.
+        # isin_code tie-breaker keeps skip/take pages stable and identical to cursor pages.
+        return queryset.order_by(*queryset.query.order_by, "isin_code")
+
+    @versioned_response_cache("bond-list")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        # A per-process cache never sees version bumps from Celery, so the
+        # snapshot could not tell it is stale
+        if settings.BOND_UNIVERSE_SNAPSHOT_ENABLED and BondDataVersion.shared():
+            response = self.list_from_snapshot(request)
+            if response is not None:
+                return response
+        return super().list(request, *args, **kwargs)
+
+    # Params that change matching / priority in ways only SQL handles
+    SQL_ONLY_PARAMS = ("isin", "issuer_name", "q", BondKeysetPagination.cursor_query_param)
+
+    def list_from_snapshot(self, request):
+        """
+        Serve the page from the in-process BondUniverseSnapshot.
+        Returns None (→ SQL path) when the snapshot is stale or the request
+        uses anything the snapshot cannot evaluate.
+        """
+        if any(param in request.query_params for param in self.SQL_ONLY_PARAMS):
+            return None
+        snapshot = BondUniverseSnapshot.current()
+        if snapshot is None:
+            return None
+
+        # Built but never executed: validates params and yields the final ordering
+        queryset = self.get_queryset()
+        ordering = self.filter_queryset(queryset).query.order_by
+        filterset = self.filterset_class(request.query_params, queryset=queryset, request=request)
+        isin_codes = snapshot.query(filterset, ordering)
+        if isin_codes is None:
+            return None
+
+        page = self.paginate_queryset(SnapshotPage(queryset, isin_codes))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class BondDetailView(SwaggerParamAPIView):
@@ -295,6 +289,7 @@ class BondDetailView(SwaggerParamAPIView):
     OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, description="ISIN code of the bond to fetch details")
     ]
 
+    @versioned_response_cache("bond-detail")
     def get(self, request):
         isin_code = request.GET.get("isin")
         bond = get_object_or_404(
@@ -337,16 +332,18 @@ class BondDetailView(SwaggerParamAPIView):
 
 class SimilarBondsView(SwaggerParamAPIView):
     """
-    Returns bonds similar to a given ISIN based on:
-    - Latest credit rating
-    - YTM (±0.5% tolerance by default)
+    Returns the bonds most similar to a given ISIN, nearest first.
+    Similarity is a weighted distance over ytm, rating, remaining tenure,
+    coupon, issuer type, secured and tax category (BondSimilarityIndex);
+    each result carries its `similarity_distance` (0 = identical).
     Supports optional 'limit' query parameter.
     """
     permission_classes = [AllowAny]
     swagger_parameters = [
     OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, description="ISIN code to find similar bonds"),
-    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Maximum number of results (default: 50)")
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Maximum number of results (default: 50, max: 100)")
     ]
+    MAX_LIMIT = 100
 
     def get(self, request):
         isin_code = request.query_params.get("isin")
@@ -355,56 +352,27 @@ class SimilarBondsView(SwaggerParamAPIView):
             limit = int(limit)
         except ValueError:
             return Response({"error": "Limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit > self.MAX_LIMIT:
+            return Response({"error": f"Limit must be at most {self.MAX_LIMIT}"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(0, limit)
 
         if not isin_code:
             return Response({"error": "ISIN is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            bond = ISINBasicInfo.objects.get(isin_code=isin_code, isin_active=True)
-        except ISINBasicInfo.DoesNotExist:
+        matches = BondSimilarityIndex.search(isin_code, limit)
+        if matches is None:
             return Response({"error": "Bond not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Get latest rating for base bond
-        latest_rating = ISINRating.objects.filter(isin=bond).order_by('-rating_date').first()
-        rating_value = latest_rating.credit_rating if latest_rating else None
-
-        # YTM tolerance
-        ytm_tolerance = Decimal("0.5")  # Convert tolerance to Decimal
-        ytm_min = (bond.ytm_percent or Decimal("0")) - ytm_tolerance
-        ytm_max = (bond.ytm_percent or Decimal("0")) + ytm_tolerance
+        bonds = ISINBasicInfo.objects.select_related("detailed_info").annotate(
+            **CURRENT_RATING_ANNOTATIONS,
+        ).in_bulk([code for code, _ in matches])
+        matches = [(bonds[code], distance) for code, distance in matches if code in bonds]
 
-        # Annotate latest rating to avoid join duplication
-        latest_rating_subquery = Subquery(
-            ISINRating.objects.filter(isin=OuterRef('pk')).order_by('-rating_date').values('credit_rating')[:1]
-        )
-
-        similar_bonds_qs = ISINBasicInfo.objects.select_related("detailed_info").annotate(
-            latest_rating=latest_rating_subquery,
-            tenure_days=ExpressionWrapper(
-                Extract(F('maturity_date') - Now(), 'epoch') / (24 * 60 * 60),
-                output_field=FloatField()
-            )
-        ).filter(
-            isin_active=True,
-            ytm_percent__gte=ytm_min,
-            ytm_percent__lte=ytm_max
-        ).exclude(isin_code=isin_code)
-        similar_bonds_qs = similar_bonds_qs.filter(tenure_days__gte=0)
-        
-        if rating_value:
-            similar_bonds_qs = similar_bonds_qs.filter(maturity_date__gte=Now())
-        
-        # Prefetch ratings for serializer
-        similar_bonds_qs = similar_bonds_qs.prefetch_related(
-            Prefetch(
-                "ratings",
-                queryset=ISINRating.objects.order_by("-rating_date"),
-                to_attr="latest_ratings"
-            )
-        )[:limit]
-        
-        serializer = ISINBasicInfoSerializer(similar_bonds_qs, many=True)
-        return Response(serializer.data)
+        serializer = ISINBasicInfoSerializer([bond for bond, _ in matches], many=True)
+        data = serializer.data
+        for item, (_, distance) in zip(data, matches):
+            item["similarity_distance"] = round(distance, 4)
+        return Response(data)
 
 
 class BondResearchDataView(SwaggerParamAPIView):
@@ -416,49 +384,26 @@ class BondResearchDataView(SwaggerParamAPIView):
     OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, description="ISIN code of the bond to fetch research data")
 ]
 
+    @versioned_response_cache("bond-research-data")
     def get(self, request):
         isin_code = request.GET.get("isin")
-        bond = get_object_or_404(ISINBasicInfo, isin_code=isin_code)
 
         # Step 1: Get the company mapped to this ISIN
-        company = (
-            bond.company_mappings.filter(primary_company=True)
-            .select_related("company")
-            .prefetch_related(
-                Prefetch(
-                    "company__financial_metrics__values",
-                    queryset=FinancialMetricValue.objects.order_by("-year"),
-                ),
-                Prefetch(
-                    "company__ratio_analyses__values",
-                    queryset=RatioValue.objects.order_by("-year"),
-                ),
-                # "company__key_factors"
-            )
+        company_id = (
+            ISINCompanyMap.objects.filter(isin_id=isin_code, primary_company=True)
+            .values_list("company_id", flat=True)
             .first()
         )
-
-        if not company:
+        if company_id is None:
+            get_object_or_404(ISINBasicInfo, isin_code=isin_code)
             return Response(
                 {"error": "No company mapping found for this ISIN"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        company = company.company  # actual CompanyInfo instance
-
-        # Step 2: Serialize related company data
-        data = {
-            "financialMetrics": FinancialMetricSerializer(
-                company.financial_metrics.all(), many=True
-            ).data,
-            "ratioAnalysis": RatioAnalysisSerializer(
-                company.ratio_analyses.all(), many=True
-            ).data,
-            # "keyFactors": KeyFactorSerializer(
-            #     company.key_factors, many=False
-            # ).data if hasattr(company, "key_factors") else None,
-        }
-
+        # Step 2: Metrics and ratios with their last years, one query per
+        # company, cached until the company's research rows change
+        data = ResearchDocumentService.get(company_id)
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -472,57 +417,166 @@ class BondSnapshotView(SwaggerParamAPIView):
     OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, description="ISIN code of the bond for snapshot")
 ]
 
+    @versioned_response_cache("bond-snapshot")
     def get(self, request):
         isin_code = request.GET.get("isin")
         if not isin_code:
             return Response({"error": "ISIN code required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        bond = get_object_or_404(
-            ISINBasicInfo.objects.prefetch_related(
-                Prefetch(
-                    "ratings",
-                    queryset=ISINRating.objects.order_by('rating_agency', '-rating_date'),
-                    to_attr="all_ratings"
-                ),
-                Prefetch(
-                    "company_mappings__company__financial_metrics__values",
-                    queryset=FinancialMetricValue.objects.order_by("-year"),
-                ),
-                "company_mappings__company"
-            ),
-            isin_code=isin_code
-        )
-
-        company_mapping = next((cm for cm in bond.company_mappings.all() if cm.primary_company), None)
-        if not company_mapping:
+        # Materialized by BondSnapshotService (ratings + SnapshotDefinition metrics)
+        document = BondSnapshotService.get(isin_code)
+        if document is None:
+            get_object_or_404(ISINBasicInfo, isin_code=isin_code)
             return Response({"error": "No primary company mapping found for this ISIN"}, status=404)
 
-        company = company_mapping.company
-        snapshot = []
+        serializer = SnapshotItemSerializer(document["snapshot"], many=True)
+        return Response({"company": document["company"], "snapshot": serializer.data}, status=status.HTTP_200_OK)
 
-        # ---- Credit Ratings ----
-        latest_ratings = {}
-        for rating in bond.all_ratings:
-            if rating.rating_agency not in latest_ratings:
-                latest_ratings[rating.rating_agency] = rating.credit_rating
 
-        rating_str = "; ".join(
-            [f"[{agency}] {rating} ({RATING_DESCRIPTIONS.get(rating, '')})"
-             for agency, rating in latest_ratings.items()]
-        )
-        snapshot.append({"metric": "Credit Rating / Outlook", "value": rating_str})
-
-        # ---- Financial Metrics from SnapshotDefinition ----
-        snapshot_defs = SnapshotDefinition.objects.filter(metric_type='financial').order_by('order')
-        for sd in snapshot_defs:
-            metric = next((m for m in company.financial_metrics.all() if m.name == sd.metric_name), None)
-            if metric and metric.values.exists():
-                latest_value = max(metric.values.all(), key=lambda v: v.year)
-                value_str = f"~ ₹ {latest_value.value} Crore (as of {latest_value.year})"
-                snapshot.append({"metric": sd.display_name, "value": value_str})
-
-        serializer = SnapshotItemSerializer(snapshot, many=True)
-        return Response({"company": company.issuer_name, "snapshot": serializer.data}, status=status.HTTP_200_OK)
+class YieldCurveView(SwaggerParamAPIView):
+    """
+    Fitted yield curves (YieldCurveService) with their Nelson-Siegel
+    parameters and the curve yield at each requested tenor.
+    """
+    permission_classes = [AllowAny]
+    DEFAULT_TENORS = (0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30)
+    MAX_TENORS = 100
+    swagger_parameters = [
+        OpenApiParameter("curve_type", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=CurveType.values,
+                         description="Only curves of this type (default: all)"),
+        OpenApiParameter("bucket", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                         description="Only this rating bucket / issuer type, e.g. AA or CENTRAL_GOV"),
+        OpenApiParameter("tenors", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                         description="Comma-separated tenors in years (default: 0.25 to 30)"),
+    ]
+
+    def get(self, request):
+        curve_type = request.GET.get("curve_type")
+        if curve_type and curve_type not in CurveType.values:
+            return Response({"error": f"curve_type must be one of {', '.join(CurveType.values)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tenors = [float(t) for t in request.GET["tenors"].split(",")] if request.GET.get("tenors") else self.DEFAULT_TENORS
+        except ValueError:
+            return Response({"error": "tenors must be comma-separated numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(tenors) > self.MAX_TENORS or any(not 0 < t <= 100 for t in tenors):
+            return Response({"error": f"At most {self.MAX_TENORS} tenors, each in (0, 100] years"}, status=status.HTTP_400_BAD_REQUEST)
+
+        bucket = request.GET.get("bucket")
+        curves = [
+            curve for key, curve in sorted(YieldCurveService.curves(curve_type).items())
+            if not bucket or curve.bucket == bucket
+        ]
+        tenor_array = np.array(tenors, dtype=np.float64)
+        data = []
+        for curve in curves:
+            points = nelson_siegel(tenor_array, curve.beta0, curve.beta1, curve.beta2, curve.tau)
+            data.append({
+                "curve_type": curve.curve_type,
+                "bucket": curve.bucket,
+                "parameters": {"beta0": curve.beta0, "beta1": curve.beta1, "beta2": curve.beta2, "tau": curve.tau},
+                "bond_count": curve.bond_count,
+                "rmse_percent": round(curve.rmse_percent, 4),
+                "tenure_range_years": [round(curve.min_tenure_years, 4), round(curve.max_tenure_years, 4)],
+                "as_of": curve.as_of,
+                "points": [{"tenor": t, "yield_percent": round(float(y), 4)} for t, y in zip(tenors, points)],
+            })
+        return Response({"curves": data}, status=status.HTTP_200_OK)
+
+
+def bond_facets_signature(view, request):
+    filterset = view.get_filterset(request)
+    try:
+        return BondFacetService.signature(filterset) if filterset.is_valid() else None
+    except ValidationError:
+        return None
+
+
+class BondFacetsView(SwaggerParamAPIView):
+    """
+    Screener facet counts (BondFacetService) for the bonds BondsListView
+    would list under the same BondFilter params: per issuer type, tax
+    category, rating bucket, interest frequency, secured, perpetual and
+    tenure bucket, from one grouped query. Cached per normalized filter set.
+    """
+    permission_classes = [AllowAny]
+    swagger_parameters = [
+        OpenApiParameter(name, OpenApiTypes.STR, OpenApiParameter.QUERY, description=str(filter_.label or ""))
+        for name, filter_ in BondFilter.base_filters.items()
+    ]
+
+    def get_filterset(self, request):
+        if getattr(self, "_filterset", None) is None:
+            queryset = ISINBasicInfo.objects.filter(isin_active=True, maturity_date__gte=Now())
+            self._filterset = BondFilter(request.query_params, queryset=queryset, request=request)
+        return self._filterset
+
+    # Tenure buckets move with the date, so entries also expire
+    @versioned_response_cache("bond-facets", ttl=3600, signature=bond_facets_signature)
+    def get(self, request):
+        filterset = self.get_filterset(request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            queryset = filterset.qs
+            return Response(BondFacetService.counts(queryset), status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({"error": " ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BondCalculatorView(SwaggerParamAPIView):
+    """
+    Price <-> yield calculator (BondCalculatorService).
+
+    GET prices one scenario from query parameters. POST takes
+    {"scenarios": [...]} with up to BondCalculatorService.MAX_SCENARIOS
+    scenarios, each naming an ISIN or explicit terms; results come back in
+    the same order, with {"error": ...} for scenarios that cannot be priced.
+    """
+    permission_classes = [AllowAny]
+    swagger_parameters = [
+        OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("price", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
+                         description="Clean price per bond (Rs); give this or yield_percent"),
+        OpenApiParameter("yield_percent", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
+                         description="Yield to the redemption date, in percent"),
+        OpenApiParameter("settlement_date", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                         description="Default: today plus the bond's settlement cycle"),
+        OpenApiParameter("quantity", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Number of bonds (default 1)"),
+        OpenApiParameter("redemption", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["maturity", "call", "put"]),
+    ]
+
+    def get(self, request):
+        serializer = CalculatorScenarioSerializer(data=request.GET.dict())
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = BondCalculatorService.calculate([serializer.validated_data])[0]
+        return Response(result, status=status.HTTP_400_BAD_REQUEST if "error" in result else status.HTTP_200_OK)
+
+    @extend_schema(
+        request=CalculatorRequestSerializer,
+        responses={200: dict, 400: dict},
+        description="Price or yield up to 500 scenarios, each for an ISIN or explicit bond terms."
+    )
+    def post(self, request):
+        serializer = CalculatorRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": BondCalculatorService.calculate(serializer.validated_data["scenarios"])}, status=status.HTTP_200_OK)
+
+
+class BondResponseCacheStatsView(APIView):
+    """
+    Hit / miss counters of the versioned bond response cache, per endpoint.
+    DELETE resets the counters.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(ResponseCacheService.stats())
+
+    def delete(self, request):
+        ResponseCacheService.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ContactMessageView(SwaggerParamAPIView):
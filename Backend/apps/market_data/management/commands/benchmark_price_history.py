@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from apps.bonds.models import ISINBasicInfo
+from apps.market_data.models import PriceTick
+from apps.market_data.services.price_tick_store import PriceTickStore
+from apps.market_data.services.price_bar_service import PriceBarService
+from apps.market_data.views import PriceHistoryView
+import datetime
+import random
+import statistics
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the price history store: ingest a synthetic tick history for N ISINs, "
+        "downsample it to daily bars and time the bar queries and the price-history endpoint "
+        "(all inside a transaction that is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--isins", type=int, default=200)
+        parser.add_argument("--days", type=int, default=365, help="Calendar days of history, ending today")
+        parser.add_argument("--ticks", type=int, default=10, help="Ticks per ISIN per day")
+        parser.add_argument("--chunk-size", type=int, default=50_000)
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        isin_codes = list(ISINBasicInfo.objects.order_by("isin_code").values_list("isin_code", flat=True)[:options["isins"]])
+        end = timezone.localdate()
+        start = end - datetime.timedelta(days=options["days"] - 1)
+        self.stdout.write(
+            f"History: {len(isin_codes)} ISINs x {options['days']} days x {options['ticks']} ticks "
+            f"= {len(isin_codes) * options['days'] * options['ticks']} ticks\n"
+        )
+
+        using = router.db_for_write(PriceTick)
+        header = f"{'step':<40} {'ms (median)':>12} {'rows':>10}"
+        try:
+            with transaction.atomic(using=using):
+                self.stdout.write(header)
+                self.stdout.write("-" * len(header))
+
+                started = time.perf_counter()
+                appended = 0
+                chunk = []
+                for tick in self.ticks(isin_codes, start, options["days"], options["ticks"], options["seed"]):
+                    chunk.append(tick)
+                    if len(chunk) >= options["chunk_size"]:
+                        appended += PriceTickStore.ingest(chunk)["appended"]
+                        chunk = []
+                appended += PriceTickStore.ingest(chunk)["appended"]
+                self.row("ingest (COPY)", (time.perf_counter() - started) * 1000, appended)
+
+                started = time.perf_counter()
+                bars = PriceBarService.downsample(start, end)
+                self.row("downsample to daily bars", (time.perf_counter() - started) * 1000, bars)
+                with connections[using].cursor() as cursor:
+                    cursor.execute("ANALYZE price_tick, daily_bar")
+
+                one, many = isin_codes[:1], isin_codes[:50]
+                for name, call in (
+                    ("1 ISIN, 1y daily bars", lambda: PriceBarService.bars(one, start, end)),
+                    ("1 ISIN, 1y weekly bars", lambda: PriceBarService.bars(one, start, end, "week")),
+                    ("1 ISIN, 1y monthly bars", lambda: PriceBarService.bars(one, start, end, "month")),
+                    (f"{len(many)} ISINs, 1y daily bars", lambda: PriceBarService.bars(many, start, end)),
+                    (f"{len(many)} ISINs, 1y monthly bars", lambda: PriceBarService.bars(many, start, end, "month")),
+                ):
+                    ms, result = self.time(call, options["repeat"])
+                    self.row(name, ms, sum(len(rows) for rows in result.values()))
+
+                view = PriceHistoryView.as_view()
+                request = RequestFactory().get("/api/market_data/price-history/", {"isin": one[0]})
+                ms, response = self.time(lambda: view(request).render(), options["repeat"])
+                self.row("price-history endpoint (1y daily)", ms, len(response.data["bars"]))
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def ticks(isin_codes, start, days, per_day, seed):
+        rng = random.Random(seed)
+        prices = {isin_code: 100 + rng.uniform(-5, 5) for isin_code in isin_codes}
+        # 09:15-15:30 IST
+        opened = datetime.time(3, 45, tzinfo=datetime.timezone.utc)
+        session = 6.25 * 3600
+        for offset in range(days):
+            day = datetime.datetime.combine(start + datetime.timedelta(days=offset), opened)
+            for isin_code in isin_codes:
+                for n in range(per_day):
+                    prices[isin_code] *= 1 + rng.gauss(0, 0.001)
+                    yield {
+                        "isin": isin_code,
+                        "price": f"{prices[isin_code]:.4f}",
+                        "quantity": rng.randint(1, 500),
+                        "traded_at": day + datetime.timedelta(seconds=session * n / per_day),
+                        "yield": f"{7.5 + (100 - prices[isin_code]) / 8:.3f}",
+                    }
+
+    @staticmethod
+    def time(call, repeat):
+        call()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), result
+
+    def row(self, name, ms, rows):
+        self.stdout.write(f"{name:<40} {ms:>12.2f} {rows:>10}")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.market_data.services.price_bar_service import PriceBarService
+import datetime
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyBar rows of a range of trading days from the PriceTick history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=datetime.date.fromisoformat, help="First trading day (default: today)")
+        parser.add_argument("--end", type=datetime.date.fromisoformat, help="Last trading day (default: start)")
+
+    def handle(self, *args, **options):
+        start = options["start"] or timezone.localdate()
+        end = options["end"] or start
+        if end < start:
+            raise CommandError("--end is before --start")
+        written = PriceBarService.downsample(start, end)
+        self.stdout.write(self.style.SUCCESS(f"{written} daily bars written for {start}..{end}"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.bonds.services.bond_etl_loader import BondETLLoader
+from apps.market_data.services.price_tick_store import PriceTickStore
+from apps.market_data.services.price_bar_service import PriceBarService
+from itertools import islice
+
+
+class Command(BaseCommand):
+    help = "Append a recorded tick file (.csv, .json or .jsonl) to the PriceTick history and rebuild the daily bars it touches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=50_000, help="Ticks per COPY")
+        parser.add_argument("--no-downsample", action="store_true", help="Leave DailyBar alone")
+
+    def handle(self, *args, **options):
+        appended = rejected = 0
+        first = last = None
+        try:
+            records = BondETLLoader.read_records(options["path"])
+            while True:
+                chunk = list(islice(records, options["chunk_size"]))
+                if not chunk:
+                    break
+                counts = PriceTickStore.ingest(chunk)
+                appended += counts["appended"]
+                rejected += counts["rejected"]
+                if counts["appended"]:
+                    first = min(first or counts["first_day"], counts["first_day"])
+                    last = max(last or counts["last_day"], counts["last_day"])
+        except (ValueError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        bars = 0
+        if first and not options["no_downsample"]:
+            bars = PriceBarService.downsample(first, last)
+        self.stdout.write(self.style.SUCCESS(
+            f"{appended} ticks appended ({rejected} rejected), {bars} daily bars written"
+        ))
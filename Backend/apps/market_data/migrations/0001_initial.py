@@ -0,0 +1,83 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+# Both tables are range-partitioned, which CreateModel cannot express, so the
+# models are unmanaged and the tables are created here. Partitions are added
+# on demand by apps.market_data.services.partitions.ensure_partitions.
+CREATE_TABLES = """
+CREATE TABLE price_tick (
+    id bigserial NOT NULL,
+    isin varchar(12) NOT NULL,
+    traded_at timestamp with time zone NOT NULL,
+    price_rs numeric(18, 4) NOT NULL,
+    yield_percent numeric(6, 3) NULL,
+    quantity bigint NOT NULL
+) PARTITION BY RANGE (traded_at);
+CREATE INDEX price_tick_traded_at_brin ON price_tick USING brin (traded_at);
+
+CREATE TABLE daily_bar (
+    isin varchar(12) NOT NULL,
+    bar_date date NOT NULL,
+    open_rs numeric(18, 4) NOT NULL,
+    high_rs numeric(18, 4) NOT NULL,
+    low_rs numeric(18, 4) NOT NULL,
+    close_rs numeric(18, 4) NOT NULL,
+    close_yield_percent numeric(6, 3) NULL,
+    volume bigint NOT NULL,
+    trades integer NOT NULL,
+    value_rs numeric(24, 4) NOT NULL,
+    PRIMARY KEY (isin, bar_date)
+) PARTITION BY RANGE (bar_date);
+CREATE INDEX daily_bar_bar_date_brin ON daily_bar USING brin (bar_date);
+"""
+
+DROP_TABLES = "DROP TABLE daily_bar; DROP TABLE price_tick;"
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLES, DROP_TABLES),
+        migrations.CreateModel(
+            name='DailyBar',
+            fields=[
+                ('pk', models.CompositePrimaryKey('isin', 'bar_date', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('isin', models.CharField(max_length=12)),
+                ('bar_date', models.DateField()),
+                ('open_rs', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('high_rs', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('low_rs', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('close_rs', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('close_yield_percent', models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True)),
+                ('volume', models.BigIntegerField()),
+                ('trades', models.IntegerField()),
+                ('value_rs', models.DecimalField(decimal_places=4, max_digits=24)),
+            ],
+            options={
+                'db_table': 'daily_bar',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('isin', models.CharField(max_length=12)),
+                ('traded_at', models.DateTimeField()),
+                ('price_rs', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('yield_percent', models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True)),
+                ('quantity', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'price_tick',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,3 +1,58 @@
 from django.db import models
 
-# Create your models here.
+
+class PriceTick(models.Model):
+    """
+    One trade, append-only (written by PriceTickStore).
+
+    The table is range-partitioned by month on traded_at and BRIN-indexed on
+    traded_at; both are created in raw SQL by the migrations, hence
+    managed = False. There is no primary-key constraint: a unique index on a
+    partitioned table has to include traded_at and would be maintained on
+    every insert, and nothing looks ticks up by id. isin is not a foreign key
+    because BondUniverseReloader swaps isin_basic_info out on full reloads.
+    """
+
+    PARTITION_PERIOD = "month"
+    PARTITION_FIELD = "traded_at"
+
+    id = models.BigAutoField(primary_key=True)
+    isin = models.CharField(max_length=12)
+    traded_at = models.DateTimeField()
+    price_rs = models.DecimalField(max_digits=18, decimal_places=4)
+    yield_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    quantity = models.BigIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = "price_tick"
+
+
+class DailyBar(models.Model):
+    """
+    OHLCV bar per ISIN per trading day, rolled up from PriceTick by
+    PriceBarService.downsample. Weekly and monthly bars are rolled up from
+    these at query time (PriceBarService.bars).
+
+    Range-partitioned by year on bar_date (managed = False, see PriceTick);
+    the (isin, bar_date) primary key serves the per-bond history reads.
+    """
+
+    PARTITION_PERIOD = "year"
+    PARTITION_FIELD = "bar_date"
+
+    pk = models.CompositePrimaryKey("isin", "bar_date")
+    isin = models.CharField(max_length=12)
+    bar_date = models.DateField()
+    open_rs = models.DecimalField(max_digits=18, decimal_places=4)
+    high_rs = models.DecimalField(max_digits=18, decimal_places=4)
+    low_rs = models.DecimalField(max_digits=18, decimal_places=4)
+    close_rs = models.DecimalField(max_digits=18, decimal_places=4)
+    close_yield_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    volume = models.BigIntegerField()
+    trades = models.IntegerField()
+    value_rs = models.DecimalField(max_digits=24, decimal_places=4)
+
+    class Meta:
+        managed = False
+        db_table = "daily_bar"
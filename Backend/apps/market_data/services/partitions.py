@@ -0,0 +1,70 @@
+from django.db import connections, router, transaction
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (table, partition start) pairs this process has created or found
+_known = set()
+
+
+def period_start(day, period):
+    if period == "year":
+        return datetime.date(day.year, 1, 1)
+    return datetime.date(day.year, day.month, 1)
+
+
+def next_period(start, period):
+    if period == "year":
+        return datetime.date(start.year + 1, 1, 1)
+    return datetime.date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+
+
+def partition_name(table, start, period):
+    return f"{table}_{start:%Y}" if period == "year" else f"{table}_{start:%Y_%m}"
+
+
+def ensure_partitions(model, first, last, using=None):
+    """
+    Create the missing range partitions of `model` (PARTITION_PERIOD "month"
+    or "year" on PARTITION_FIELD) covering the dates first..last. Returns
+    the partitions created.
+    """
+    period = model.PARTITION_PERIOD
+    table = model._meta.db_table
+    start = period_start(first, period)
+    wanted = []
+    while start <= last:
+        if (table, start) not in _known:
+            wanted.append(start)
+        start = next_period(start, period)
+    if not wanted:
+        return []
+
+    connection = connections[using or router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        for start in wanted:
+            name = partition_name(table, start, period)
+            if name not in existing:
+                # Bounds are dates; for timestamptz keys they are midnight in
+                # the connection time zone (UTC under USE_TZ)
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+                    [start, next_period(start, period)],
+                )
+                created.append(name)
+                # Not cached until committed: a rolled-back run drops the partition again
+                transaction.on_commit(lambda key=(table, start): _known.add(key), using=connection.alias)
+            else:
+                _known.add((table, start))
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}")
+    return created
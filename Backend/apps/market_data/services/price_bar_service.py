@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+from apps.market_data.models import DailyBar, PriceTick
+from apps.market_data.services.partitions import ensure_partitions, period_start
+import datetime
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PriceBarService:
+    """
+    OHLCV bars from the PriceTick history.
+
+    downsample() rolls ticks into DailyBar rows with one INSERT ... SELECT
+    ... GROUP BY per call; bars() reads day bars, or rolls them up into week
+    or month bars in the same statement, for any number of ISINs in one
+    round trip. Trading days are dates in settings.TIME_ZONE.
+    """
+
+    INTERVALS = ("day", "week", "month")
+    BAR_FIELDS = ("open_rs", "high_rs", "low_rs", "close_rs", "close_yield_percent", "volume", "trades", "value_rs")
+
+    @classmethod
+    def downsample(cls, start, end=None):
+        """
+        Rebuild the DailyBar rows of trading days start..end (default: start)
+        from their ticks. Unchanged bars are not rewritten. Returns the
+        number of bars inserted or changed.
+        """
+        end = end or start
+        started = time.perf_counter()
+        using = router.db_for_write(DailyBar)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        tz = timezone.get_default_timezone()
+        lower = datetime.datetime.combine(start, datetime.time.min, tzinfo=tz)
+        upper = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+
+        columns = ", ".join(qn(column) for column in ("isin", "bar_date") + cls.BAR_FIELDS)
+        changed = " OR ".join(f"b.{qn(field)} IS DISTINCT FROM EXCLUDED.{qn(field)}" for field in cls.BAR_FIELDS)
+        sql = (
+            f"INSERT INTO {qn(DailyBar._meta.db_table)} AS b ({columns}) "
+            f"SELECT t.isin, t.bar_date, "
+            f"(array_agg(t.price_rs ORDER BY t.traded_at, t.id))[1], "
+            f"max(t.price_rs), min(t.price_rs), "
+            f"(array_agg(t.price_rs ORDER BY t.traded_at DESC, t.id DESC))[1], "
+            f"(array_agg(t.yield_percent ORDER BY t.traded_at DESC, t.id DESC) "
+            f"FILTER (WHERE t.yield_percent IS NOT NULL))[1], "
+            f"sum(t.quantity), count(*), sum(t.price_rs * t.quantity) "
+            f"FROM (SELECT *, ({qn('traded_at')} AT TIME ZONE %s)::date AS bar_date "
+            f"FROM {qn(PriceTick._meta.db_table)} "
+            f"WHERE {qn('traded_at')} >= %s AND {qn('traded_at')} < %s) AS t "
+            f"GROUP BY t.isin, t.bar_date "
+            f"ON CONFLICT ({qn('isin')}, {qn('bar_date')}) DO UPDATE SET "
+            + ", ".join(f"{qn(field)} = EXCLUDED.{qn(field)}" for field in cls.BAR_FIELDS)
+            + f" WHERE {changed}"
+        )
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            ensure_partitions(DailyBar, start, end, using=using)
+            cursor.execute(sql, [settings.TIME_ZONE, lower, upper])
+            written = cursor.rowcount
+        logger.info(f"Downsampled ticks {start}..{end}: {written} daily bars written in {time.perf_counter() - started:.2f}s")
+        return written
+
+    @classmethod
+    def bars(cls, isin_codes, start, end, interval="day"):
+        """
+        {isin: [bar, ...]} for trading days start..end, oldest first. Week and
+        month bars are aligned to the period start (so the first one may
+        begin before `start`) and dated by it. Dates are ISO strings and
+        prices / yields floats, ready for JSON; vwap is value / volume over
+        the bar.
+        """
+        if interval not in cls.INTERVALS:
+            raise ValueError(f"Unknown interval {interval!r}; expected one of {', '.join(cls.INTERVALS)}")
+        isin_codes = list(dict.fromkeys(isin_codes))
+        if not isin_codes:
+            return {}
+        connection = connections[router.db_for_read(DailyBar)]
+        qn = connection.ops.quote_name
+        table = qn(DailyBar._meta.db_table)
+        if interval == "day":
+            sql = (
+                f"SELECT isin, bar_date::text AS day, open_rs::float8, high_rs::float8, low_rs::float8, close_rs::float8, "
+                f"close_yield_percent::float8, volume, trades, (value_rs / NULLIF(volume, 0))::float8 "
+                f"FROM {table} WHERE isin = ANY(%s) AND bar_date BETWEEN %s AND %s "
+                f"ORDER BY isin, bar_date"
+            )
+        else:
+            if interval == "week":
+                start -= datetime.timedelta(days=start.weekday())
+            else:
+                start = period_start(start, "month")
+            sql = (
+                f"SELECT isin, date_trunc('{interval}', bar_date)::date::text AS bucket, "
+                f"(array_agg(open_rs ORDER BY bar_date))[1]::float8, max(high_rs)::float8, min(low_rs)::float8, "
+                f"(array_agg(close_rs ORDER BY bar_date DESC))[1]::float8, "
+                f"(array_agg(close_yield_percent ORDER BY bar_date DESC) "
+                f"FILTER (WHERE close_yield_percent IS NOT NULL))[1]::float8, "
+                f"sum(volume)::bigint, sum(trades)::bigint, (sum(value_rs) / NULLIF(sum(volume), 0))::float8 "
+                f"FROM {table} WHERE isin = ANY(%s) AND bar_date BETWEEN %s AND %s "
+                f"GROUP BY isin, bucket ORDER BY isin, bucket"
+            )
+
+        result = {isin_code: [] for isin_code in isin_codes}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [isin_codes, start, end])
+            for isin_code, day, open_, high, low, close, close_yield, volume, trades, vwap in cursor.fetchall():
+                result[isin_code].append({
+                    "date": day, "open": open_, "high": high, "low": low, "close": close,
+                    "yield": close_yield, "volume": volume, "trades": trades, "vwap": vwap,
+                })
+        return result
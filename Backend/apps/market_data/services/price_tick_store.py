@@ -0,0 +1,106 @@
+from django.db import connections, router, transaction
+from django.utils import timezone
+from apps.market_data.models import PriceTick
+from apps.market_data.services.partitions import ensure_partitions
+from decimal import Decimal, InvalidOperation
+import datetime
+import io
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PriceTickStore:
+    """
+    Append-only writer for PriceTick.
+
+    Ticks are the dicts of apps.bonds.services.market_data_updater.TickSource
+    ("isin", "price", "quantity", "traded_at", optional "yield"). A batch is
+    validated in Python, so one bad tick cannot abort the COPY, and appended
+    with a single COPY after creating any monthly partitions it needs.
+    """
+
+    COLUMNS = ("isin", "traded_at", "price_rs", "yield_percent", "quantity")
+    # numeric(18, 4) / numeric(6, 3) bounds, see PriceTick
+    MAX_PRICE = Decimal("1e14")
+    MAX_YIELD = Decimal("1000")
+    NULL = "\\N"
+
+    @staticmethod
+    def parse_time(value):
+        if isinstance(value, str):
+            value = datetime.datetime.fromisoformat(value)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    @classmethod
+    def parse(cls, tick):
+        """(isin, traded_at, price, yield, quantity) for a valid tick, else None."""
+        try:
+            isin_code = tick["isin"].strip()
+            price = Decimal(tick["price"])
+            quantity = int(tick["quantity"])
+            traded_at = cls.parse_time(tick["traded_at"])
+            yield_percent = tick.get("yield")
+            yield_percent = Decimal(yield_percent) if yield_percent not in (None, "") else None
+        except (KeyError, TypeError, ValueError, InvalidOperation, AttributeError):
+            return None
+        if not isin_code or len(isin_code) > 12 or not price.is_finite() or not 0 < price < cls.MAX_PRICE:
+            return None
+        if quantity <= 0 or quantity >= 2 ** 63:
+            return None
+        if yield_percent is not None and not (yield_percent.is_finite() and abs(yield_percent) < cls.MAX_YIELD):
+            return None
+        return isin_code, traded_at, price, yield_percent, quantity
+
+    @classmethod
+    def append(cls, rows, using=None):
+        """COPY parsed rows (see parse) into PriceTick. Returns the number appended."""
+        if not rows:
+            return 0
+        using = using or router.db_for_write(PriceTick)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        buffer = io.StringIO()
+        first = last = None
+        for isin_code, traded_at, price, yield_percent, quantity in rows:
+            day = traded_at.astimezone(datetime.timezone.utc).date()
+            if first is None or day < first:
+                first = day
+            if last is None or day > last:
+                last = day
+            buffer.write(
+                f"{isin_code}\t{traded_at.isoformat()}\t{price}\t"
+                f"{cls.NULL if yield_percent is None else yield_percent}\t{quantity}\n"
+            )
+        buffer.seek(0)
+
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            ensure_partitions(PriceTick, first, last, using=using)
+            cursor.copy_expert(
+                f"COPY {qn(PriceTick._meta.db_table)} ({', '.join(qn(column) for column in cls.COLUMNS)}) FROM STDIN",
+                buffer,
+            )
+        return len(rows)
+
+    @classmethod
+    def ingest(cls, ticks, using=None):
+        """Validate and append a batch of ticks. Returns counts and the trading days touched."""
+        started = time.perf_counter()
+        rows, rejected = [], 0
+        for tick in ticks:
+            row = cls.parse(tick)
+            if row is None:
+                rejected += 1
+            else:
+                rows.append(row)
+        appended = cls.append(rows, using=using)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Price ticks: {appended} appended, {rejected} rejected in {elapsed:.2f}s")
+        # Trading days touched, for PriceBarService.downsample
+        first_day = timezone.localdate(min(row[1] for row in rows)) if rows else None
+        last_day = timezone.localdate(max(row[1] for row in rows)) if rows else None
+        return {"appended": appended, "rejected": rejected, "first_day": first_day, "last_day": last_day, "seconds": elapsed}
@@ -0,0 +1,12 @@
+from celery import shared_task
+
+
+@shared_task
+def downsample_price_ticks(days=2):
+    # Today's bar moves with every flush of the market-data updater; the
+    # previous day is redone for late ticks.
+    import datetime
+    from django.utils import timezone
+    from apps.market_data.services.price_bar_service import PriceBarService
+    today = timezone.localdate()
+    return PriceBarService.downsample(today - datetime.timedelta(days=days - 1), today)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import PriceHistoryView, PriceBarsView
+
+urlpatterns = [
+    path('price-history/', PriceHistoryView.as_view(), name='price-history'),
+    path('bars/', PriceBarsView.as_view(), name='price-bars'),
+]
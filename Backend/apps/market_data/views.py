@@ -1,3 +1,84 @@
-from django.shortcuts import render
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from django.utils import timezone
+from apps.utils.swagger_base import SwaggerParamAPIView
+from apps.bonds.models import ISINBasicInfo
+from .services.price_bar_service import PriceBarService
+import datetime
 
-# Create your views here.
+INTERVAL_PARAMETERS = [
+    OpenApiParameter("interval", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=PriceBarService.INTERVALS,
+                     description="Bar size (default day)"),
+    OpenApiParameter("start", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="First trading day (default: a year before end)"),
+    OpenApiParameter("end", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Last trading day (default: today)"),
+]
+
+
+def bar_range(request):
+    """(interval, start, end) from the query string; raises ValueError."""
+    interval = request.GET.get("interval") or "day"
+    if interval not in PriceBarService.INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(PriceBarService.INTERVALS)}")
+    end = request.GET.get("end")
+    end = datetime.date.fromisoformat(end) if end else timezone.localdate()
+    start = request.GET.get("start")
+    start = datetime.date.fromisoformat(start) if start else end - datetime.timedelta(days=365)
+    if start > end:
+        raise ValueError("start must not be after end")
+    return interval, start, end
+
+
+class PriceHistoryView(SwaggerParamAPIView):
+    """
+    OHLCV price history of one bond, oldest bar first (a year of daily bars
+    by default).
+    """
+    permission_classes = [AllowAny]
+    swagger_parameters = [
+        OpenApiParameter("isin", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True, description="ISIN code of the bond"),
+        *INTERVAL_PARAMETERS,
+    ]
+
+    def get(self, request):
+        isin_code = request.GET.get("isin")
+        if not isin_code:
+            return Response({"error": "ISIN code required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            interval, start, end = bar_range(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        bars = PriceBarService.bars([isin_code], start, end, interval)[isin_code]
+        if not bars and not ISINBasicInfo.objects.filter(isin_code=isin_code).exists():
+            return Response({"error": "Bond not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"isin": isin_code, "interval": interval, "start": start, "end": end, "bars": bars})
+
+
+class PriceBarsView(SwaggerParamAPIView):
+    """
+    OHLCV bars of up to MAX_ISINS bonds in one request, keyed by ISIN (for
+    comparison charts and analytics).
+    """
+    permission_classes = [AllowAny]
+    MAX_ISINS = 100
+    swagger_parameters = [
+        OpenApiParameter("isins", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True,
+                         description=f"Comma-separated ISIN codes (at most {MAX_ISINS})"),
+        *INTERVAL_PARAMETERS,
+    ]
+
+    def get(self, request):
+        isin_codes = [code.strip() for code in request.GET.get("isins", "").split(",") if code.strip()]
+        if not isin_codes:
+            return Response({"error": "isins required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(isin_codes) > self.MAX_ISINS:
+            return Response({"error": f"At most {self.MAX_ISINS} ISINs per request"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            interval, start, end = bar_range(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        bars = PriceBarService.bars(isin_codes, start, end, interval)
+        return Response({"interval": interval, "start": start, "end": end, "bars": bars})
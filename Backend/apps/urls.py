@@ -18,6 +18,9 @@ urlpatterns = [
     # # Bonds app
     path('bonds/', include('apps.bonds.urls')),
 
+    # Market Data app
+    path('market_data/', include('apps.market_data.urls')),
+
     path('kyc/',include('apps.kyc.urls')),
     
     
@@ -33,9 +36,6 @@ urlpatterns = [
     # # Investments app
     # path('api/investments/', include('apps.investments.urls')),
 
-    # # Market Data app
-    # path('api/market_data/', include('apps.market_data.urls')),
-
     # # Notifications app
     # path('api/notifications/', include('apps.notifications.urls')),
 
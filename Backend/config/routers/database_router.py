@@ -39,6 +39,7 @@ class HybridDatabaseRouter:
         
         # Apps using secondary database
         'bonds': 'transformation',
+        'market_data': 'transformation',
         # 'analytics': 'secondary',
         # 'logs': 'secondary',
     }
@@ -518,6 +518,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.humanize",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -537,6 +538,7 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     
     "apps.bonds",
+    "apps.market_data",
     "apps.compliance", 
     "apps.dashboard",
     "apps.investments",
@@ -646,28 +648,28 @@ if os.getenv("USE_SQLITE", "False").lower() == "true":
     }
 
 # Cache Configuration
-
-
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         },
-#         "KEY_PREFIX": "bond_platform",
-#         "TIMEOUT": 300,
-#     },
-#     "otp": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/2"),
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         },
-#         "KEY_PREFIX": "otp",
-#         "TIMEOUT": 600,
-#     }
-# }
+# "default" must be shared by every web worker and Celery process: bond caches
+# are invalidated through it (apps.bonds.services.bond_data_version)
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+        "KEY_PREFIX": "bond_platform",
+        "TIMEOUT": 300,
+    },
+    "otp": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/2"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+        "KEY_PREFIX": "otp",
+        "TIMEOUT": 600,
+    }
+}
 
 # Password Hashers
 PASSWORD_HASHERS = [
@@ -858,7 +860,40 @@ CELERY_BEAT_SCHEDULE = {
     "cleanup-expired-otps-every-hour": {
         "task": "apps.authentication.tasks.cleanup_expired_otps",
         "schedule": 3600,  # every 1 hour
-    }
+    },
+    # Bond duration / convexity / current and average yield (time to
+    # maturity moves daily), then pricing and the curves
+    "refresh-bond-analytics-daily": {
+        "task": "apps.bonds.tasks.refresh_bond_analytics",
+        "schedule": 24 * 3600,  # every day
+    },
+    # Accrued interest / dirty price / YTM and yield to call, put and worst, then the
+    # post-tax yields (also after each analytics refresh and ETL run); picks up
+    # intraday prices
+    "refresh-bond-pricing": {
+        "task": "apps.bonds.tasks.refresh_bond_pricing",
+        "schedule": 10 * 60,  # every 10 minutes
+    },
+    # StatsView totals (also refreshed after each successful ETL run)
+    "refresh-catalogue-stats-hourly": {
+        "task": "apps.bonds.tasks.refresh_catalogue_stats",
+        "schedule": 3600,  # every 1 hour
+    },
+    # Stale / missing CompanyFinancialProfile rows (also run after each ETL run)
+    "sync-financial-profiles": {
+        "task": "apps.bonds.tasks.sync_financial_profiles",
+        "schedule": 10 * 60,  # every 10 minutes
+    },
+    # Stale / missing BondSnapshotDocument rows (also run after each ETL run)
+    "rebuild-bond-snapshots": {
+        "task": "apps.bonds.tasks.rebuild_bond_snapshots",
+        "schedule": 10 * 60,  # every 10 minutes
+    },
+    # DailyBar rows for today and yesterday from the PriceTick history
+    "downsample-price-ticks": {
+        "task": "apps.market_data.tasks.downsample_price_ticks",
+        "schedule": 10 * 60,  # every 10 minutes
+    },
 }
 
 # ------------------   OTP Settings     -----------------------
@@ -871,6 +906,31 @@ USE_CELERY_FOR_OTP = False   # Set False to disable Celery and use direct sendin
   
 # -------------------------------------------------------------
 
+# ------------------   Bonds Settings     ---------------------
+# Serve BondsListView filters / ordering from the in-process NumPy snapshot
+# (apps.bonds.services.bond_universe_snapshot); falls back to SQL when stale
+BOND_UNIVERSE_SNAPSHOT_ENABLED = os.getenv("BOND_UNIVERSE_SNAPSHOT_ENABLED", "False").lower() == "true"
+# Versioned response cache for public bond endpoints (invalidated by BondDataVersion,
+# the TTL only bounds memory). It and the snapshot stay off on a per-process
+# "default" cache (LocMem / Dummy), which Celery's invalidations cannot reach
+BOND_RESPONSE_CACHE_ENABLED = os.getenv("BOND_RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+BOND_RESPONSE_CACHE_TTL = 24 * 3600
+# After the TTL an entry is still served for this long while one worker
+# recomputes it (apps.bonds.services.cached_compute)
+BOND_RESPONSE_CACHE_STALE_TTL = 3600
+# Intraday market data (manage.py run_market_data_updater): tick feed class and
+# the coalescing window in seconds, i.e. one ISINDetailedInfo write per window
+BOND_TICK_SOURCE = os.getenv("BOND_TICK_SOURCE", "apps.bonds.services.market_data_updater.ReplayTickSource")
+BOND_MARKET_DATA_WINDOW = float(os.getenv("BOND_MARKET_DATA_WINDOW", "1.0"))
+# Investor slabs for post-tax yields (apps.bonds.services.post_tax_yield_service):
+# slab -> marginal income-tax rate in percent, cess included. BondFilter's
+# tax_slab picks one (default BOND_DEFAULT_TAX_SLAB)
+BOND_TAX_SLABS = {"0": 0.0, "5": 5.2, "10": 10.4, "15": 15.6, "20": 20.8, "30": 31.2}
+BOND_DEFAULT_TAX_SLAB = "30"
+# Long-term capital gains on listed bonds held over 12 months, cess included
+BOND_LTCG_TAX_PERCENT = 13.0
+# -------------------------------------------------------------
+
 
 # -------------------------
 # Django REST Framework
@@ -294,9 +294,15 @@ REST_FRAMEWORK = {
 }
 
 CACHES = {
+    # Shared by the gunicorn workers and Celery (see base.py)
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+        "KEY_PREFIX": "bond_platform",
+        "TIMEOUT": 300,
     },
     "otp": {
         "BACKEND": "django_redis.cache.RedisCache",  